@@ -0,0 +1,146 @@
+"""
+Aggregation benchmark for CodeChrono summaries.
+
+Builds an EventBuffer with synthetic columns and times the per-file and
+per-language counts and the weekday/hour heatmap, with NumPy (if installed)
+and with the pure-Python fallback, against the original approach of
+re-parsing ISO timestamps per event.
+
+The kernels leave out loading the events, which dominates a query over the
+on-disk log. The end-to-end section therefore writes an event log and times
+ActivityTracker.get_activity_summary from it: the first query parses the
+segments, later ones reuse the cached columns. It also times the former way
+of loading, which read the range into a throwaway buffer on every query.
+
+Usage:
+    python benchmarks/bench_aggregate.py [--events N] [--files N] [--languages N] [--log-events N]
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codechrono.core import aggregate  # noqa: E402
+from codechrono.core.events import EventBuffer  # noqa: E402
+
+
+def synthetic_buffer(count: int, files: int, languages: int) -> EventBuffer:
+    """Fill the buffer columns directly; appending 10M events one by one is itself slow."""
+    rng = random.Random(42)
+    buffer = EventBuffer()
+    for i in range(files):
+        buffer.paths.intern(f"/home/dev/monorepo/services/svc{i % 50}/src/module_{i}.py")
+    for i in range(languages):
+        buffer.languages.intern(f"lang{i}")
+    start = time.time() - 90 * 86400
+    step = 90 * 86400 / count
+    buffer.timestamps = array("d", (start + i * step for i in range(count)))
+    buffer.path_ids = array("I", (rng.randrange(files) for _ in range(count)))
+    buffer.event_codes = array("B", bytes(count))
+    buffer.language_ids = array("H", (rng.randrange(languages) for _ in range(count)))
+    return buffer
+
+
+def timed(label: str, func) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:28s} {elapsed:8.3f} s")
+
+
+def run(buffer: EventBuffer, lo: int, hi: int) -> None:
+    timed("count_paths", lambda: buffer.count_paths(lo, hi))
+    timed("count_languages", lambda: buffer.count_languages(lo, hi))
+    timed("heatmap", lambda: buffer.heatmap(lo, hi))
+
+
+def iso_baseline(buffer: EventBuffer, lo: int, hi: int, cutoff: float) -> None:
+    """The pre-columnar summary: parse every stored ISO string and compare."""
+    start = datetime.fromtimestamp(cutoff)
+    isos = [datetime.fromtimestamp(ts).isoformat() for ts in buffer.timestamps[lo:hi]]
+    started = time.perf_counter()
+    sum(1 for iso in isos if datetime.fromisoformat(iso) >= start)
+    print(f"  {'fromisoformat filter':28s} {time.perf_counter() - started:8.3f} s  (parsing only)")
+
+
+def end_to_end(count: int, files: int, languages: int) -> None:
+    """Time summaries of the last 30 days of a 90-day event log."""
+    from codechrono.core.tracker import ActivityTracker
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Path(tmp) / "config.json"
+        config.write_text(json.dumps({"event_log_dir": str(Path(tmp) / "events")}))
+        tracker = ActivityTracker(config)
+        start = time.time() - 90 * 86400
+        step = 90 * 86400 / count
+        for i in range(count):
+            file_id = rng.randrange(files)
+            tracker.event_log.append(f"/home/dev/monorepo/src/module_{file_id}.py", "modified",
+                                     f"lang{file_id % languages}", start + i * step)
+        tracker.event_log.flush()
+        since = datetime.now() - timedelta(days=30)
+        timed("summary, first query", lambda: tracker.get_activity_summary(since))
+        timed("summary, cached", lambda: tracker.get_activity_summary(since))
+        tracker.event_log.append("/home/dev/monorepo/src/new.py", "created", "lang0", time.time())
+        timed("summary, after an append", lambda: tracker.get_activity_summary(since))
+
+        def uncached():
+            buffer = EventBuffer.from_events(tracker.event_log.read(since.timestamp()))
+            buffer.count_paths()
+            buffer.count_languages()
+
+        timed("summary, former load", uncached)
+        tracker.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--languages", type=int, default=40)
+    parser.add_argument("--log-events", type=int, default=1_000_000,
+                        help="Events in the end-to-end event log, 0 to skip it")
+    parser.add_argument("--skip-baseline", action="store_true", help="Do not time the ISO parsing baseline")
+    args = parser.parse_args()
+
+    print(f"Building {args.events:,} events...")
+    buffer = synthetic_buffer(args.events, args.files, args.languages)
+    cutoff = buffer.timestamps[0] + (buffer.timestamps[-1] - buffer.timestamps[0]) / 3
+    lo, hi = buffer.index_range(cutoff)
+    print(f"Window holds {hi - lo:,} events")
+
+    if aggregate.have_numpy():
+        print("NumPy:")
+        run(buffer, lo, hi)
+    else:
+        print("NumPy: not installed")
+
+    numpy = aggregate.np
+    aggregate.np = None
+    try:
+        print("Pure Python:")
+        run(buffer, lo, hi)
+    finally:
+        aggregate.np = numpy
+
+    if not args.skip_baseline:
+        print("Original approach:")
+        iso_baseline(buffer, lo, hi, cutoff)
+
+    if args.log_events:
+        print(f"End to end ({args.log_events:,} events in the log):")
+        end_to_end(args.log_events, args.files, args.languages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Memory benchmark for ActivityTracker event storage.
+
+Compares the original per-file list of dicts (ISO timestamp and event type
+strings keyed by Path) with the columnar EventBuffer.
+
+Usage:
+    python benchmarks/bench_event_memory.py [--events N] [--files N]
+"""
+
+from datetime import datetime
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codechrono.core.events import EVENT_TYPES, EventBuffer  # noqa: E402
+
+
+def synthetic_events(count: int, files: int):
+    """Yield (path, event_type, language, timestamp) tuples."""
+    paths = [f"/home/dev/monorepo/services/svc{i % 50}/src/module_{i}.py" for i in range(files)]
+    start = time.time()
+    for i in range(count):
+        yield paths[(i * 7919) % files], EVENT_TYPES[i % 3], "python", start + i * 0.01
+
+
+def measure(build) -> int:
+    """Return the bytes still allocated by the structure ``build`` returns."""
+    tracemalloc.start()
+    structure = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return size
+
+
+def build_dict_log(count: int, files: int):
+    log = {}
+    for path, event_type, language, timestamp in synthetic_events(count, files):
+        log.setdefault(Path(path), []).append({
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            "event_type": event_type,
+            "language": language,
+        })
+    return log
+
+
+def build_buffer(count: int, files: int):
+    buffer = EventBuffer()
+    for path, event_type, language, timestamp in synthetic_events(count, files):
+        buffer.append(path, event_type, language, timestamp)
+    return buffer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--files", type=int, default=5_000)
+    args = parser.parse_args()
+
+    for name, build in (("dict log", build_dict_log), ("EventBuffer", build_buffer)):
+        size = measure(lambda: build(args.events, args.files))
+        print(
+            f"{name:12s} {size / 2**20:9.1f} MiB  "
+            f"{size / args.events:7.1f} bytes/event  "
+            f"({size * 1_000_000 / args.events / 2**20:.1f} MiB per million events)"
+        )
+
+
+if __name__ == "__main__":
+    main()
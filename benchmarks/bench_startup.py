@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark for CodeChrono's read-only commands.
+
+Shell prompts and editor status bars run ``codechrono.py stats`` many times
+a minute, so what matters is the wall time of a whole fresh process. This
+builds a synthetic session history in a temporary HOME (compacted sessions
+in the database plus a journal tail), then times complete invocations of
+the read commands next to a bare interpreter start and a full import of
+the click CLI for reference. It also checks that the read commands leave
+the data files untouched.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--sessions N] [--budget MS]
+
+With --budget the exit status is 1 when a read command's median exceeds it.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from codechrono.core.storage import SessionRepository  # noqa: E402
+
+SCRIPT = os.path.join(ROOT, "codechrono.py")
+
+COMMANDS = {
+    "python -c pass": [sys.executable, "-c", "pass"],
+    "stats": [sys.executable, SCRIPT, "stats"],
+    "stats --project": [sys.executable, SCRIPT, "stats", "--project"],
+    "stats --json": [sys.executable, SCRIPT, "stats", "--json"],
+    "status": [sys.executable, SCRIPT, "status"],
+    "click CLI (--help)": [sys.executable, SCRIPT, "--help"],
+}
+
+# Reference points, not read commands held to the budget
+REFERENCES = {"python -c pass", "click CLI (--help)"}
+
+
+def build_history(home: Path, sessions: int, tail: int = 20) -> None:
+    """Record a year of sessions and leave ``tail`` of them in the journal."""
+    repository = SessionRepository(home / ".codechrono.json", home / ".codechrono.journal", home / ".codechrono.db")
+    now = datetime.now()
+    step = timedelta(days=365) / sessions
+    languages = ["python", "typescript", "go", "rust", "markdown"]
+    for i in range(sessions):
+        start = now - step * (sessions - i)
+        session = {
+            "language": languages[i % len(languages)],
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=25)).isoformat(),
+            "duration": 25 / 60,
+        }
+        if i % 4:
+            session["project"] = f"project{i % 7}"
+        repository.record(session)
+        if i == sessions - tail - 1:
+            repository.compact()
+    repository.journal.close()
+    repository.store.close()
+
+
+def fingerprint(home: Path) -> Dict[str, tuple]:
+    """Name, size and modification time of every file in ``home``."""
+    return {entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir(home)}
+
+
+def time_command(command: List[str], env: Dict[str, str], runs: int) -> List[float]:
+    """Run a command ``runs`` times (after one warm-up) and return wall times in ms."""
+    subprocess.run(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per command")
+    parser.add_argument("--sessions", type=int, default=20000, help="Sessions in the synthetic history")
+    parser.add_argument("--budget", type=float, help="Fail when a read command's median exceeds this many ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        home = Path(tmp)
+        build_history(home, args.sessions)
+        env = dict(os.environ, HOME=tmp, PYTHONPATH=ROOT)
+        # Installed packages run from cached bytecode; let the warm-up write it
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        before = fingerprint(home)
+
+        print(f"{'command':<20} {'median ms':>10} {'p90 ms':>10} {'min ms':>10}")
+        over_budget = []
+        for name, command in COMMANDS.items():
+            times = sorted(time_command(command, env, args.runs))
+            median = statistics.median(times)
+            p90 = times[min(len(times) - 1, int(len(times) * 0.9))]
+            print(f"{name:<20} {median:>10.1f} {p90:>10.1f} {times[0]:>10.1f}")
+            if args.budget is not None and name not in REFERENCES and median > args.budget:
+                over_budget.append(name)
+
+        after = fingerprint(home)
+        if after != before:
+            print(f"Read commands modified the data files: {sorted(set(before.items()) ^ set(after.items()))}")
+            sys.exit(1)
+
+    if over_budget:
+        print(f"Over the {args.budget:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
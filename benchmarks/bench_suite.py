@@ -0,0 +1,373 @@
+"""
+Benchmark suite for CodeChrono's hot paths.
+
+Drives the event handlers with synthetic event storms (a branch switch
+touching a hundred thousand files, many of them ignored) and the storage
+and query paths with large synthetic histories. Every scenario runs in a
+fresh subprocess with its own temporary HOME, so peak RSS is per scenario
+and nothing touches the real data files. Results are compared against
+stored baselines to catch regressions.
+
+Reported per scenario:
+    events/s    items processed per second of wall time
+    p50/p99     per-call latency in microseconds, where calls are timed
+    peak RSS    maximum resident set size of the scenario process
+
+Usage:
+    python benchmarks/bench_suite.py [--scale F] [--only NAME ...]
+    python benchmarks/bench_suite.py --save-baseline
+    python benchmarks/bench_suite.py --tolerance 0.25   # exit 1 on regression
+
+Baselines are machine specific; regenerate them with --save-baseline on the
+machine that runs the comparison.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import argparse
+import importlib.util
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+
+EXCLUDE_PATTERNS = {"node_modules", ".git", "__pycache__", "*.pyc", "venv", "dist"}
+LANGUAGE_FILES = [".py", ".ts", ".tsx", ".go", ".rs", ".md", ".json", ".yaml"]
+
+
+def storm_paths(count: int, seed: int = 7) -> List[str]:
+    """
+    Paths of a branch switch in a monorepo.
+
+    Roughly 60% are tracked sources, 25% fall under node_modules and 15%
+    under .git, spread over a few thousand directories.
+    """
+    rng = random.Random(seed)
+    root = "/home/dev/monorepo"
+    paths = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            service = rng.randrange(200)
+            module = rng.randrange(40)
+            paths.append(f"{root}/services/svc{service}/src/pkg{module % 8}/mod{module}{rng.choice(LANGUAGE_FILES)}")
+        elif kind < 0.85:
+            paths.append(f"{root}/web/node_modules/dep{rng.randrange(3000)}/lib/index{rng.randrange(5)}.js")
+        else:
+            paths.append(f"{root}/.git/objects/{rng.randrange(256):02x}/{rng.getrandbits(64):016x}")
+    return paths
+
+
+def storm_events(count: int) -> Iterator:
+    """Yield watchdog events of a branch switch: mostly modifications, some creates, deletes and atomic saves."""
+    from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+    rng = random.Random(11)
+    for path in storm_paths(count):
+        kind = rng.random()
+        if kind < 0.7:
+            yield FileModifiedEvent(path)
+        elif kind < 0.85:
+            yield FileCreatedEvent(path)
+        elif kind < 0.95:
+            yield FileDeletedEvent(path)
+        else:
+            yield FileMovedEvent(path + ".tmp", path)
+
+
+def timed_calls(func: Callable, items) -> Dict:
+    """Call ``func`` on every item, timing each call."""
+    latencies = array("Q")
+    clock = time.perf_counter_ns
+    started = clock()
+    for item in items:
+        before = clock()
+        func(item)
+        latencies.append(clock() - before)
+    return {"count": len(latencies), "seconds": (clock() - started) / 1e9, "latencies": latencies}
+
+
+def load_legacy_module():
+    """Import the top-level codechrono.py script (shadowed by the codechrono package)."""
+    spec = importlib.util.spec_from_file_location("codechrono_legacy", os.path.join(ROOT, "codechrono.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def activity_tracker(home: Path, events: int):
+    """Build an ActivityTracker whose event log holds ``events`` events spread over 90 days."""
+    from codechrono.core.tracker import ActivityTracker
+
+    config = home / "config.json"
+    config.write_text(json.dumps({"event_log_dir": str(home / "events"), "exclude_patterns": []}))
+    tracker = ActivityTracker(config)
+    paths = [p for p in storm_paths(5000) if "/src/" in p]
+    languages = [tracker.languages.get_language(p) for p in paths]
+    event_types = ("modified", "modified", "created", "deleted")
+    start = time.time() - 90 * 86400
+    step = 90 * 86400 / events
+    for i in range(events):
+        j = (i * 7919) % len(paths)
+        tracker.event_log.append(paths[j], event_types[i % 4], languages[j], start + i * step)
+    tracker.event_log.flush()
+    return tracker
+
+
+# Scenarios: each takes the scale factor and a temporary HOME and returns
+# {"count", "seconds", optional "latencies", optional "extra"}.
+
+def scenario_handler_storm(scale: float, home: Path) -> Dict:
+    """CodeChangeHandler.on_any_event over a branch switch storm."""
+    from codechrono.core.watcher import CodeChangeHandler
+
+    delivered = []
+    handler = CodeChangeHandler(lambda path, event_type: delivered.append(path), EXCLUDE_PATTERNS)
+    events = list(storm_events(int(100_000 * scale)))
+    result = timed_calls(handler.on_any_event, events)
+    result["extra"] = {"delivered": len(delivered)}
+    return result
+
+
+def scenario_legacy_on_modified(scale: float, home: Path) -> Dict:
+    """CodingTimeTracker.on_modified (enqueue latency) plus draining the worker."""
+    from watchdog.events import FileModifiedEvent
+
+    legacy = load_legacy_module()
+    legacy.console.quiet = True
+    tracker = legacy.CodingTimeTracker([], queue_size=10_000)
+    events = [FileModifiedEvent(p) for p in storm_paths(int(100_000 * scale))]
+    started = time.perf_counter()
+    result = timed_calls(tracker.on_modified, events)
+    tracker.stop()
+    result["seconds"] = time.perf_counter() - started
+    queue = tracker.queue.stats()
+    result["extra"] = {key: queue[key] for key in ("coalesced", "dropped", "max_depth") if key in queue}
+    return result
+
+
+def scenario_should_ignore(scale: float, home: Path) -> Dict:
+    """CodingTimeTracker.should_ignore with the legacy ignore patterns."""
+    legacy = load_legacy_module()
+    tracker = legacy.CodingTimeTracker([])
+    paths = storm_paths(int(200_000 * scale))
+    result = timed_calls(tracker.should_ignore, paths)
+    result["extra"] = {"ignored": sum(map(tracker.should_ignore, paths))}
+    tracker.stop()
+    return result
+
+
+def scenario_save_data(scale: float, home: Path) -> Dict:
+    """Recording a year of sessions and CodingTimeTracker.save_data compacting them."""
+    legacy = load_legacy_module()
+    legacy.console.quiet = True
+    tracker = legacy.CodingTimeTracker([])
+    rng = random.Random(3)
+    count = int(20_000 * scale)
+    start = datetime.now() - timedelta(days=365)
+    sessions = []
+    for i in range(count):
+        begin = start + timedelta(minutes=i * 26)
+        minutes = rng.randrange(2, 90)
+        session = {
+            "language": rng.choice(["python", "typescript", "go", "rust", "markdown"]),
+            "start_time": begin.isoformat(),
+            "end_time": (begin + timedelta(minutes=minutes)).isoformat(),
+            "duration": minutes / 60,
+            "project": f"project{i % 7}",
+        }
+        sessions.append(session)
+    started = time.perf_counter()
+    result = timed_calls(tracker.repository.record, sessions)
+    save_started = time.perf_counter()
+    tracker.save_data()
+    result["seconds"] = time.perf_counter() - started
+    result["extra"] = {"save_data_seconds": round(time.perf_counter() - save_started, 4)}
+    tracker.stop()
+    return result
+
+
+def scenario_activity_summary(scale: float, home: Path) -> Dict:
+    """
+    ActivityTracker.get_activity_summary over a week of a 90-day history (events/s = events scanned).
+
+    The first query parses the log segments and is reported separately; the
+    timed ones reuse the cached columns, with one event appended between them.
+    """
+    events = int(1_000_000 * scale)
+    tracker = activity_tracker(home, events)
+    since = datetime.now() - timedelta(days=7)
+    queries = 5
+    started = time.perf_counter()
+    tracker.get_activity_summary(since)
+    first_query_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def query(i):
+        tracker.event_log.append("/src/app/new.py", "modified", "python", time.time())
+        return tracker.get_activity_summary(since)
+
+    result = timed_calls(query, range(queries))
+    summary = tracker.get_activity_summary(since)
+    result["count"] = summary["total_events"] * queries
+    result["extra"] = {"history_events": events, "queries": queries, "first_query_ms": first_query_ms}
+    tracker.close()
+    return result
+
+
+def scenario_export_data(scale: float, home: Path) -> Dict:
+    """ActivityTracker.export_data of a 90-day history as NDJSON and gzip CSV."""
+    events = int(500_000 * scale)
+    tracker = activity_tracker(home, events)
+    started = time.perf_counter()
+    exported = 0
+    for format in ("ndjson", "csv.gz"):
+        exported += tracker.export_data(format, home / f"export.{format}")
+    tracker.close()
+    return {"count": exported, "seconds": time.perf_counter() - started}
+
+
+def scenario_edit_measure(scale: float, home: Path) -> Dict:
+    """EditMeter.measure of one-line edits to 2000-line source files (only the measuring is timed)."""
+    from codechrono.core.editsize import EditMeter
+
+    meter = EditMeter()
+    rng = random.Random(5)
+    files = [home / f"module{i}.py" for i in range(int(200 * scale) or 1)]
+    lines = [f"value_{i} = compute({i})  # padding to a typical line length\n" for i in range(2000)]
+    for path in files:
+        path.write_text("".join(lines))
+        meter.measure(path)
+    result = {"count": 0, "seconds": 0.0, "latencies": array("Q")}
+    for edit in range(10):
+        for path in files:
+            edited = list(lines)
+            edited[rng.randrange(len(edited))] = f"value = {edit}\n"
+            path.write_text("".join(edited))
+            os.utime(path, ns=(edit + 1, edit + 1))
+        calls = timed_calls(meter.measure, files)
+        result["count"] += calls["count"]
+        result["seconds"] += calls["seconds"]
+        result["latencies"].extend(calls["latencies"])
+    result["extra"] = {"files": len(files), "cached": len(meter), "cache_kib": meter.cache_bytes // 1024}
+    return result
+
+
+SCENARIOS: Dict[str, Callable[[float, Path], Dict]] = {
+    "handler_storm": scenario_handler_storm,
+    "legacy_on_modified": scenario_legacy_on_modified,
+    "should_ignore": scenario_should_ignore,
+    "save_data": scenario_save_data,
+    "activity_summary": scenario_activity_summary,
+    "export_data": scenario_export_data,
+    "edit_measure": scenario_edit_measure,
+}
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(latencies: array, fraction: float) -> float:
+    """Return a latency percentile in microseconds."""
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] / 1000
+
+
+def run_one(name: str, scale: float) -> Dict:
+    """Run a scenario in this process and summarize it."""
+    with tempfile.TemporaryDirectory() as home:
+        raw = SCENARIOS[name](scale, Path(home))
+    result = {
+        "events": raw["count"],
+        "seconds": round(raw["seconds"], 4),
+        "events_per_sec": round(raw["count"] / raw["seconds"]) if raw["seconds"] else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    if raw.get("latencies"):
+        result["p50_us"] = round(percentile(raw["latencies"], 0.50), 2)
+        result["p99_us"] = round(percentile(raw["latencies"], 0.99), 2)
+    result.update(raw.get("extra", {}))
+    return result
+
+
+def run_isolated(name: str, scale: float) -> Dict:
+    """Run a scenario in a subprocess with a temporary HOME."""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home)
+        output = subprocess.run(
+            [sys.executable, __file__, "--run-one", name, "--scale", str(scale)],
+            env=env, cwd=home, capture_output=True, text=True,
+        )
+    if output.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def regressions(name: str, result: Dict, baseline: Optional[Dict], tolerance: float) -> List[str]:
+    """Describe the metrics of ``result`` that are worse than the baseline beyond the tolerance."""
+    if not baseline:
+        return []
+    problems = []
+    if baseline.get("events_per_sec") and result["events_per_sec"] < baseline["events_per_sec"] * (1 - tolerance):
+        problems.append(f"{name}: events/s {result['events_per_sec']} < baseline {baseline['events_per_sec']}")
+    for metric in ("p99_us", "peak_rss_mb"):
+        if baseline.get(metric) and result.get(metric, 0) > baseline[metric] * (1 + tolerance):
+            problems.append(f"{name}: {metric} {result[metric]} > baseline {baseline[metric]}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's size")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Scenarios to run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Store the results in {BASELINE_FILE.name}")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.scale)))
+        return
+
+    stored = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    baselines = stored.get("results", {}) if stored.get("scale") == args.scale else {}
+    results = {}
+    problems = []
+    print(f"{'scenario':20s} {'events':>9s} {'events/s':>11s} {'p50 us':>8s} {'p99 us':>8s} {'RSS MiB':>8s}")
+    for name in args.only or SCENARIOS:
+        result = results[name] = run_isolated(name, args.scale)
+        print(
+            f"{name:20s} {result['events']:9d} {result['events_per_sec'] or 0:11,d} "
+            f"{result.get('p50_us', float('nan')):8.2f} {result.get('p99_us', float('nan')):8.2f} "
+            f"{result['peak_rss_mb']:8.1f}"
+        )
+        problems.extend(regressions(name, result, baselines.get(name), args.tolerance))
+
+    if args.save_baseline:
+        merged = dict(baselines)
+        merged.update(results)
+        BASELINE_FILE.write_text(json.dumps({"scale": args.scale, "results": merged}, indent=2) + "\n")
+        print(f"Saved baselines to {BASELINE_FILE}")
+    elif problems:
+        print("\nRegressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,33 @@
+import os
+import sys
+from pathlib import Path
+
+# File to store the coding time data
+DATA_FILE = Path.home() / '.codechrono.json'
+
+# Append-only journal of sessions ended since the last snapshot of DATA_FILE
+JOURNAL_FILE = Path.home() / '.codechrono.journal'
+
+# Indexed session history, filled from the journal on compaction
+DB_FILE = Path.home() / '.codechrono.db'
+
+# Project names of watched directories, shared with backfill and `start`
+PROJECTS_FILE = Path.home() / '.codechrono' / 'projects.json'
+
+# Control socket of a running watch, answering status and stats from memory
+SOCKET_FILE = Path.home() / '.codechrono.sock'
+
+# status and stats run from shell prompts and editor status bars; answer them
+# read-only before importing click, rich and watchdog (--help still goes to click)
+if __name__ == '__main__' and sys.argv[1:2] in (['status'], ['stats']) and '--help' not in sys.argv:
+    from codechrono.cli.query import main as query_main
+    sys.exit(query_main(sys.argv[1:], DATA_FILE, JOURNAL_FILE, DB_FILE, SOCKET_FILE))
+
 import click
 import json
-import os
 from datetime import datetime, timedelta
-from pathlib import Path
 import time
 from typing import Dict, List, Set
-import threading
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -13,33 +35,28 @@ from rich.panel import Panel
 from rich import box
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-import fnmatch
 import signal
 
+from codechrono.cli import query
+from codechrono.core.bus import EventBus
+from codechrono.core.control import ControlError, ControlServer, call
+from codechrono.core.dispatch import OVERFLOW_POLICIES, BoundedEventQueue, EventWorker
+from codechrono.core.editsize import EditMeter
+from codechrono.core.journal import make_session
+from codechrono.core.metrics import (ACTIVE_SESSIONS, EVENTS_IGNORED, EVENTS_RECEIVED, EVENTS_TRACKED,
+                                     HANDLER_LATENCY, PERSIST_LATENCY, QUEUE_DEPTH, REGISTRY, SnapshotWriter,
+                                     metrics_file)
+from codechrono.core.planner import WatchPlanner
+from codechrono.core.retention import RetentionPolicy, RetentionWorker
+from codechrono.core.scheduler import DeadlineScheduler
+from codechrono.core.storage import SessionRepository
+from codechrono.utils.ignore import IgnoreMatcher
+from codechrono.utils.languages import UNKNOWN_LANGUAGE, LanguageRegistry
+from codechrono.utils.projects import NO_PROJECT, ProjectResolver
+
 # Initialize rich console
 console = Console()
 
-# File to store the coding time data
-DATA_FILE = Path.home() / '.codechrono.json'
-
-# Language detection by file extension
-LANGUAGE_EXTENSIONS = {
-    'python': ['.py', '.pyx', '.pyi', '.pyw'],
-    'javascript': ['.js', '.jsx', '.mjs'],
-    'typescript': ['.ts', '.tsx'],
-    'java': ['.java'],
-    'c++': ['.cpp', '.hpp', '.cc', '.h'],
-    'rust': ['.rs'],
-    'go': ['.go'],
-    'ruby': ['.rb'],
-    'php': ['.php'],
-    'swift': ['.swift'],
-    'kotlin': ['.kt'],
-    'html': ['.html', '.htm'],
-    'css': ['.css', '.scss', '.sass'],
-    'markdown': ['.md', '.markdown'],
-}
-
 # Ignore patterns for files and directories
 IGNORE_PATTERNS = [
     '.*',           # Hidden files
@@ -54,122 +71,223 @@ IGNORE_PATTERNS = [
 ]
 
 class Session:
-    def __init__(self, language: str):
+    def __init__(self, language: str, project: str = None, start_time: datetime = None):
         self.language = language
-        self.start_time = datetime.now()
+        self.project = project
+        self.start_time = start_time or datetime.now()
         self.last_activity = self.start_time
         self.is_active = True
+        # Lines and bytes changed, None unless edits are measured
+        self.edited_lines = None
+        self.edited_bytes = None
+
+    def add_edit(self, edit):
+        """Count a measured edit; None (an unmeasurable one) still marks the session as measured."""
+        if self.edited_lines is None:
+            self.edited_lines = self.edited_bytes = 0
+        if edit is not None:
+            self.edited_lines += edit.lines
+            self.edited_bytes += edit.bytes
 
 class CodingTimeTracker(FileSystemEventHandler):
-    def __init__(self, watched_dirs: List[str], idle_timeout: int = 300):
+    def __init__(self, watched_dirs: List[str], idle_timeout: int = 300, languages: LanguageRegistry = None,
+                 queue_size: int = 10000, overflow: str = "coalesce", bus: EventBus = None,
+                 measure_edits: bool = False):
         self.watched_dirs = watched_dirs
+        # Weighs activity by how much of each file changed
+        self.edit_meter = EditMeter() if measure_edits else None
+        # Optional bus receiving "session" messages when sessions start and end
+        self.bus = bus
+        self.languages = languages or LanguageRegistry()
+        # Watched roots and the git repositories inside them, used to
+        # attribute files to projects without touching the filesystem
+        self.projects = ProjectResolver(PROJECTS_FILE)
+        self.projects.add_watch_roots(watched_dirs)
         self.idle_timeout = idle_timeout  # Time in seconds before session is considered inactive
-        self.active_sessions: Dict[str, Session] = {}
-        self.data = self.load_data()
+        # Active sessions keyed by (project, language)
+        self.active_sessions: Dict[tuple, Session] = {}
+        self.ignore_matcher = IgnoreMatcher(IGNORE_PATTERNS)
+        for directory in watched_dirs:
+            self.ignore_matcher.add_gitignore(Path(directory))
+        self.repository = SessionRepository(DATA_FILE, JOURNAL_FILE, DB_FILE)
+        self.data = self.repository.data
         self.observer = Observer()
+        # Prunes ignored subtrees and keeps within the inotify limits,
+        # polling what does not fit
+        self.planner = WatchPlanner(self.observer, self, self.ignore_matcher)
         self.setup_watchers()
         self.running = True
         
-        # Start session cleanup thread
-        self.cleanup_thread = threading.Thread(target=self.cleanup_inactive_sessions)
-        self.cleanup_thread.daemon = True
-        self.cleanup_thread.start()
-
-    def load_data(self) -> Dict:
-        if DATA_FILE.exists():
-            with open(DATA_FILE) as f:
-                return json.load(f)
-        return {"sessions": [], "languages": {}}
+        # Watchdog callbacks only enqueue; the worker thread owns sessions and
+        # persistence and sleeps until the next session idle deadline
+        self.idle_deadlines = DeadlineScheduler()
+        self.queue = BoundedEventQueue(queue_size, overflow)
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
+        ACTIVE_SESSIONS.set_function(lambda: len(self.active_sessions))
+        self.worker = EventWorker(self.queue, self.handle_modification,
+                                  tick=self.cleanup_inactive_sessions, tick_delay=self.time_to_next_idle)
+        self.worker.start()
 
     def save_data(self):
-        with open(DATA_FILE, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        """Move journaled sessions into the store and snapshot the totals."""
+        self.repository.compact()
 
     def setup_watchers(self):
         """Set up file system watchers for all specified directories."""
-        for directory in self.watched_dirs:
-            self.observer.schedule(self, directory, recursive=True)
+        self.planner.schedule(self.watched_dirs)
 
     def should_ignore(self, path: str) -> bool:
         """Check if the file should be ignored based on ignore patterns."""
-        path_parts = path.split(os.sep)
-        return any(
-            any(fnmatch.fnmatch(part, pattern) for pattern in IGNORE_PATTERNS)
-            for part in path_parts
-        )
+        return self.ignore_matcher.is_ignored(path)
 
     def get_language(self, file_path: str) -> str:
-        """Detect programming language based on file extension."""
-        ext = os.path.splitext(file_path)[1].lower()
-        for language, extensions in LANGUAGE_EXTENSIONS.items():
-            if ext in extensions:
-                return language
-        return "other"
+        """Detect programming language based on file name and extension."""
+        return self.languages.get_language(file_path)
 
-    def on_modified(self, event):
-        """Handle file modification events."""
-        if event.is_directory or self.should_ignore(event.src_path):
-            return
+    def get_project(self, file_path: str) -> str:
+        """Name the project of a file after the repository or watched directory containing it."""
+        return self.projects.resolve(file_path)
 
-        language = self.get_language(event.src_path)
-        if language == "other":
-            return
+    def on_created(self, event):
+        """Watch new directories and register repositories created under a watched directory."""
+        if event.is_directory:
+            self.planner.directory_created(event.src_path)
+            self.projects.directory_created(event.src_path)
 
-        current_time = datetime.now()
-        
-        # Update or create session
-        if language in self.active_sessions:
-            self.active_sessions[language].last_activity = current_time
-        else:
-            self.active_sessions[language] = Session(language)
-            console.print(f"[green]Started tracking {language}[/green]")
+    def on_moved(self, event):
+        """Watch directories and register repositories moved into a watched directory."""
+        if event.is_directory:
+            self.planner.directory_created(event.dest_path)
+            self.projects.directory_created(event.dest_path)
+
+    def on_modified(self, event):
+        """Queue file modification events for the worker thread, dropping ignored paths first."""
+        if not event.is_directory:
+            EVENTS_RECEIVED.inc()
+            # Filtered here so .git and build output never take up queue slots
+            if self.should_ignore(event.src_path):
+                EVENTS_IGNORED.inc()
+                return
+            self.queue.put(event.src_path, (event.src_path, datetime.now()))
+
+    def handle_modification(self, path: str, timestamp: datetime):
+        """Update the session for a modified file (runs on the worker thread)."""
+        with HANDLER_LATENCY.time():
+            language = self.get_language(path)
+            if language == UNKNOWN_LANGUAGE:
+                return
+            EVENTS_TRACKED.inc()
+
+            # Update or create the session of this file's project and language
+            project = self.get_project(path)
+            key = (project, language)
+            if key in self.active_sessions:
+                # A coalesced event keeps its queue position, so a newer
+                # timestamp may already have been handled
+                session = self.active_sessions[key]
+                session.last_activity = max(session.last_activity, timestamp)
+            else:
+                self.active_sessions[key] = Session(language, project, timestamp)
+                console.print(f"[green]Started tracking {language}" + (f" in {project}" if project else "") + "[/green]")
+                self.publish_session("start", language, project, start_time=timestamp.isoformat())
+            if self.edit_meter is not None:
+                self.active_sessions[key].add_edit(self.edit_meter.measure(path))
+            self.idle_deadlines.schedule(key, time.monotonic() + self.idle_timeout)
+
+    def time_to_next_idle(self):
+        """Seconds until the next session goes idle, or None without sessions."""
+        deadline = self.idle_deadlines.next_deadline()
+        return None if deadline is None else deadline - time.monotonic()
 
     def cleanup_inactive_sessions(self):
-        """Periodically check for and cleanup inactive sessions."""
-        while self.running:
-            current_time = datetime.now()
-            for language in list(self.active_sessions.keys()):
-                session = self.active_sessions[language]
-                if (current_time - session.last_activity).total_seconds() > self.idle_timeout:
-                    self.end_session(language)
-            time.sleep(60)  # Check every minute
-
-    def end_session(self, language: str):
-        """End a coding session for a specific language."""
-        if language not in self.active_sessions:
+        """End sessions whose idle deadline has passed (runs on the worker thread)."""
+        for key in self.idle_deadlines.pop_expired(time.monotonic()):
+            self.end_session(key)
+
+    def end_session(self, key: tuple):
+        """End the coding session of a (project, language) pair."""
+        if key not in self.active_sessions:
             return
 
-        session = self.active_sessions[language]
+        session = self.active_sessions[key]
+        language = session.language
         duration = (session.last_activity - session.start_time).total_seconds() / 3600
 
         # Only record sessions that are longer than 1 minute
-        if duration * 60 > 1:
-            session_data = {
-                "language": language,
-                "start_time": session.start_time.isoformat(),
-                "end_time": session.last_activity.isoformat(),
-                "duration": duration
-            }
-            self.data["sessions"].append(session_data)
-
-            if language not in self.data["languages"]:
-                self.data["languages"][language] = {"total_hours": 0, "sessions": 0}
-
-            self.data["languages"][language]["total_hours"] += duration
-            self.data["languages"][language]["sessions"] += 1
-            self.save_data()
+        session_data = make_session(language, session.project, session.start_time, session.last_activity,
+                                    session.edited_lines, session.edited_bytes)
+        if session_data is not None:
+            with PERSIST_LATENCY.time():
+                self.repository.record(session_data)
 
             console.print(f"[yellow]Ended {language} session ({duration:.2f} hours)[/yellow]")
 
-        del self.active_sessions[language]
+        self.publish_session("end", language, session.project, start_time=session.start_time.isoformat(),
+                             end_time=session.last_activity.isoformat(), duration=duration,
+                             edited_lines=session.edited_lines)
+        del self.active_sessions[key]
+        self.idle_deadlines.cancel(key)
+
+    def live_status(self):
+        """Report the open sessions (called from the control socket thread)."""
+        now = datetime.now()
+        return {
+            "active_sessions": [
+                {
+                    "language": session.language,
+                    "project": session.project,
+                    "start_time": session.start_time.isoformat(),
+                    "last_activity": session.last_activity.isoformat(),
+                    "hours": (session.last_activity - session.start_time).total_seconds() / 3600,
+                    "idle_seconds": (now - session.last_activity).total_seconds(),
+                    **({"edited_lines": session.edited_lines} if session.edited_lines is not None else {}),
+                }
+                for session in list(self.active_sessions.values())
+            ],
+        }
+
+    def live_stats(self, days: int = 7, by_project: bool = False):
+        """Report recorded totals plus the open sessions (called from the control socket thread)."""
+        with self.repository.lock:
+            report = query.stats_report(self.repository, days, by_project)
+        return query.add_open_sessions(report, self.live_status()["active_sessions"])
+
+    def flush(self):
+        """Move journaled sessions into the store now (called from the control socket thread)."""
+        with self.repository.lock:
+            pending = len(self.repository.data["sessions"])
+            self.repository.compact()
+        return {"compacted": pending}
+
+    def publish_session(self, action: str, language: str, project: str, **fields):
+        """Announce a session start or end on the bus, if there is one."""
+        if self.bus is not None:
+            self.bus.publish("session", {"action": action, "language": language, "project": project, **fields})
 
     def stop(self):
         """Stop the tracker and cleanup."""
         self.running = False
-        for language in list(self.active_sessions.keys()):
-            self.end_session(language)
-        self.observer.stop()
-        self.observer.join()
+        if self.observer.is_alive():
+            self.observer.stop()
+            self.observer.join()
+        self.planner.stop()
+        # Let the worker drain queued events; afterwards this thread owns the state
+        self.worker.stop()
+        for key in list(self.active_sessions.keys()):
+            self.end_session(key)
+        self.repository.close()
+
+def retention_policy(raw_days, hourly_days):
+    """Build a retention policy from command line options."""
+    settings = {"raw_days": raw_days}
+    if hourly_days is not None:
+        settings["hourly_days"] = hourly_days
+    elif raw_days > RetentionPolicy().hourly_days:
+        settings["hourly_days"] = raw_days
+    try:
+        return RetentionPolicy.from_config(settings)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
 @click.group()
 def cli():
@@ -179,21 +297,79 @@ def cli():
 @cli.command()
 @click.argument('directories', nargs=-1, type=click.Path(exists=True))
 @click.option('--idle-timeout', default=300, help='Seconds of inactivity before ending a session')
-def watch(directories, idle_timeout):
+@click.option('--config', type=click.Path(exists=True), help='JSON config with extra "languages"')
+@click.option('--queue-size', default=10000, help='Maximum number of file events waiting to be processed')
+@click.option('--overflow', type=click.Choice(OVERFLOW_POLICIES), default='coalesce',
+              help='What to do with new events when the queue is full')
+@click.option('--profile', is_flag=True, help='Toggle a sampling profiler with SIGUSR1')
+@click.option('--measure-edits', is_flag=True, help='Weigh activity by the lines changed in each save')
+@click.option('--upload-to', metavar='URL', help='Upload ended sessions to a team collector at this URL')
+@click.option('--upload-token', envvar='CODECHRONO_COLLECTOR_TOKEN', help='Bearer token of the collector')
+@click.option('--raw-days', type=float, help='Downsample sessions older than this many days in the background')
+@click.option('--hourly-days', type=float, help='Merge hourly totals older than this many days into days (default 365)')
+def watch(directories, idle_timeout, config, queue_size, overflow, profile, measure_edits, upload_to, upload_token,
+          raw_days, hourly_days):
     """Start watching directories for coding activity."""
+    languages = None
+    if config:
+        with open(config) as f:
+            languages = LanguageRegistry.from_config(json.load(f))
+
     if not directories:
         directories = [os.getcwd()]
+    policy = retention_policy(raw_days, hourly_days) if raw_days is not None else None
 
     console.print(f"[green]Watching directories:[/green]")
     for directory in directories:
         console.print(f"- {directory}")
 
-    tracker = CodingTimeTracker(directories, idle_timeout)
+    tracker = CodingTimeTracker(directories, idle_timeout, languages, queue_size, overflow,
+                                measure_edits=measure_edits)
     tracker.observer.start()
+    report = tracker.planner.report()
+    budget = f" ({report['budget_used']:.1%} of the watch budget)" if report['budget_used'] is not None else ""
+    console.print(f"[dim]{report['watched_directories']} directories under "
+                  f"{report['native_watches']} watches{budget}[/dim]")
+    if report['polled_subtrees']:
+        console.print(f"[yellow]Watch budget exhausted: polling {report['polled_subtrees']} subtrees[/yellow]")
+    metrics_writer = SnapshotWriter(REGISTRY, metrics_file("watch")).start()
+    if profile:
+        from codechrono.core.profiling import install_profile_toggle
+        if install_profile_toggle():
+            console.print(f"[dim]Send SIGUSR1 to {os.getpid()} to start and stop profiling[/dim]")
+
+    control = ControlServer(SOCKET_FILE, {
+        "status": tracker.live_status,
+        "stats": tracker.live_stats,
+        "flush": tracker.flush,
+    })
+    try:
+        control.start()
+    except (RuntimeError, OSError) as e:
+        console.print(f"[yellow]Control socket disabled: {e}[/yellow]")
+
+    uploader = None
+    if upload_to:
+        from codechrono.core.uploader import Uploader, session_batches
+        uploader = Uploader(upload_to, "sessions", session_batches(tracker.repository), token=upload_token).start()
+        console.print(f"[dim]Uploading sessions to {uploader.url} as {uploader.host}[/dim]")
+
+    retention = None
+    if policy is not None:
+        retention = RetentionWorker({
+            "sessions": lambda: tracker.repository.apply_retention(*policy.horizons(), policy.batch_size),
+        }, policy.interval).start()
 
     def handle_shutdown(signum, frame):
         console.print("\n[yellow]Shutting down...[/yellow]")
+        control.stop()
+        if retention is not None:
+            retention.stop()
+        if uploader is not None:
+            # Sessions still open are uploaded by the next run
+            uploader.stop()
         tracker.stop()
+        metrics_writer.stop()
         exit(0)
 
     signal.signal(signal.SIGINT, handle_shutdown)
@@ -203,87 +379,119 @@ def watch(directories, idle_timeout):
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        control.stop()
+        if retention is not None:
+            retention.stop()
+        if uploader is not None:
+            uploader.stop()
         tracker.stop()
+        metrics_writer.stop()
 
 @cli.command()
-def status():
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON')
+def status(as_json):
     """Show current tracking status."""
-    data = CodingTimeTracker([]).data
-    active_sessions = [s for s in data.get("sessions", []) if "end_time" not in s]
-    
-    if not active_sessions:
-        console.print("[yellow]No active coding sessions[/yellow]")
-        return
-
-    table = Table(title="Active Sessions")
-    table.add_column("Language")
-    table.add_column("Duration")
-    table.add_column("Last Activity")
-
-    for session in active_sessions:
-        start_time = datetime.fromisoformat(session["start_time"])
-        duration = datetime.now() - start_time
-        table.add_row(
-            session["language"],
-            str(duration).split('.')[0],
-            start_time.strftime("%H:%M:%S")
-        )
-
-    console.print(table)
+    sys.exit(query.show('status', DATA_FILE, JOURNAL_FILE, DB_FILE, as_json=as_json, socket_path=SOCKET_FILE))
 
 @cli.command()
 @click.option('--days', default=7, help='Number of days to show statistics for')
-def stats(days):
+@click.option('--project', 'by_project', is_flag=True, help='Group statistics by project and language')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON')
+def stats(days, by_project, as_json):
     """Show coding statistics."""
-    data = CodingTimeTracker([]).data
-    
-    if not data["languages"]:
-        console.print("[yellow]No coding sessions recorded yet[/yellow]")
-        return
-    
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    # Filter recent sessions
-    recent_sessions = [
-        s for s in data["sessions"]
-        if datetime.fromisoformat(s["start_time"]) > cutoff_date
+    sys.exit(query.show('stats', DATA_FILE, JOURNAL_FILE, DB_FILE, days=days, by_project=by_project,
+                        as_json=as_json, socket_path=SOCKET_FILE))
+
+@cli.command()
+def flush():
+    """Make a running watch move its journaled sessions into the database now."""
+    try:
+        result = call('flush', SOCKET_FILE)
+    except ControlError as e:
+        raise click.ClickException(f"Tracker error: {e}")
+    except OSError:
+        raise click.ClickException("No watch is running")
+    console.print(f"[green]Compacted {result['compacted']} sessions[/green]")
+
+@cli.command('rebuild-rollups')
+def rebuild_rollups():
+    """Recompute totals and daily/weekly rollups from the session history."""
+    repository = SessionRepository(DATA_FILE, JOURNAL_FILE, DB_FILE)
+    count = repository.rebuild_aggregates()
+    repository.close()
+    console.print(f"[green]Rebuilt rollups from {count} sessions[/green]")
+
+@cli.command()
+@click.option('--raw-days', default=90.0, help='Downsample sessions older than this many days')
+@click.option('--hourly-days', type=float, help='Merge hourly totals older than this many days into days (default 365)')
+@click.option('--vacuum', is_flag=True, help='Also shrink the database file')
+def prune(raw_days, hourly_days, vacuum):
+    """Downsample old sessions into hourly and daily totals."""
+    policy = retention_policy(raw_days, hourly_days)
+    repository = SessionRepository(DATA_FILE, JOURNAL_FILE, DB_FILE)
+    report = repository.apply_retention(*policy.horizons(), policy.batch_size)
+    console.print(f"[green]Downsampled {report['sessions']} sessions and merged {report['hourly_buckets']} "
+                  f"hourly totals into days; reclaimed {report['bytes_reclaimed'] / 1024:.0f} KiB[/green]")
+    if vacuum:
+        shrunk = repository.store.vacuum()
+        console.print(f"[green]Vacuumed {DB_FILE}: {shrunk / 1024:.0f} KiB smaller[/green]")
+    repository.close()
+
+@cli.command()
+@click.argument('directories', nargs=-1, type=click.Path(exists=True))
+@click.option('--days', default=30, help='How many days back to reconstruct activity')
+@click.option('--idle-timeout', default=300, help='Seconds of inactivity that end a session')
+@click.option('--source', type=click.Choice(['all', 'git', 'mtime']), default='all',
+              help='Reconstruct from commits, file modification times or both')
+@click.option('--author', help="git --author pattern to count commits of (default: each repository's user.email)")
+@click.option('--workers', type=int, help='Worker processes scanning projects (default: CPU count)')
+@click.option('--config', type=click.Path(exists=True), help='JSON config with extra "languages"')
+@click.option('--dry-run', is_flag=True, help='Report reconstructed sessions without recording them')
+def backfill(directories, days, idle_timeout, source, author, workers, config, dry_run):
+    """Reconstruct sessions from git history and file modification times."""
+    from codechrono.core.backfill import BackfillJob, run_backfill
+
+    languages = None
+    if config:
+        with open(config) as f:
+            languages = json.load(f)
+
+    if not directories:
+        directories = [os.getcwd()]
+
+    # Every watched directory and repository below them is scanned separately,
+    # each skipping the projects nested inside it
+    projects = ProjectResolver(PROJECTS_FILE)
+    projects.add_watch_roots(directories)
+    roots = projects.roots()
+    since = (datetime.now() - timedelta(days=days)).timestamp()
+    jobs = [
+        BackfillJob(
+            root, name, since, idle_timeout, tuple(IGNORE_PATTERNS),
+            tuple(other for other in roots if other.startswith(os.path.join(root, ""))),
+            languages, author, source != 'mtime', source != 'git',
+        )
+        for root, name in roots.items()
     ]
-    
-    # Calculate recent statistics
-    recent_stats = {}
-    for session in recent_sessions:
-        language = session["language"]
-        if language not in recent_stats:
-            recent_stats[language] = {"total_hours": 0, "sessions": 0}
-        
-        recent_stats[language]["total_hours"] += session["duration"]
-        recent_stats[language]["sessions"] += 1
-    
-    # Create statistics table
-    table = Table(title=f"Coding Statistics (Last {days} days)")
-    table.add_column("Language", style="cyan")
-    table.add_column("Total Hours", justify="right")
+
+    repository = None if dry_run else SessionRepository(DATA_FILE, JOURNAL_FILE, DB_FILE)
+    table = Table(title=f"Backfill (Last {days} days)")
+    table.add_column("Project", style="cyan")
     table.add_column("Sessions", justify="right")
-    table.add_column("Avg Hours/Session", justify="right")
-    
-    for lang, stats in sorted(recent_stats.items(), key=lambda x: x[1]["total_hours"], reverse=True):
-        avg_hours = stats["total_hours"] / stats["sessions"]
-        table.add_row(
-            lang.capitalize(),
-            f"{stats['total_hours']:.2f}",
-            str(stats["sessions"]),
-            f"{avg_hours:.2f}"
-        )
-    
+    table.add_column("Hours", justify="right")
+    table.add_column("Recorded", justify="right")
+    with console.status(f"Scanning {len(jobs)} projects..."):
+        for job, sessions in run_backfill(jobs, workers):
+            recorded = repository.merge_sessions(sessions) if repository else 0
+            table.add_row(
+                job.project or NO_PROJECT,
+                str(len(sessions)),
+                f"{sum(s['duration'] for s in sessions):.2f}",
+                str(recorded) if repository else "-",
+            )
+    if repository:
+        repository.close()
     console.print(table)
-    
-    # Show all-time totals
-    total_hours = sum(lang["total_hours"] for lang in data["languages"].values())
-    total_sessions = sum(lang["sessions"] for lang in data["languages"].values())
-    
-    console.print("\n[bold]All-time totals:[/bold]")
-    console.print(f"Total hours coded: [cyan]{total_hours:.2f}[/cyan]")
-    console.print(f"Total sessions: [cyan]{total_sessions}[/cyan]")
 
 if __name__ == '__main__':
     cli()
@@ -5,14 +5,25 @@ This module provides the CLI commands for interacting with CodeChrono.
 """
 
 import click
+import json
+import os
+import signal
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from rich.console import Console
 from rich.table import Table
 from datetime import datetime, timedelta
 
+from ..core.bus import EventBus
+from ..core.control import DEFAULT_CONTROL_SOCKET, ControlClient, ControlError, ControlServer, call
+from ..core.export import EXPORT_FORMATS
+from ..core.metrics import REGISTRY, SnapshotWriter, metrics_file, read_snapshot, snapshot_files
+from ..core.profiling import install_profile_toggle
+from ..core.retention import RetentionPolicy, RetentionWorker
 from ..core.tracker import ActivityTracker
+from ..core.uploader import Uploader, event_batches
 from ..core.watcher import FileWatcher
+from ..utils.daemon import DEFAULT_PIDFILE, daemonize, is_running, read_pid, wait_for_shutdown
 
 console = Console()
 
@@ -24,43 +35,195 @@ def cli() -> None:
 @cli.command()
 @click.option('--config', '-c', type=click.Path(), help='Path to config file')
 @click.option('--watch', '-w', multiple=True, type=click.Path(), help='Paths to watch')
-def start(config: Optional[str], watch: tuple) -> None:
+@click.option('--daemon', '-d', is_flag=True, help='Run in the background')
+@click.option('--pidfile', type=click.Path(), default=str(DEFAULT_PIDFILE), help='Pidfile used in daemon mode')
+@click.option('--log-file', type=click.Path(), help='Log file used in daemon mode')
+@click.option('--dashboard-port', type=int, help='Also serve the dashboard with live updates on this port')
+@click.option('--profile', is_flag=True, help='Toggle a sampling profiler with SIGUSR1')
+@click.option('--socket', 'socket_path', type=click.Path(), default=str(DEFAULT_CONTROL_SOCKET),
+              help='Control socket answering status queries')
+def start(config: Optional[str], watch: tuple, daemon: bool, pidfile: str, log_file: Optional[str],
+          dashboard_port: Optional[int], profile: bool, socket_path: str) -> None:
     """
     Start tracking coding activity.
     
     Args:
         config: Path to configuration file
         watch: Paths to watch for changes
+        daemon: Detach from the terminal and write a pidfile
+        pidfile: Pidfile location for daemon mode
+        log_file: Where the daemon writes its output
+        dashboard_port: Port of the in-process dashboard, None to disable it
+        profile: Install the SIGUSR1 profiling toggle
+        socket_path: Unix socket serving live status, summaries and flushes
     """
+    if daemon:
+        console.print(f"[bold green]CodeChrono starting in the background (pidfile: {pidfile})[/bold green]")
+        try:
+            daemonize(Path(pidfile), Path(log_file) if log_file else None)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+    
     config_path = Path(config) if config else None
-    tracker = ActivityTracker(config_path)
+    bus = EventBus() if dashboard_port is not None else None
+    tracker = ActivityTracker(config_path, bus=bus)
     
     watch_paths = [Path(p) for p in watch] if watch else [Path.cwd()]
     
     def on_change(file_path: Path, event_type: str) -> None:
         tracker.track_file_change(file_path, event_type)
         
-    watcher = FileWatcher(on_change)
+    watcher = FileWatcher(
+        on_change,
+        set(tracker.config.get("exclude_patterns", [])),
+        coalesce_window=tracker.config.get("coalesce_window", 0.5),
+        batch_callback=tracker.track_file_changes,
+        queue_size=tracker.config.get("queue_size", 10000),
+        overflow=tracker.config.get("overflow_policy", "coalesce"),
+        directory_callback=tracker.directory_created,
+        watch_budget=tracker.config.get("watch_budget"),
+    )
+    tracker.add_watch_roots(watch_paths)
     watcher.start_watching(watch_paths)
+    watches = watcher.planner.report()
+    console.print(
+        f"Watching {watches['watched_directories']} directories with {watches['native_watches']} watches"
+        + (f" ({watches['budget_used']:.1%} of budget)" if watches['budget_used'] is not None else "")
+    )
+    if watches['polled_subtrees']:
+        console.print(f"[yellow]Watch budget exhausted: polling {watches['polled_subtrees']} subtrees[/yellow]")
+    
+    server = None
+    if dashboard_port is not None:
+        from ..web.app import create_app, serve_in_background
+        server = serve_in_background(create_app(tracker, bus=bus), port=dashboard_port)
+        console.print(f"Dashboard: http://127.0.0.1:{server.server_port}")
+    
+    metrics_writer = SnapshotWriter(REGISTRY, metrics_file("start")).start()
+    if profile and install_profile_toggle():
+        console.print(f"Send SIGUSR1 to {os.getpid()} to start and stop profiling")
+    
+    control = ControlServer(Path(socket_path), {
+        "status": lambda: dict(tracker.live_status(), watch=watcher.stats()),
+        "summary": lambda days=None: tracker.live_summary(
+            datetime.now() - timedelta(days=days) if days is not None else None
+        ),
+        "flush": tracker.flush,
+    })
+    try:
+        control.start()
+    except (RuntimeError, OSError) as e:
+        console.print(f"[yellow]Control socket disabled: {e}[/yellow]")
+    
+    uploader = None
+    if tracker.config.get("collector_url") and tracker.event_log is not None:
+        uploader = Uploader(
+            tracker.config["collector_url"],
+            "events",
+            event_batches(tracker.event_log, tracker.projects.resolve),
+            host=tracker.config.get("collector_host"),
+            token=tracker.config.get("collector_token"),
+            interval=tracker.config.get("upload_interval", 30.0),
+        ).start()
+        console.print(f"Uploading events to {uploader.url} as {uploader.host}")
+    
+    retention = None
+    if tracker.retention is not None and tracker.event_log is not None:
+        retention = RetentionWorker({"events": tracker.apply_retention}, tracker.retention.interval).start()
+        console.print(f"Keeping raw events for {tracker.retention.raw_days:g} days, "
+                      f"hourly counts for {tracker.retention.hourly_days:g} days")
     
     console.print("[bold green]CodeChrono started![/bold green]")
     console.print("Press Ctrl+C to stop tracking...")
     
+    wait_for_shutdown()
+    control.stop()
+    if server is not None:
+        server.shutdown()
+    watcher.stop_watching()
+    if uploader is not None:
+        tracker.flush()
+        uploader.stop()
+    if retention is not None:
+        retention.stop()
+    tracker.close()
+    metrics_writer.stop()
+    console.print("\n[bold yellow]Tracking stopped.[/bold yellow]")
+
+@cli.command()
+@click.option('--pidfile', type=click.Path(), default=str(DEFAULT_PIDFILE), help='Pidfile of the daemon')
+def stop(pidfile: str) -> None:
+    """
+    Stop a tracker started with --daemon.
+    
+    Args:
+        pidfile: Pidfile of the running daemon
+    """
+    pid = read_pid(Path(pidfile))
+    if pid is None or not is_running(pid):
+        console.print("[yellow]CodeChrono is not running[/yellow]")
+        return
+    os.kill(pid, signal.SIGTERM)
+    console.print(f"[bold green]Sent stop signal to CodeChrono (pid {pid})[/bold green]")
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(), default=str(DEFAULT_CONTROL_SOCKET),
+              help='Control socket of the tracker')
+@click.option('--days', '-d', type=float, help='Also summarize the last N days of activity held in memory')
+@click.option('--json', 'as_json', is_flag=True, help='Print the live state as JSON')
+def status(socket_path: str, days: Optional[float], as_json: bool) -> None:
+    """
+    Show the live state of the running tracker.
+    
+    Args:
+        socket_path: Control socket of the tracker
+        days: Include a summary of this many recent days from the tracker's memory
+        as_json: Print the state as JSON instead of tables
+    """
     try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        watcher.stop_watching()
-        console.print("\n[bold yellow]Tracking stopped.[/bold yellow]")
+        with ControlClient(Path(socket_path)) as client:
+            state = client.call("status")
+            if days is not None:
+                state["summary"] = client.call("summary", days=days)
+    except ControlError as e:
+        raise click.ClickException(f"Tracker error: {e}")
+    except OSError:
+        raise click.ClickException(f"No tracker is serving {socket_path}; is it running?")
+    if as_json:
+        click.echo(json.dumps(state, indent=2))
+        return
+    
+    table = Table(title="Tracker Status")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green")
+    latest = state["latest_event"]
+    table.add_row("Started", state["started"])
+    table.add_row("Events in memory", str(state["events_in_memory"]))
+    table.add_row("Latest event", f"{latest['timestamp']} {latest['file_path']}" if latest else "-")
+    table.add_row("Watched directories", str(state["watch"]["watches"]["watched_directories"]))
+    table.add_row("Queued events", str(state["watch"]["queue"]["depth"]))
+    if "edited_lines" in state:
+        table.add_row("Lines edited", str(sum(state["edited_lines"].values())))
+    console.print(table)
+    
+    if state.get("summary", {}).get("language_activity"):
+        language_table = Table(title=f"Language Activity (Last {days:g} days, this process)")
+        language_table.add_column("Language", style="cyan")
+        language_table.add_column("Changes", style="green")
+        for language, changes in sorted(state["summary"]["language_activity"].items(), key=lambda x: x[1], reverse=True):
+            language_table.add_row(language, str(changes))
+        console.print(language_table)
 
 @cli.command()
 @click.option('--days', '-d', type=int, default=7, help='Number of days to show')
-def summary(days: int) -> None:
+@click.option('--project', '-p', 'by_project', is_flag=True, help='Group activity by project')
+def summary(days: int, by_project: bool) -> None:
     """
     Show summary of coding activity.
     
     Args:
         days: Number of days to include in summary
+        by_project: Add a per-project breakdown
     """
     tracker = ActivityTracker()
     start_time = datetime.now() - timedelta(days=days)
@@ -85,21 +248,182 @@ def summary(days: int) -> None:
             
         console.print(file_table)
 
+    if summary["language_activity"]:
+        language_table = Table(title="Language Activity")
+        language_table.add_column("Language", style="cyan")
+        language_table.add_column("Changes", style="green")
+        
+        for language, changes in sorted(summary["language_activity"].items(), key=lambda x: x[1], reverse=True):
+            language_table.add_row(language, str(changes))
+            
+        console.print(language_table)
+
+    if by_project:
+        projects = tracker.get_project_activity(start_time)
+        project_table = Table(title="Project Activity")
+        project_table.add_column("Project", style="cyan")
+        project_table.add_column("Files", justify="right")
+        project_table.add_column("Changes", style="green", justify="right")
+        project_table.add_column("Languages")
+        
+        for project, activity in sorted(projects.items(), key=lambda x: x[1]["events"], reverse=True):
+            languages = sorted(activity["languages"].items(), key=lambda x: x[1], reverse=True)
+            project_table.add_row(
+                project,
+                str(activity["files"]),
+                str(activity["events"]),
+                ", ".join(f"{language} ({changes})" for language, changes in languages)
+            )
+            
+        console.print(project_table)
+
 @cli.command()
-@click.option('--format', '-f', type=click.Choice(['json', 'csv']), default='json', help='Export format')
+@click.option('--format', '-f', type=click.Choice(list(EXPORT_FORMATS)), default='json', help='Export format')
 @click.option('--output', '-o', type=click.Path(), help='Output file path')
-def export(format: str, output: Optional[str]) -> None:
+@click.option('--since', type=click.DateTime(), help='Only export events at or after this time')
+@click.option('--until', type=click.DateTime(), help='Only export events before this time')
+def export(format: str, output: Optional[str], since: Optional[datetime], until: Optional[datetime]) -> None:
     """
     Export coding activity data.
     
     Args:
-        format: Export format (json or csv)
+        format: Export format
         output: Output file path
+        since: Inclusive start of the exported range
+        until: Exclusive end of the exported range
     """
     tracker = ActivityTracker()
     output_path = Path(output) if output else None
-    tracker.export_data(format, output_path)
-    console.print(f"[bold green]Data exported successfully![/bold green]")
+    try:
+        count = tracker.export_data(format, output_path, since, until)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    console.print(f"[bold green]Data exported successfully![/bold green] ({count} events)")
+
+@cli.command()
+@click.option('--socket', 'socket_path', type=click.Path(), default=str(DEFAULT_CONTROL_SOCKET),
+              help='Control socket of the tracker')
+def flush(socket_path: str) -> None:
+    """
+    Make the running tracker write buffered events to disk now.
+    
+    Args:
+        socket_path: Control socket of the tracker
+    """
+    try:
+        call("flush", Path(socket_path))
+    except ControlError as e:
+        raise click.ClickException(f"Tracker error: {e}")
+    except OSError:
+        raise click.ClickException(f"No tracker is serving {socket_path}; is it running?")
+    console.print("[green]Flushed[/green]")
+
+@cli.command()
+@click.option('--config', '-c', type=click.Path(), help='Path to config file')
+@click.option('--raw-days', type=float, help='Keep raw events for this many days (default: config or 90)')
+@click.option('--hourly-days', type=float, help='Keep hourly counts for this many days (default: config or 365)')
+@click.option('--vacuum', is_flag=True, help='Also shrink the tiers database file')
+def prune(config: Optional[str], raw_days: Optional[float], hourly_days: Optional[float], vacuum: bool) -> None:
+    """
+    Downsample old events now, as a running tracker's retention policy would.
+    
+    Args:
+        config: Path to configuration file
+        raw_days: Override of the configured raw event retention
+        hourly_days: Override of the configured hourly count retention
+        vacuum: Rewrite the tiers database afterwards to return free space
+    """
+    tracker = ActivityTracker(Path(config) if config else None)
+    settings = dict(tracker.config.get("retention") or {})
+    settings.update({key: value for key, value in (("raw_days", raw_days), ("hourly_days", hourly_days))
+                     if value is not None})
+    try:
+        policy = RetentionPolicy.from_config(settings) or RetentionPolicy()
+        totals = {"segments": 0, "events": 0, "hourly_buckets": 0, "bytes_reclaimed": 0}
+        while True:
+            report = tracker.apply_retention(policy)
+            for key in totals:
+                totals[key] += report[key]
+            if not report["pending"]:
+                break
+    except (RuntimeError, ValueError) as e:
+        tracker.close()
+        raise click.ClickException(str(e))
+    console.print(
+        f"[green]Folded {totals['events']} events from {totals['segments']} segments "
+        f"and merged {totals['hourly_buckets']} hourly counts into days; "
+        f"reclaimed {totals['bytes_reclaimed'] / 1024:.0f} KiB[/green]"
+    )
+    if vacuum:
+        shrunk = tracker.event_tiers.vacuum()
+        console.print(f"[green]Vacuumed {tracker.event_tiers.db_path}: {shrunk / 1024:.0f} KiB smaller[/green]")
+    tracker.close()
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', type=int, default=5050, help='Port to listen on')
+@click.option('--db', type=click.Path(), help='Collector database (default ~/.codechrono/collector.db)')
+@click.option('--token', envvar='CODECHRONO_COLLECTOR_TOKEN', help='Bearer token uploaders must send')
+def collect(host: str, port: int, db: Optional[str], token: Optional[str]) -> None:
+    """
+    Run a team collector receiving uploads from other trackers.
+    
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        db: Path of the collector database
+        token: Bearer token required from uploaders, None to accept all
+    """
+    from ..core.collector import CollectorStore
+    from ..web.collector import DEFAULT_COLLECTOR_DB, create_collector_app
+    
+    db_path = Path(db) if db else DEFAULT_COLLECTOR_DB
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    console.print(f"Collecting into {db_path} on http://{host}:{port}")
+    create_collector_app(CollectorStore(db_path), token).run(host=host, port=port, threaded=True)
+
+def _print_snapshot(path: Path, snapshot: Dict) -> None:
+    """Print a metrics snapshot as a table titled with its file."""
+    age = datetime.now() - datetime.fromtimestamp(snapshot["written_at"])
+    state = "running" if is_running(snapshot["pid"]) else "[yellow]not running[/yellow]"
+    table = Table(title=f"Tracker metrics ({path.name}, pid {snapshot['pid']}, {state}, {int(age.total_seconds())}s old)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    for name, value in sorted(snapshot["metrics"].items()):
+        if isinstance(value, dict):
+            p50 = f"{value['p50'] * 1e6:.0f}µs" if value["p50"] is not None else "-"
+            p99 = f"{value['p99'] * 1e6:.0f}µs" if value["p99"] is not None else "-"
+            value = f"{value['count']} obs, p50 ≤ {p50}, p99 ≤ {p99}"
+        table.add_row(name, str(value))
+    console.print(table)
+
+@cli.command()
+@click.option('--file', 'metrics_path', type=click.Path(),
+              help='Metrics snapshot to show (default: those of every tracker)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the raw snapshots')
+def metrics(metrics_path: Optional[str], as_json: bool) -> None:
+    """
+    Show the internal metrics of the running trackers.
+    
+    Each tracker (``start`` and the legacy ``codechrono.py watch``) writes
+    its own snapshot file.
+    
+    Args:
+        metrics_path: Snapshot file to show instead of every tracker's
+        as_json: Print the snapshots as JSON instead of tables
+    """
+    paths = [Path(metrics_path)] if metrics_path else snapshot_files()
+    snapshots = {path: snapshot for path, snapshot in zip(paths, map(read_snapshot, paths)) if snapshot is not None}
+    if not snapshots:
+        where = metrics_path or "~/.codechrono/metrics-*.json"
+        raise click.ClickException(f"No metrics at {where}; is the tracker running?")
+    if as_json:
+        documents = list(snapshots.values())
+        click.echo(json.dumps(documents[0] if metrics_path else documents, indent=2))
+        return
+    
+    for path, snapshot in snapshots.items():
+        _print_snapshot(path, snapshot)
 
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
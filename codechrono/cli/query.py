@@ -0,0 +1,393 @@
+"""
+Fast read-only path for the ``status`` and ``stats`` commands.
+
+Shell prompts and editor status bars run these commands many times a
+minute, so they are answered here without click, watchdog or NumPy. A
+running tracker is asked over its control socket, which also knows the
+sessions still open; otherwise the session history is read through a
+SessionReader, which writes nothing and starts no threads. Rich is only
+imported to draw tables on a terminal; piped output is plain text, and
+``--json`` prints the report for scripts.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, TextIO
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+
+from ..core.control import ControlError, call
+from ..core.storage import SessionQueries, SessionReader
+from ..utils.projects import NO_PROJECT
+
+logger = logging.getLogger(__name__)
+
+# A tracker slower than this to answer is skipped in favour of the files
+CONTROL_TIMEOUT = 0.5
+
+
+def status_report(reader: SessionQueries) -> Dict:
+    """
+    Collect the sessions of today that have not ended.
+
+    Args:
+        reader: Session history to query
+
+    Returns:
+        Report with an "active_sessions" list of language/start_time records
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    active = [s for s in reader.sessions_between(today) if "end_time" not in s]
+    return {
+        "active_sessions": [
+            {"language": s["language"], "project": s.get("project"), "start_time": s["start_time"]}
+            for s in active
+        ],
+    }
+
+
+def stats_report(reader: SessionQueries, days: int, by_project: bool = False) -> Dict:
+    """
+    Collect per-language (and optionally per-project) totals for recent days.
+
+    Args:
+        reader: Session history to query
+        days: Length of the window ending now
+        by_project: Also break the window down by project and language
+
+    Returns:
+        Report with "days", "languages", "projects" (None unless requested)
+        and "all_time" totals; rows are sorted by hours, largest first.
+        Rows and totals covering sessions with measured edits also carry
+        "edited_lines".
+    """
+    cutoff = datetime.now() - timedelta(days=days)
+    all_time = reader.data["languages"]
+    report = {
+        "days": days,
+        "languages": [],
+        "projects": [] if by_project else None,
+        "all_time": {
+            "total_hours": sum(entry["total_hours"] for entry in all_time.values()),
+            "sessions": sum(entry["sessions"] for entry in all_time.values()),
+        },
+    }
+    if any("edited_lines" in entry for entry in all_time.values()):
+        report["all_time"]["edited_lines"] = sum(entry.get("edited_lines", 0) for entry in all_time.values())
+    if not all_time:
+        return report
+
+    # Sum pre-aggregated day/week rollups for the window
+    recent = reader.window_totals(cutoff)["languages"]
+    for language, entry in sorted(recent.items(), key=lambda x: x[1]["total_hours"], reverse=True):
+        row = {
+            "language": language,
+            "total_hours": entry["total_hours"],
+            "sessions": entry["sessions"],
+            "avg_hours": entry["total_hours"] / entry["sessions"],
+        }
+        if "edited_lines" in entry:
+            row["edited_lines"] = entry["edited_lines"]
+        report["languages"].append(row)
+
+    if by_project:
+        totals = reader.project_language_totals(cutoff)
+        project_hours: Dict[Optional[str], float] = {}
+        for (project, _), entry in totals.items():
+            project_hours[project] = project_hours.get(project, 0) + entry["total_hours"]
+        for (project, language), entry in sorted(
+            totals.items(), key=lambda x: (-project_hours[x[0][0]], -x[1]["total_hours"])
+        ):
+            row = {"project": project, "language": language,
+                   "total_hours": entry["total_hours"], "sessions": entry["sessions"]}
+            if "edited_lines" in entry:
+                row["edited_lines"] = entry["edited_lines"]
+            report["projects"].append(row)
+    return report
+
+
+def add_open_sessions(report: Dict, sessions: List[Dict]) -> Dict:
+    """
+    Count sessions that are still open into a stats report.
+
+    Args:
+        report: Report from stats_report
+        sessions: Open sessions with language, project, start_time and
+            hours so far, as a tracker's status reports them
+
+    Returns:
+        The report, with an "open_sessions" count added
+    """
+    cutoff = (datetime.now() - timedelta(days=report["days"])).isoformat()
+    languages = {row["language"]: row for row in report["languages"]}
+    projects = None
+    if report["projects"] is not None:
+        projects = {(row["project"], row["language"]): row for row in report["projects"]}
+    for session in sessions:
+        report["all_time"]["total_hours"] += session["hours"]
+        report["all_time"]["sessions"] += 1
+        if session.get("edited_lines") is not None:
+            report["all_time"]["edited_lines"] = report["all_time"].get("edited_lines", 0) + session["edited_lines"]
+        if session["start_time"] < cutoff:
+            continue
+        rows = [(languages, session["language"], {"language": session["language"]})]
+        if projects is not None:
+            key = (session.get("project"), session["language"])
+            rows.append((projects, key, {"project": key[0], "language": key[1]}))
+        for table, key, fields in rows:
+            row = table.setdefault(key, dict(fields, total_hours=0.0, sessions=0))
+            row["total_hours"] += session["hours"]
+            row["sessions"] += 1
+            if session.get("edited_lines") is not None:
+                row["edited_lines"] = row.get("edited_lines", 0) + session["edited_lines"]
+    for row in languages.values():
+        row["avg_hours"] = row["total_hours"] / row["sessions"]
+    report["languages"] = sorted(languages.values(), key=lambda row: row["total_hours"], reverse=True)
+    if projects is not None:
+        project_hours: Dict[Optional[str], float] = {}
+        for row in projects.values():
+            project_hours[row["project"]] = project_hours.get(row["project"], 0) + row["total_hours"]
+        report["projects"] = sorted(
+            projects.values(), key=lambda row: (-project_hours[row["project"]], -row["total_hours"])
+        )
+    report["open_sessions"] = len(sessions)
+    return report
+
+
+def _plain_table(
+    out: TextIO, title: str, header: Sequence[str], rows: List[Sequence[str]], numeric_from: int
+) -> None:
+    """Write a title and space-aligned columns, right-aligning those from ``numeric_from`` on."""
+    widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+    out.write(f"{title}\n")
+    for row in [header, *rows]:
+        cells = [
+            cell.rjust(width) if index >= numeric_from else cell.ljust(width)
+            for index, (cell, width) in enumerate(zip(row, widths))
+        ]
+        out.write("  ".join(cells).rstrip() + "\n")
+
+
+def _edited(row: Dict) -> str:
+    """Format the edited lines of a report row, "-" if not measured."""
+    return str(row["edited_lines"]) if "edited_lines" in row else "-"
+
+
+def render_status(report: Dict, out: TextIO, rich: bool) -> None:
+    """
+    Print a status report.
+
+    Args:
+        report: Report from status_report
+        out: Stream to write to
+        rich: Draw rich tables instead of plain text
+    """
+    sessions = report["active_sessions"]
+    if rich:
+        from rich.console import Console
+        console = Console(file=out)
+        if not sessions:
+            console.print("[yellow]No active coding sessions[/yellow]")
+            return
+        from rich.table import Table
+        table = Table(title="Active Sessions")
+        table.add_column("Language")
+        table.add_column("Duration")
+        table.add_column("Last Activity")
+    elif not sessions:
+        out.write("No active coding sessions\n")
+        return
+
+    rows = []
+    for session in sessions:
+        start_time = datetime.fromisoformat(session["start_time"])
+        last_activity = datetime.fromisoformat(session.get("last_activity", session["start_time"]))
+        duration = datetime.now() - start_time
+        rows.append((session["language"], str(duration).split('.')[0], last_activity.strftime("%H:%M:%S")))
+    if rich:
+        for row in rows:
+            table.add_row(*row)
+        console.print(table)
+    else:
+        _plain_table(out, "Active Sessions", ("Language", "Duration", "Last Activity"), rows, 3)
+
+
+def render_stats(report: Dict, out: TextIO, rich: bool) -> None:
+    """
+    Print a stats report.
+
+    Args:
+        report: Report from stats_report
+        out: Stream to write to
+        rich: Draw rich tables instead of plain text
+    """
+    days = report["days"]
+    # Lines edited are shown once any session in the report measured them
+    weighted = any("edited_lines" in row for row in report["languages"] + (report["projects"] or []))
+    if rich:
+        from rich.console import Console
+        from rich.table import Table
+        console = Console(file=out)
+        if not report["all_time"]["sessions"]:
+            console.print("[yellow]No coding sessions recorded yet[/yellow]")
+            return
+
+        table = Table(title=f"Coding Statistics (Last {days} days)")
+        table.add_column("Language", style="cyan")
+        table.add_column("Total Hours", justify="right")
+        table.add_column("Sessions", justify="right")
+        table.add_column("Avg Hours/Session", justify="right")
+        if weighted:
+            table.add_column("Lines Edited", justify="right")
+        for row in report["languages"]:
+            table.add_row(
+                row["language"].capitalize(),
+                f"{row['total_hours']:.2f}",
+                str(row["sessions"]),
+                f"{row['avg_hours']:.2f}",
+                *([_edited(row)] if weighted else [])
+            )
+        console.print(table)
+
+        if report["projects"] is not None:
+            project_table = Table(title=f"Coding Statistics by Project (Last {days} days)")
+            project_table.add_column("Project", style="cyan")
+            project_table.add_column("Language")
+            project_table.add_column("Total Hours", justify="right")
+            project_table.add_column("Sessions", justify="right")
+            if weighted:
+                project_table.add_column("Lines Edited", justify="right")
+            for row in report["projects"]:
+                project_table.add_row(
+                    row["project"] or NO_PROJECT,
+                    row["language"].capitalize(),
+                    f"{row['total_hours']:.2f}",
+                    str(row["sessions"]),
+                    *([_edited(row)] if weighted else [])
+                )
+            console.print(project_table)
+
+        console.print("\n[bold]All-time totals:[/bold]")
+        console.print(f"Total hours coded: [cyan]{report['all_time']['total_hours']:.2f}[/cyan]")
+        console.print(f"Total sessions: [cyan]{report['all_time']['sessions']}[/cyan]")
+        if "edited_lines" in report["all_time"]:
+            console.print(f"Total lines edited: [cyan]{report['all_time']['edited_lines']}[/cyan]")
+        if report.get("open_sessions"):
+            console.print(f"[dim]Including {report['open_sessions']} sessions still open[/dim]")
+        return
+
+    if not report["all_time"]["sessions"]:
+        out.write("No coding sessions recorded yet\n")
+        return
+    extra_header = ("Lines Edited",) if weighted else ()
+    _plain_table(
+        out, f"Coding Statistics (Last {days} days)",
+        ("Language", "Total Hours", "Sessions", "Avg Hours/Session") + extra_header,
+        [(row["language"].capitalize(), f"{row['total_hours']:.2f}", str(row["sessions"]), f"{row['avg_hours']:.2f}")
+         + ((_edited(row),) if weighted else ())
+         for row in report["languages"]],
+        1,
+    )
+    if report["projects"] is not None:
+        out.write("\n")
+        _plain_table(
+            out, f"Coding Statistics by Project (Last {days} days)",
+            ("Project", "Language", "Total Hours", "Sessions") + extra_header,
+            [(row["project"] or NO_PROJECT, row["language"].capitalize(),
+              f"{row['total_hours']:.2f}", str(row["sessions"]))
+             + ((_edited(row),) if weighted else ())
+             for row in report["projects"]],
+            2,
+        )
+    out.write("\nAll-time totals:\n")
+    out.write(f"Total hours coded: {report['all_time']['total_hours']:.2f}\n")
+    out.write(f"Total sessions: {report['all_time']['sessions']}\n")
+    if "edited_lines" in report["all_time"]:
+        out.write(f"Total lines edited: {report['all_time']['edited_lines']}\n")
+    if report.get("open_sessions"):
+        out.write(f"Including {report['open_sessions']} sessions still open\n")
+
+
+def show(
+    command: str, snapshot_path: Path, journal_path: Path, db_path: Path,
+    days: int = 7, by_project: bool = False, as_json: bool = False, out: Optional[TextIO] = None,
+    socket_path: Optional[Path] = None,
+) -> int:
+    """
+    Answer ``status`` or ``stats`` from a running tracker or the stored session history.
+
+    Args:
+        command: "status" or "stats"
+        snapshot_path: Path of the JSON snapshot
+        journal_path: Path of the session journal
+        db_path: Path of the SQLite session store
+        days: Window of ``stats``
+        by_project: Add the per-project breakdown to ``stats``
+        as_json: Print the report as JSON
+        out: Stream to write to, defaults to stdout
+        socket_path: Control socket of a running tracker to ask first
+
+    Returns:
+        Process exit status, 1 if the session database could not be read
+    """
+    out = out or sys.stdout
+    report = None
+    if socket_path is not None:
+        params = {"days": days, "by_project": by_project} if command == "stats" else {}
+        try:
+            report = call(command, socket_path, CONTROL_TIMEOUT, **params)
+        except (OSError, ControlError) as e:
+            logger.debug(f"No live answer from {socket_path}: {e}")
+    if report is None:
+        try:
+            reader = SessionReader(snapshot_path, journal_path, db_path)
+            try:
+                report = status_report(reader) if command == "status" else stats_report(reader, days, by_project)
+            finally:
+                reader.close()
+        except sqlite3.DatabaseError as e:
+            # Upgrading the database is left to commands that write
+            sys.stderr.write(f"Cannot read {db_path}: {e}\n"
+                             "Run `codechrono.py rebuild-rollups` or start tracking once to upgrade it.\n")
+            return 1
+    if as_json:
+        out.write(json.dumps(report, indent=2) + "\n")
+        return 0
+    render = render_status if command == "status" else render_stats
+    render(report, out, rich=out.isatty())
+    return 0
+
+
+def main(
+    argv: Sequence[str], snapshot_path: Path, journal_path: Path, db_path: Path, socket_path: Optional[Path] = None
+) -> int:
+    """
+    Parse a ``status`` or ``stats`` command line and answer it.
+
+    Accepts the same options as the click commands of the same name.
+
+    Args:
+        argv: Arguments after the program name, starting with the command
+        snapshot_path: Path of the JSON snapshot
+        journal_path: Path of the session journal
+        db_path: Path of the SQLite session store
+        socket_path: Control socket of a running tracker to ask first
+
+    Returns:
+        Process exit status
+    """
+    command, options = argv[0], argv[1:]
+    parser = argparse.ArgumentParser(prog=f"codechrono {command}")
+    if command == "stats":
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--project", dest="by_project", action="store_true")
+    parser.add_argument("--json", dest="as_json", action="store_true")
+    args = parser.parse_args(options)
+    return show(
+        command, snapshot_path, journal_path, db_path,
+        days=getattr(args, "days", 7), by_project=getattr(args, "by_project", False), as_json=args.as_json,
+        socket_path=socket_path,
+    )
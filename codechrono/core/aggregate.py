@@ -0,0 +1,173 @@
+"""
+Aggregation kernels for CodeChrono.
+
+This module computes counts, weighted sums and time-of-week heatmaps over the
+typed-array columns of an EventBuffer (or any ``array.array``). When NumPy is
+installed the columns are wrapped without copying and reduced with
+vectorized operations; otherwise the same results are computed in pure
+Python. NumPy is imported on first use rather than with this module, since
+it dominates the start-up time of short-lived commands that never need it.
+"""
+
+from array import array
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import time
+
+# Replaced by the numpy module, or None if it is missing, on first use
+_UNRESOLVED = object()
+np = _UNRESOLVED
+
+HEATMAP_DAYS = 7
+HEATMAP_HOURS = 24
+
+# Every UTC offset in use is a multiple of 15 minutes, so all timestamps in
+# one quarter hour share their local weekday and hour.
+_QUARTER = 900
+
+# Below this many entries group_totals is faster without NumPy, and stays
+# clear of the NumPy import altogether
+GROUP_NUMPY_MIN = 4096
+
+
+def _numpy():
+    """Return the numpy module, importing it on first use, or None if missing."""
+    global np
+    if np is _UNRESOLVED:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - depends on the environment
+            numpy = None
+        np = numpy
+    return np
+
+
+def have_numpy() -> bool:
+    """Return True if the vectorized implementation is available."""
+    return _numpy() is not None
+
+
+def _view(column: array, lo: int, hi: Optional[int]):
+    """Wrap a slice of an array.array as a NumPy array without copying."""
+    np = _numpy()
+    hi = len(column) if hi is None else hi
+    if hi <= lo:
+        return np.zeros(0, dtype=column.typecode)
+    return np.frombuffer(column, dtype=column.typecode)[lo:hi]
+
+
+def count_ids(ids: array, size: int, lo: int = 0, hi: Optional[int] = None) -> List[int]:
+    """
+    Count how often each id in ``range(size)`` occurs in a slice.
+
+    Args:
+        ids: Column of small non-negative integer ids
+        size: Number of distinct ids
+        lo: First index
+        hi: End index, defaults to the end
+
+    Returns:
+        List with the count of each id
+    """
+    np = _numpy()
+    if np is not None:
+        return np.bincount(_view(ids, lo, hi), minlength=size).tolist()
+    counts = [0] * size
+    for value_id, count in Counter(ids[lo:hi]).items():
+        counts[value_id] = count
+    return counts
+
+
+def count_pairs(
+    first: array, second: array, lo: int = 0, hi: Optional[int] = None
+) -> Dict[Tuple[int, int], int]:
+    """
+    Count the distinct (first, second) id pairs occurring in a slice.
+
+    Args:
+        first: Column of non-negative integer ids
+        second: Column of non-negative integer ids of the same length
+        lo: First index
+        hi: End index, defaults to the end
+
+    Returns:
+        Mapping of id pair to count
+    """
+    np = _numpy()
+    if np is not None:
+        a = _view(first, lo, hi).astype(np.int64)
+        b = _view(second, lo, hi).astype(np.int64)
+        width = int(b.max()) + 1 if len(b) else 1
+        keys, counts = np.unique(a * width + b, return_counts=True)
+        return {(int(k) // width, int(k) % width): int(c) for k, c in zip(keys, counts)}
+    return dict(Counter(zip(first[lo:hi], second[lo:hi])))
+
+
+def heatmap(timestamps: array, lo: int = 0, hi: Optional[int] = None) -> List[List[int]]:
+    """
+    Count events per local weekday and hour.
+
+    Local time is resolved once per distinct quarter hour rather than per
+    event, so daylight saving changes are honoured at little cost.
+
+    Args:
+        timestamps: Column of epoch seconds in non-decreasing order
+        lo: First index
+        hi: End index, defaults to the end
+
+    Returns:
+        7x24 nested list indexed by [weekday][hour], Monday first
+    """
+    cells = HEATMAP_DAYS * HEATMAP_HOURS
+    np = _numpy()
+    if np is not None:
+        quarters = (_view(timestamps, lo, hi) // _QUARTER).astype(np.int64)
+        # Sorted input: each distinct quarter hour is one run of equal values.
+        starts = np.flatnonzero(np.diff(quarters, prepend=-1))
+        runs = np.diff(starts, append=len(quarters))
+        cell_of = np.array([_local_cell(int(q) * _QUARTER) for q in quarters[starts]], dtype=np.int64)
+        counts = np.bincount(cell_of, weights=runs, minlength=cells).astype(np.int64).tolist()
+    else:
+        counts = [0] * cells
+        cache: Dict[int, int] = {}
+        for timestamp in timestamps[lo:hi]:
+            quarter = int(timestamp // _QUARTER)
+            cell = cache.get(quarter)
+            if cell is None:
+                cell = cache[quarter] = _local_cell(quarter * _QUARTER)
+            counts[cell] += 1
+    return [counts[day * HEATMAP_HOURS:(day + 1) * HEATMAP_HOURS] for day in range(HEATMAP_DAYS)]
+
+
+def _local_cell(timestamp: float) -> int:
+    """Return the heatmap cell (weekday * 24 + hour) of a timestamp."""
+    local = time.localtime(timestamp)
+    return local.tm_wday * HEATMAP_HOURS + local.tm_hour
+
+
+def group_totals(keys: Sequence[Hashable], durations: Sequence[float]) -> Dict[Hashable, Tuple[float, int]]:
+    """
+    Sum durations and count entries per key.
+
+    Args:
+        keys: Group key of each entry (e.g. a session's language)
+        durations: Value of each entry (e.g. a session's hours)
+
+    Returns:
+        Mapping of key to (duration total, entry count)
+    """
+    if not keys:
+        return {}
+    np = _numpy() if len(keys) >= GROUP_NUMPY_MIN else None
+    if np is not None:
+        uniques: Dict[Hashable, int] = {}
+        ids = np.fromiter((uniques.setdefault(key, len(uniques)) for key in keys), dtype=np.int64, count=len(keys))
+        sums = np.bincount(ids, weights=np.asarray(durations, dtype=np.float64), minlength=len(uniques))
+        counts = np.bincount(ids, minlength=len(uniques))
+        return {key: (float(sums[i]), int(counts[i])) for key, i in uniques.items()}
+    totals: Dict[Hashable, List] = {}
+    for key, duration in zip(keys, durations):
+        entry = totals.setdefault(key, [0.0, 0])
+        entry[0] += duration
+        entry[1] += 1
+    return {key: (hours, count) for key, (hours, count) in totals.items()}
@@ -0,0 +1,257 @@
+"""
+Offline backfill for CodeChrono.
+
+Activity that happened while the watcher was not running is reconstructed
+from two sources: the commit history of each project (read from a streaming
+``git log``) and the modification times of its files. Projects are scanned
+in parallel worker processes; each turns its activity into sessions with the
+same idle-timeout rule the live tracker applies, and only the (small) list
+of sessions travels back to the parent, which merges them into the store.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import os
+import subprocess
+
+from .journal import make_session
+from ..utils.ignore import IgnoreMatcher
+from ..utils.languages import UNKNOWN_LANGUAGE, LanguageRegistry
+
+logger = logging.getLogger(__name__)
+
+# Starts each commit's line in the git log output; never part of a path
+COMMIT_MARKER = "\x00"
+
+
+class BackfillJob(NamedTuple):
+    """
+    Everything a worker process needs to reconstruct one project's sessions.
+
+    Attributes:
+        root: Project directory
+        project: Project name recorded on the sessions
+        since: Ignore activity before this epoch time, None for all
+        idle_timeout: Seconds of inactivity that end a session
+        ignore_patterns: Glob patterns of ignored path components
+        nested_roots: Directories of other projects below ``root`` to skip
+        languages: Config with extra "languages", as for LanguageRegistry.from_config
+        author: Only count commits whose author matches, None for the repo's user.email
+        use_git: Read activity from the commit history
+        use_mtimes: Read activity from file modification times
+    """
+
+    root: str
+    project: Optional[str]
+    since: Optional[float] = None
+    idle_timeout: float = 300
+    ignore_patterns: Tuple[str, ...] = ()
+    nested_roots: Tuple[str, ...] = ()
+    languages: Optional[Dict] = None
+    author: Optional[str] = None
+    use_git: bool = True
+    use_mtimes: bool = True
+
+
+def git_author(root: str) -> Optional[str]:
+    """Return the user.email git uses in ``root``, or None."""
+    try:
+        result = subprocess.run(
+            ["git", f"--git-dir={os.path.join(root, '.git')}", "config", "user.email"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def iter_git_activity(
+    root: str, since: Optional[float] = None, author: Optional[str] = None
+) -> Iterator[Tuple[float, str]]:
+    """
+    Stream the files touched by each commit of a repository.
+
+    The output of ``git log`` is consumed line by line as git produces it,
+    so memory use does not grow with the length of the history.
+
+    Args:
+        root: Repository working tree
+        since: Only include commits at or after this epoch time
+        author: Only include commits by this author (a git --author pattern)
+
+    Yields:
+        (commit time, absolute file path) pairs, newest commit first
+    """
+    # An explicit --git-dir keeps git from falling back to an enclosing
+    # repository when root/.git is not a valid one
+    command = [
+        "git", f"--git-dir={os.path.join(root, '.git')}", "-c", "core.quotePath=false", "log",
+        "--no-merges", "--no-renames", "--name-only", "--format=%x00%ct",
+    ]
+    if since is not None:
+        command.append(f"--since=@{int(since)}")
+    if author:
+        command.append(f"--author={author}")
+    try:
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", errors="replace",
+        )
+    except OSError as e:
+        logger.warning(f"Cannot run git in {root}: {e}")
+        return
+    try:
+        commit_time = None
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            if line.startswith(COMMIT_MARKER):
+                commit_time = float(line[1:])
+            elif line and commit_time is not None:
+                yield commit_time, os.path.join(root, line)
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            logger.debug(f"git log exited with {process.returncode} in {root}")
+
+
+def iter_mtime_activity(
+    root: str, is_ignored_dir: Callable[[str], bool], since: Optional[float] = None, skip: Sequence[str] = ()
+) -> Iterator[Tuple[float, str]]:
+    """
+    Yield the modification time of every file below a directory.
+
+    Args:
+        root: Directory to scan
+        is_ignored_dir: Predicate pruning ignored directories
+        since: Skip files last modified before this epoch time
+        skip: Directories not to descend into
+
+    Yields:
+        (modification time, absolute file path) pairs
+    """
+    skipped = set(skip)
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in skipped and not is_ignored_dir(entry.path):
+                                pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            mtime = entry.stat(follow_symlinks=False).st_mtime
+                            if since is None or mtime >= since:
+                                yield mtime, entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def sessionize(
+    activity: Iterable[Tuple[float, str]], project: Optional[str], idle_timeout: float
+) -> List[Dict]:
+    """
+    Turn timestamped language activity into session records.
+
+    Mirrors the live tracker: activity of one language continues its session
+    until ``idle_timeout`` seconds pass without any, and sessions of a minute
+    or less are dropped.
+
+    Args:
+        activity: (epoch time, language) pairs in any order
+        project: Project name recorded on the sessions
+        idle_timeout: Seconds of inactivity that end a session
+
+    Returns:
+        Session records ordered by start time
+    """
+    by_language: Dict[str, List[float]] = {}
+    for timestamp, language in activity:
+        by_language.setdefault(language, []).append(timestamp)
+
+    sessions = []
+    for language, times in by_language.items():
+        times.sort()
+        start = last = times[0]
+        for timestamp in times[1:] + [float("inf")]:
+            if timestamp - last > idle_timeout:
+                session = make_session(
+                    language, project, datetime.fromtimestamp(start), datetime.fromtimestamp(last)
+                )
+                if session is not None:
+                    sessions.append(session)
+                start = timestamp
+            last = timestamp
+    sessions.sort(key=lambda s: s["start_time"])
+    return sessions
+
+
+def scan_project(job: BackfillJob) -> List[Dict]:
+    """
+    Reconstruct the sessions of one project (runs in a worker process).
+
+    Args:
+        job: What to scan and how
+
+    Returns:
+        Session records ordered by start time
+    """
+    matcher = IgnoreMatcher(job.ignore_patterns)
+    matcher.add_gitignore(Path(job.root))
+    languages = LanguageRegistry.from_config(job.languages)
+    nested = tuple(os.path.join(root, "") for root in job.nested_roots)
+
+    def attributed(activity: Iterable[Tuple[float, str]]) -> Iterator[Tuple[float, str]]:
+        """Map file activity to languages, dropping ignored and unknown files."""
+        for timestamp, path in activity:
+            if nested and path.startswith(nested):
+                continue
+            if matcher.is_ignored(path):
+                continue
+            language = languages.get_language(path)
+            if language != UNKNOWN_LANGUAGE:
+                yield timestamp, language
+
+    def activity() -> Iterator[Tuple[float, str]]:
+        """Chain the enabled activity sources."""
+        if job.use_git and os.path.exists(os.path.join(job.root, ".git")):
+            yield from iter_git_activity(job.root, job.since, job.author or git_author(job.root))
+        if job.use_mtimes:
+            yield from iter_mtime_activity(job.root, matcher.is_ignored_dir, job.since, job.nested_roots)
+
+    return sessionize(attributed(activity()), job.project, job.idle_timeout)
+
+
+def run_backfill(
+    jobs: Sequence[BackfillJob], workers: Optional[int] = None
+) -> Iterator[Tuple[BackfillJob, List[Dict]]]:
+    """
+    Scan projects, in parallel worker processes when there are several.
+
+    Args:
+        jobs: Projects to scan
+        workers: Number of worker processes, defaults to the CPU count;
+            1 scans in the calling process
+
+    Yields:
+        (job, sessions) as each project finishes
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield job, scan_project(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(scan_project, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield job, future.result()
+            except Exception as e:
+                logger.error(f"Backfill of {job.root} failed: {e}")
+                yield job, []
@@ -0,0 +1,154 @@
+"""
+In-process publish/subscribe bus for CodeChrono.
+
+Trackers publish small messages (coalesced file events, session starts and
+ends) and consumers such as the dashboard's event stream subscribe to them.
+Publishing never blocks: every subscriber has its own bounded buffer, and a
+subscriber that falls behind loses its oldest messages instead of slowing
+down the publisher.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+Message = Tuple[str, Any]
+
+
+class Subscription:
+    """
+    Bounded message buffer of one subscriber.
+
+    Attributes:
+        topics (Optional[FrozenSet[str]]): Topics delivered, None for all
+        maxsize (int): Maximum number of buffered messages
+        dropped (int): Messages discarded because the buffer was full
+    """
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, maxsize: int = 256) -> None:
+        """
+        Initialize the subscription.
+
+        Args:
+            topics: Topics to receive, None for all
+            maxsize: Maximum number of buffered messages
+        """
+        self.topics: Optional[FrozenSet[str]] = frozenset(topics) if topics is not None else None
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._messages: Deque[Message] = deque()
+        self._cond = threading.Condition()
+
+    def deliver(self, topic: str, payload: Any) -> None:
+        """
+        Buffer a message, discarding the oldest one if the buffer is full.
+
+        Args:
+            topic: Message topic
+            payload: JSON-serializable message body
+        """
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._messages) >= self.maxsize:
+                self._messages.popleft()
+                self.dropped += 1
+            self._messages.append((topic, payload))
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> List[Message]:
+        """
+        Take all buffered messages, waiting for at least one.
+
+        Args:
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Returns:
+            Buffered (topic, payload) messages, empty on timeout or close
+        """
+        with self._cond:
+            if not self._messages and not self.closed:
+                self._cond.wait(timeout)
+            messages = list(self._messages)
+            self._messages.clear()
+            return messages
+
+    def close(self) -> None:
+        """Stop buffering and wake a waiting consumer."""
+        with self._cond:
+            self.closed = True
+            self._messages.clear()
+            self._cond.notify_all()
+
+
+class EventBus:
+    """
+    Fan-out of published messages to subscriptions.
+
+    The subscriber list is replaced rather than mutated, so publish() reads
+    it without taking the bus lock.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a bus without subscribers."""
+        self._subscribers: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None, maxsize: int = 256) -> Subscription:
+        """
+        Register a new subscriber.
+
+        Args:
+            topics: Topics to receive, None for all
+            maxsize: Maximum number of messages buffered for this subscriber
+
+        Returns:
+            The subscription to read messages from
+        """
+        subscription = Subscription(topics, maxsize)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove and close a subscription.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+        subscription.close()
+
+    def publish(self, topic: str, payload: Any) -> None:
+        """
+        Deliver a message to every interested subscriber without blocking.
+
+        Args:
+            topic: Message topic, e.g. "file" or "session"
+            payload: JSON-serializable message body
+        """
+        self.published += 1
+        for subscription in self._subscribers:
+            if subscription.topics is None or topic in subscription.topics:
+                subscription.deliver(topic, payload)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report bus metrics.
+
+        Returns:
+            Dictionary with subscriber, published and dropped counts
+        """
+        subscribers = self._subscribers
+        return {
+            "subscribers": len(subscribers),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscribers),
+        }
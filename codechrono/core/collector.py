@@ -0,0 +1,205 @@
+"""
+Team collector storage for CodeChrono.
+
+A collector gathers the sessions and file events of many trackers into one
+SQLite database for an organisation-wide view. Trackers upload batches of
+records together with the position in their local store the batch ends at;
+the collector keeps that position per host and stream, so a restarted
+uploader resumes where the collector left off. Every record has a natural
+key and duplicates are ignored, which makes retrying a batch whose
+acknowledgement was lost harmless.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sessions come from the legacy tracker's session store, events from the
+# event log of ``codechrono start``
+STREAMS = ("sessions", "events")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    host TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    cursor TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (host, stream)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    host TEXT NOT NULL,
+    project TEXT,
+    language TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_key ON sessions (host, COALESCE(project, ''), language, start_time);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_ts ON sessions (start_ts);
+CREATE TABLE IF NOT EXISTS events (
+    host TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    path TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    language TEXT NOT NULL,
+    project TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_key ON events (host, timestamp, path, event_type);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+"""
+
+
+def _session_row(host: str, record: Dict) -> tuple:
+    """Validate an uploaded session and turn it into a table row."""
+    try:
+        start_ts = datetime.fromisoformat(record["start_time"]).timestamp()
+        return (
+            host, record.get("project"), str(record["language"]), record["start_time"],
+            str(record["end_time"]), start_ts, float(record["duration"]),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid session record {record!r}: {e}")
+
+
+def _event_row(host: str, record: Dict) -> tuple:
+    """Validate an uploaded event and turn it into a table row."""
+    try:
+        return (
+            host, float(record["timestamp"]), str(record["path"]), str(record["event_type"]),
+            str(record["language"]), record.get("project"),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid event record {record!r}: {e}")
+
+
+class CollectorStore:
+    """
+    SQLite database of the records uploaded by many trackers.
+
+    Attributes:
+        db_path (Path): Location of the database file
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Open (and create if needed) the collector database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def ingest(self, host: str, stream: str, cursor: str, records: List[Dict]) -> int:
+        """
+        Store one uploaded batch and advance the host's cursor, atomically.
+
+        Args:
+            host: Name of the uploading machine
+            stream: One of STREAMS
+            cursor: Position in the host's local store after this batch
+            records: Session or event records, depending on the stream
+
+        Returns:
+            Number of records that were new
+
+        Raises:
+            ValueError: If the stream is unknown or a record is malformed
+        """
+        if stream not in STREAMS:
+            raise ValueError(f"Unknown stream {stream!r}")
+        if stream == "sessions":
+            rows = [_session_row(host, record) for record in records]
+            sql = ("INSERT OR IGNORE INTO sessions (host, project, language, start_time, end_time, start_ts, duration) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)")
+        else:
+            rows = [_event_row(host, record) for record in records]
+            sql = ("INSERT OR IGNORE INTO events (host, timestamp, path, event_type, language, project) "
+                   "VALUES (?, ?, ?, ?, ?, ?)")
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            accepted = self._conn.total_changes - before
+            self._conn.execute(
+                "INSERT INTO cursors (host, stream, cursor, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (host, stream) DO UPDATE SET cursor = excluded.cursor, updated = excluded.updated",
+                (host, stream, str(cursor), time.time()),
+            )
+        return accepted
+
+    def cursor(self, host: str, stream: str) -> Optional[str]:
+        """
+        Return the position the host's last stored batch ended at.
+
+        Args:
+            host: Name of the uploading machine
+            stream: One of STREAMS
+
+        Returns:
+            The cursor, or None if nothing was uploaded yet
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor FROM cursors WHERE host = ? AND stream = ?", (host, stream)
+            ).fetchone()
+        return row[0] if row else None
+
+    def hosts(self) -> List[Dict]:
+        """
+        List the uploading hosts and their cursors.
+
+        Returns:
+            One entry per (host, stream) with "cursor" and "updated" epoch time
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT host, stream, cursor, updated FROM cursors ORDER BY host, stream"
+            ).fetchall()
+        return [{"host": host, "stream": stream, "cursor": cursor, "updated": updated}
+                for host, stream, cursor, updated in rows]
+
+    def team_totals(self, start: Optional[datetime] = None) -> Dict:
+        """
+        Aggregate the uploaded sessions and events since a point in time.
+
+        Args:
+            start: Inclusive lower bound, or None for everything
+
+        Returns:
+            Dictionary with "hosts", "languages" and "projects" mappings of
+            name to {"total_hours", "sessions"}, and "events" per host and
+            language
+        """
+        since = start.timestamp() if start else float("-inf")
+        totals: Dict = {"hosts": {}, "languages": {}, "projects": {}, "events": {}}
+        with self._lock:
+            for column, key in (("host", "hosts"), ("language", "languages"), ("project", "projects")):
+                rows = self._conn.execute(
+                    f"SELECT {column}, SUM(duration), COUNT(*) FROM sessions "
+                    f"WHERE start_ts >= ? AND {column} IS NOT NULL GROUP BY {column}",
+                    (since,),
+                ).fetchall()
+                totals[key] = {name: {"total_hours": hours, "sessions": count} for name, hours, count in rows}
+            rows = self._conn.execute(
+                "SELECT host, language, COUNT(*) FROM events WHERE timestamp >= ? GROUP BY host, language",
+                (since,),
+            ).fetchall()
+        for host, language, count in rows:
+            totals["events"].setdefault(host, {})[language] = count
+        return totals
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,292 @@
+"""
+Local control socket for CodeChrono.
+
+A tracking process serves its live in-memory state (open sessions, recent
+activity) over a Unix domain socket, and the CLI and editor plugins query it
+instead of re-reading history from disk. Every message is a 4-byte
+big-endian length followed by that many bytes of UTF-8 JSON. A request is
+``{"id": n, "method": name, "params": {...}}`` and is answered with
+``{"id": n, "result": value}`` or ``{"id": n, "error": message}``; a
+connection may carry any number of requests.
+
+The server runs an asyncio loop on a daemon thread. The client side uses a
+plain blocking socket, so short-lived commands do not pay for importing
+asyncio.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_SOCKET = Path.home() / ".codechrono" / "control.sock"
+
+HEADER = struct.Struct(">I")
+
+# Larger messages are refused; no request or reply comes anywhere near this
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class ControlError(Exception):
+    """Raised by the client when the tracker answers a request with an error."""
+
+
+def encode_message(message: Dict) -> bytes:
+    """Frame a message as a length prefix plus JSON."""
+    payload = json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+    return HEADER.pack(len(payload)) + payload
+
+
+class ControlServer:
+    """
+    Serves named handlers over a Unix domain socket.
+
+    Handlers are called with the request's params as keyword arguments on
+    the server thread and must return something JSON-serializable. They run
+    one at a time, so they should be quick and only copy the state they
+    report, taking whatever lock the owning thread uses.
+
+    Attributes:
+        socket_path (Path): Location of the socket
+        handlers (Dict[str, Callable]): Method name to handler
+    """
+
+    def __init__(self, socket_path: Path, handlers: Dict[str, Callable[..., Any]]) -> None:
+        """
+        Initialize the server.
+
+        Args:
+            socket_path: Location of the socket
+            handlers: Method name to handler; "ping" and "methods" are built in
+        """
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        self.handlers = {"ping": self._ping, "methods": lambda: sorted(self.handlers), **handlers}
+        self._loop = None
+        self._server = None
+        self._writers = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ControlServer":
+        """
+        Bind the socket and serve it from a daemon thread.
+
+        Raises:
+            RuntimeError: If another live process serves the socket
+            OSError: If the socket cannot be bound
+        """
+        import asyncio
+
+        self._claim_path()
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_unix_server(self._serve_client, path=str(self.socket_path))
+            )
+        except OSError:
+            self._loop.close()
+            raise
+        os.chmod(self.socket_path, 0o600)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="codechrono-control", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving control requests on {self.socket_path}")
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket."""
+        import asyncio
+
+        if self._thread is None:
+            return
+
+        async def shutdown() -> None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _claim_path(self) -> None:
+        """Remove a socket left behind by a dead process, refuse a live one."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.socket_path.exists() and not self.socket_path.is_symlink():
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(self.socket_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            logger.info(f"Removing stale control socket {self.socket_path}")
+            self.socket_path.unlink()
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"Another CodeChrono process is serving {self.socket_path}")
+
+    async def _serve_client(self, reader, writer) -> None:
+        """Answer requests on one connection until the client hangs up."""
+        import asyncio
+
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                except asyncio.IncompleteReadError:
+                    break
+                (length,) = HEADER.unpack(header)
+                if length > MAX_MESSAGE_BYTES:
+                    logger.warning(f"Dropping control connection sending a {length} byte message")
+                    break
+                payload = await reader.readexactly(length)
+                writer.write(encode_message(self._dispatch(payload)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _dispatch(self, payload: bytes) -> Dict:
+        """Run the handler named by a request and build the reply."""
+        try:
+            request = json.loads(payload)
+            request_id = request.get("id")
+            method = request["method"]
+            params = request.get("params") or {}
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return {"id": None, "error": "Malformed request"}
+        handler = self.handlers.get(method)
+        if handler is None:
+            return {"id": request_id, "error": f"Unknown method {method!r}"}
+        # Check the params against the signature before calling, so a
+        # TypeError raised inside the handler is not mistaken for bad params
+        import inspect
+
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            return {"id": request_id, "error": f"Bad params for {method}: {e}"}
+        try:
+            return {"id": request_id, "result": handler(**params)}
+        except Exception as e:
+            logger.exception(f"Control method {method} failed")
+            return {"id": request_id, "error": f"Internal error in {method}: {e}"}
+
+    def _ping(self) -> Dict:
+        """Identify the serving process."""
+        return {"pid": os.getpid(), "uptime": time.time() - self.started_at}
+
+
+class ControlClient:
+    """
+    Blocking client keeping one connection to a ControlServer.
+
+    Attributes:
+        socket_path (Path): Location of the socket
+        timeout (float): Seconds to wait for connecting and for each reply
+    """
+
+    def __init__(self, socket_path: Path = DEFAULT_CONTROL_SOCKET, timeout: float = 1.0) -> None:
+        """
+        Connect to the server.
+
+        Args:
+            socket_path: Location of the socket
+            timeout: Seconds to wait for connecting and for each reply
+
+        Raises:
+            OSError: If no process serves the socket
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._next_id = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(str(socket_path))
+        except OSError:
+            self._sock.close()
+            raise
+
+    def call(self, method: str, **params: Any) -> Any:
+        """
+        Call a method of the tracker.
+
+        Args:
+            method: Method name
+            **params: Keyword arguments of the handler
+
+        Returns:
+            The handler's result
+
+        Raises:
+            ControlError: If the tracker reports an error
+            OSError: If the connection fails or times out
+        """
+        self._next_id += 1
+        self._sock.sendall(encode_message({"id": self._next_id, "method": method, "params": params}))
+        (length,) = HEADER.unpack(self._read(HEADER.size))
+        if length > MAX_MESSAGE_BYTES:
+            raise ControlError(f"Reply of {length} bytes is too large")
+        reply = json.loads(self._read(length))
+        if "error" in reply:
+            raise ControlError(reply["error"])
+        return reply.get("result")
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._sock.close()
+
+    def __enter__(self) -> "ControlClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read(self, size: int) -> bytes:
+        """Read exactly ``size`` bytes."""
+        chunks = []
+        while size:
+            chunk = self._sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("Control socket closed by the tracker")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+
+def call(method: str, socket_path: Path = DEFAULT_CONTROL_SOCKET, timeout: float = 1.0, **params: Any) -> Any:
+    """
+    Make a single request to a running tracker.
+
+    Args:
+        method: Method name
+        socket_path: Location of the socket
+        timeout: Seconds to wait for connecting and for the reply
+        **params: Keyword arguments of the handler
+
+    Returns:
+        The handler's result
+
+    Raises:
+        ControlError: If the tracker reports an error
+        OSError: If no tracker serves the socket
+    """
+    with ControlClient(socket_path, timeout) as client:
+        return client.call(method, **params)
@@ -0,0 +1,237 @@
+"""
+Event dispatch for CodeChrono.
+
+This module decouples file system event handlers from tracking work: handlers
+put small tuples on a bounded queue and return immediately, and a single
+worker thread consumes them and owns all tracker state and persistence.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop-oldest", "coalesce")
+
+
+class BoundedEventQueue:
+    """
+    Thread-safe FIFO with a size bound and an overflow policy.
+
+    When the queue is full, "drop-oldest" discards the oldest item, while
+    "coalesce" first tries to replace the queued item with the same key
+    (e.g. the same file path) and only drops the oldest item if there is none.
+
+    Attributes:
+        maxsize (int): Maximum number of queued items
+        overflow (str): Overflow policy, one of OVERFLOW_POLICIES
+    """
+
+    def __init__(self, maxsize: int = 10000, overflow: str = "drop-oldest") -> None:
+        """
+        Initialize the queue.
+
+        Args:
+            maxsize: Maximum number of queued items
+            overflow: Overflow policy, "drop-oldest" or "coalesce"
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._items: "OrderedDict[int, Tuple[Hashable, Tuple, float]]" = OrderedDict()
+        self._latest: Dict[Hashable, int] = {}
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._max_depth = 0
+        self._dequeued = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def put(self, key: Hashable, item: Tuple) -> bool:
+        """
+        Enqueue an item without blocking.
+
+        Args:
+            key: Identity used by the "coalesce" policy
+            item: Tuple handed to the consumer
+
+        Returns:
+            False if the queue has been closed
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            self._enqueued += 1
+            if len(self._items) >= self.maxsize:
+                seq = self._latest.get(key) if self.overflow == "coalesce" else None
+                if seq is not None:
+                    _, _, enqueued_at = self._items[seq]
+                    self._items[seq] = (key, item, enqueued_at)
+                    self._coalesced += 1
+                    return True
+                _, (old_key, _, _) = self._items.popitem(last=False)
+                self._forget(old_key)
+                self._dropped += 1
+            self._seq += 1
+            self._items[self._seq] = (key, item, time.monotonic())
+            self._latest[key] = self._seq
+            self._max_depth = max(self._max_depth, len(self._items))
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple]:
+        """
+        Dequeue the oldest item.
+
+        Args:
+            timeout: Seconds to wait for an item, None to wait indefinitely
+
+        Returns:
+            The item, or None on timeout
+
+        Raises:
+            EOFError: If the queue is closed and drained
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                if self._closed:
+                    raise EOFError("queue closed")
+                return None
+            seq, (key, item, enqueued_at) = self._items.popitem(last=False)
+            if self._latest.get(key) == seq:
+                del self._latest[key]
+            latency = time.monotonic() - enqueued_at
+            self._dequeued += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            return item
+
+    def close(self) -> None:
+        """Stop accepting items; consumers drain what is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queue metrics.
+
+        Returns:
+            Dictionary with depth, throughput, overflow and latency figures
+        """
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "max_depth": self._max_depth,
+                "enqueued": self._enqueued,
+                "dequeued": self._dequeued,
+                "dropped": self._dropped,
+                "coalesced": self._coalesced,
+                "latency_avg": self._latency_total / self._dequeued if self._dequeued else 0.0,
+                "latency_max": self._latency_max,
+            }
+
+    def __len__(self) -> int:
+        """Return the number of queued items."""
+        return len(self._items)
+
+    def _forget(self, key: Hashable) -> None:
+        """Drop the coalescing index entry of an evicted item."""
+        seq = self._latest.get(key)
+        if seq is not None and seq not in self._items:
+            del self._latest[key]
+
+
+class EventWorker:
+    """
+    Consumer thread that owns tracker state.
+
+    Calls ``handle(*item)`` for each queued item and ``tick()`` when it is
+    due, even while items keep arriving. Ticks are due every
+    ``tick_interval`` seconds, or, when ``tick_delay`` is given, whenever it
+    reports zero seconds left; while it reports None the worker sleeps until
+    the next item. All calls happen on the worker thread, so the state they
+    touch needs no locking.
+
+    Attributes:
+        queue (BoundedEventQueue): Queue the worker consumes
+        thread (threading.Thread): The worker thread
+    """
+
+    def __init__(
+        self,
+        queue: BoundedEventQueue,
+        handle: Callable[..., None],
+        tick: Optional[Callable[[], None]] = None,
+        tick_interval: float = 1.0,
+        name: str = "codechrono-worker",
+        tick_delay: Optional[Callable[[], Optional[float]]] = None,
+    ) -> None:
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Queue to consume
+            handle: Function called with the fields of each item
+            tick: Optional periodic housekeeping function
+            tick_interval: Seconds between tick calls
+            name: Thread name
+            tick_delay: Optional function returning the seconds until the
+                next tick is due, or None if no tick is pending
+        """
+        self.queue = queue
+        self.handle = handle
+        self.tick = tick
+        self.tick_interval = tick_interval
+        self.tick_delay = tick_delay
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Close the queue, let the worker drain it and wait for it to exit."""
+        self.queue.close()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def _run(self) -> None:
+        """Consume items and run ticks until the queue is closed."""
+        next_tick = time.monotonic() + self.tick_interval
+        while True:
+            try:
+                item = self.queue.get(self._time_to_tick(next_tick))
+            except EOFError:
+                break
+            if item is not None:
+                try:
+                    self.handle(*item)
+                except Exception:
+                    logger.exception("Event handler failed")
+            remaining = self._time_to_tick(next_tick)
+            if remaining is not None and remaining <= 0:
+                try:
+                    self.tick()
+                except Exception:
+                    logger.exception("Worker tick failed")
+                next_tick = time.monotonic() + self.tick_interval
+
+    def _time_to_tick(self, next_tick: float) -> Optional[float]:
+        """Return the seconds until the next tick, or None to wait for items."""
+        if self.tick is None:
+            return None
+        if self.tick_delay is not None:
+            delay = self.tick_delay()
+            return None if delay is None else max(0.0, delay)
+        return max(0.0, next_tick - time.monotonic())
@@ -0,0 +1,226 @@
+"""
+Edit-size measurement for CodeChrono.
+
+A file event only says that a file was touched, so a formatter rewriting
+hundreds of files looks like hours of typing. EditMeter estimates how much
+of a file actually changed by comparing it with the snapshot taken at its
+previous event. Snapshots hold no content, only a hash per line: blocks cut
+at newlines stay aligned when text is inserted or removed above them, so
+the leading and trailing hashes that still match give the unchanged prefix
+and suffix, and everything between counts as edited. That is exact for the
+single-region edits of typing and an upper bound for edits spread over a
+file. Files are read whole, which the size limit keeps cheap, and binary or
+oversized files are skipped.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Union
+import logging
+import os
+import stat
+import struct
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# A NUL byte in this many leading bytes marks a file as binary
+BINARY_PROBE_BYTES = 8192
+
+HASH = struct.Struct("q")
+
+MEASURE_LATENCY = REGISTRY.histogram("codechrono_edit_measure_seconds", "Time spent measuring one edit")
+EDITS_SKIPPED = REGISTRY.counter("codechrono_edits_skipped_total", "Edits not measured (binary, oversized or unreadable)")
+
+
+class EditSize(NamedTuple):
+    """Amount of a file changed by one event."""
+
+    bytes: int
+    lines: int
+
+
+class _Snapshot:
+    """Line hashes of a file at its previous event, packed as 8-byte integers."""
+
+    __slots__ = ("size", "mtime_ns", "hashes")
+
+    def __init__(self, size: int, mtime_ns: int, hashes: bytes) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.hashes = hashes
+
+    @property
+    def lines(self) -> int:
+        """Number of lines, counting an unterminated last line; an empty file has none."""
+        if not self.size:
+            return 0
+        return len(self.hashes) // HASH.size - (1 if self.hashes[-HASH.size:] == _EMPTY_HASH else 0)
+
+    @property
+    def footprint(self) -> int:
+        """Approximate memory held by the hashes, in bytes."""
+        return len(self.hashes)
+
+
+_EMPTY_HASH = HASH.pack(hash(b""))
+
+
+def _pack_hashes(pieces: List[bytes]) -> bytes:
+    """Hash each piece and pack the hashes; bytes compare with memcmp."""
+    return struct.pack(f"{len(pieces)}q", *map(hash, pieces))
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    """Return the number of leading hashes two packed sequences share."""
+    limit = min(len(a), len(b))
+    # Galloping search over slice comparisons, which run in C
+    count = 0
+    step = limit
+    while step:
+        if count + step <= limit and a[count:count + step] == b[count:count + step]:
+            count += step
+        else:
+            step //= 2
+    return count // HASH.size
+
+
+class EditMeter:
+    """
+    Measures edits against a bounded LRU cache of file snapshots.
+
+    Not thread-safe: call measure() from the thread that handles events.
+
+    Attributes:
+        max_files (int): Maximum number of snapshots kept
+        max_cache_bytes (int): Maximum memory held by snapshot hashes
+        max_file_bytes (int): Larger files are not measured
+        cache_bytes (int): Memory currently held by snapshot hashes
+    """
+
+    def __init__(
+        self,
+        max_files: int = 4096,
+        max_cache_bytes: int = 32 * 1024 * 1024,
+        max_file_bytes: int = 4 * 1024 * 1024,
+    ) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_files: Maximum number of snapshots kept
+            max_cache_bytes: Maximum memory held by snapshot hashes
+            max_file_bytes: Larger files are not measured
+        """
+        self.max_files = max_files
+        self.max_cache_bytes = max_cache_bytes
+        self.max_file_bytes = max_file_bytes
+        self.cache_bytes = 0
+        self._snapshots: "OrderedDict[str, _Snapshot]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached snapshots."""
+        return len(self._snapshots)
+
+    def measure(self, path: Union[str, Path], event_type: str = "modified") -> Optional[EditSize]:
+        """
+        Estimate how much of a file changed since its previous event.
+
+        Args:
+            path: Path of the changed file
+            event_type: "created", "modified" or "deleted"
+
+        Returns:
+            The size of the edit, or None when it cannot be known: the file
+            was not seen before (its first modification only takes a
+            snapshot), is binary or oversized, or could not be read
+        """
+        with MEASURE_LATENCY.time():
+            return self._measure(str(path), event_type)
+
+    def forget(self, path: Union[str, Path]) -> None:
+        """Drop the snapshot of a file, e.g. when it is renamed away."""
+        self._drop(str(path))
+
+    def _measure(self, path: str, event_type: str) -> Optional[EditSize]:
+        """Compare a file with its snapshot and replace the snapshot."""
+        previous = self._snapshots.get(path)
+        if event_type == "deleted":
+            self._drop(path)
+            return EditSize(previous.size, previous.lines) if previous else None
+        try:
+            info = os.stat(path)
+        except OSError:
+            self._drop(path)
+            return None
+        if not stat.S_ISREG(info.st_mode) or info.st_size > self.max_file_bytes:
+            self._skip(path)
+            return None
+        if previous and previous.size == info.st_size and previous.mtime_ns == info.st_mtime_ns:
+            self._snapshots.move_to_end(path)
+            return EditSize(0, 0)
+
+        data = self._read(path)
+        if data is None:
+            self._skip(path)
+            return None
+        pieces = data.split(b"\n")
+        current = _Snapshot(len(data), info.st_mtime_ns, _pack_hashes(pieces))
+        self._store(path, current)
+        if previous is None:
+            return EditSize(current.size, current.lines) if event_type == "created" else None
+        return self._compare(previous, current, pieces)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        """Read a file, or return None if it is binary or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read(self.max_file_bytes + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_bytes or b"\0" in data[:BINARY_PROBE_BYTES]:
+            return None
+        return data
+
+    def _compare(self, old: _Snapshot, new: _Snapshot, pieces: List[bytes]) -> EditSize:
+        """Size the lines between the unchanged prefix and suffix."""
+        old_count, new_count = len(old.hashes) // HASH.size, len(pieces)
+        prefix = _common_prefix(old.hashes, new.hashes)
+        # Reversing the bytes reverses the order of the hashes (and each
+        # hash's bytes, alike in both), so this counts trailing matches
+        suffix = min(_common_prefix(old.hashes[::-1], new.hashes[::-1]), min(old_count, new_count) - prefix)
+        old_lines = old_count - prefix - suffix
+        new_lines = new_count - prefix - suffix
+        if not old_lines and not new_lines:
+            return EditSize(0, 0)
+        # Unchanged lines have the same length in both versions; a prefix
+        # line is followed by its newline, suffix lines are joined by theirs
+        kept = sum(map(len, pieces[:prefix])) + prefix
+        if suffix:
+            kept += sum(map(len, pieces[len(pieces) - suffix:])) + suffix - 1
+        edited = max(old.size - kept, new.size - kept, 0)
+        return EditSize(edited, max(old_lines, new_lines))
+
+    def _store(self, path: str, snapshot: _Snapshot) -> None:
+        """Cache a snapshot, evicting the least recently used ones over the limits."""
+        self._drop(path)
+        self._snapshots[path] = snapshot
+        self.cache_bytes += snapshot.footprint
+        while self._snapshots and (
+            len(self._snapshots) > self.max_files or self.cache_bytes > self.max_cache_bytes
+        ):
+            _, evicted = self._snapshots.popitem(last=False)
+            self.cache_bytes -= evicted.footprint
+
+    def _drop(self, path: str) -> None:
+        """Remove a snapshot if cached."""
+        snapshot = self._snapshots.pop(path, None)
+        if snapshot is not None:
+            self.cache_bytes -= snapshot.footprint
+
+    def _skip(self, path: str) -> None:
+        """Count an unmeasurable file and forget any stale snapshot of it."""
+        EDITS_SKIPPED.inc()
+        self._drop(path)
+        logger.debug(f"Not measuring edits of {path}")
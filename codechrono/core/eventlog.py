@@ -0,0 +1,396 @@
+"""
+On-disk event log for CodeChrono.
+
+This module appends tracked file events to newline-delimited JSON segment
+files that rotate by size. Segment names carry the timestamp of their first
+event, so readers open only the segments overlapping the requested time range
+and stream them line by line instead of loading the history into memory.
+Queries that aggregate the log go through a SegmentCache, which parses each
+segment into columns once and reuses them while the segment is unchanged.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Set, Tuple
+import json
+import logging
+import threading
+
+from .events import EventBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT_LOG_DIR = Path.home() / ".codechrono" / "events"
+
+SEGMENT_SUFFIX = ".ndjson"
+
+
+class EventLog:
+    """
+    Segmented, append-only log of file events.
+
+    Each line is ``[timestamp, path, event_type, language]``. Writes are
+    buffered and flushed at most ``flush_interval`` seconds after the first
+    unflushed event, on rotation and on close. Every process start opens a
+    new segment, and a torn last line in an older segment is skipped.
+
+    Attributes:
+        directory (Path): Directory holding the segment files
+        segment_bytes (int): Size at which the current segment is rotated
+        flush_interval (float): Longest time events stay in the write buffer
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_EVENT_LOG_DIR,
+        segment_bytes: int = 8 * 1024 * 1024,
+        flush_interval: float = 2.0,
+        buffer_size: int = 64 * 1024,
+    ) -> None:
+        """
+        Initialize the log.
+
+        Args:
+            directory: Directory holding the segment files
+            segment_bytes: Size at which the current segment is rotated
+            flush_interval: Longest time events stay in the write buffer
+            buffer_size: Write buffer size in bytes
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self._file: Optional[IO[str]] = None
+        self._segment_size = 0
+        self._last_timestamp = 0.0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def append(self, path: str, event_type: str, language: str, timestamp: float) -> None:
+        """
+        Append an event.
+
+        Args:
+            path: Path of the changed file
+            event_type: Type of change
+            language: Language of the file
+            timestamp: Epoch seconds
+        """
+        with self._lock:
+            timestamp = max(timestamp, self._last_timestamp)
+            self._last_timestamp = timestamp
+            if self._file is None or self._segment_size >= self.segment_bytes:
+                self._open_segment(timestamp)
+            line = json.dumps([round(timestamp, 6), path, event_type, language], separators=(",", ":")) + "\n"
+            self._file.write(line)
+            self._segment_size += len(line)
+            if self._flush_timer is None and self.flush_interval > 0:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write buffered events to the operating system."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flush and close the current segment."""
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def segments(self) -> List[Tuple[float, Path]]:
+        """
+        List the segment files in time order.
+
+        Returns:
+            List of (first event timestamp, segment path)
+        """
+        if not self.directory.exists():
+            return []
+        segments = []
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                segments.append((int(path.stem) / 1000, path))
+            except ValueError:
+                continue
+        segments.sort()
+        return segments
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Tuple[float, str, str, str]]:
+        """
+        Stream the events with start <= timestamp < end.
+
+        Args:
+            start: Inclusive lower bound in epoch seconds, or None
+            end: Exclusive upper bound in epoch seconds, or None
+
+        Yields:
+            Tuples of (timestamp, path, event_type, language)
+        """
+        self.flush()
+        segments = self.segments()
+        for index, (first, path) in enumerate(segments):
+            if end is not None and first >= end:
+                break
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if start is not None and next_first is not None and next_first <= start:
+                continue
+            yield from self._read_segment(path, start, end)
+
+    def read_segment(self, path: Path) -> Iterator[Tuple[float, str, str, str]]:
+        """
+        Stream every event of one segment, e.g. before retention removes it.
+
+        Args:
+            path: Segment path as listed by segments()
+
+        Yields:
+            Tuples of (timestamp, path, event_type, language)
+        """
+        return self._read_segment(path, None, None)
+
+    def version(self) -> str:
+        """
+        Return a token that changes whenever events are appended or segments
+        are added or removed.
+
+        Returns:
+            Opaque version string
+        """
+        self.flush()
+        segments = self.segments()
+        if not segments:
+            return "0"
+        path = segments[-1][1]
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        return f"{len(segments)}-{path.stem}-{size}"
+
+    def tail_cursor(self) -> str:
+        """
+        Return a cursor positioned after the last event.
+
+        Returns:
+            Cursor for read_from()
+        """
+        self.flush()
+        segments = self.segments()
+        if not segments:
+            return "0:0"
+        path = segments[-1][1]
+        try:
+            return f"{path.stem}:{path.stat().st_size}"
+        except FileNotFoundError:
+            return f"{path.stem}:0"
+
+    def read_from(self, cursor: str, limit: int = 1000) -> Tuple[List[Tuple[float, str, str, str]], str]:
+        """
+        Read the events appended after a cursor.
+
+        A cursor is ``<segment>:<byte offset>``; only complete lines of the
+        newest segment are consumed, so a line still being written is
+        returned by a later call.
+
+        Args:
+            cursor: Cursor from tail_cursor() or a previous call
+            limit: Maximum number of events to return
+
+        Returns:
+            (events, next cursor), events as (timestamp, path, event_type, language)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            stem, offset = cursor.split(":")
+            stem, offset = int(stem), int(offset)
+        except ValueError:
+            raise ValueError(f"Invalid event log cursor: {cursor!r}")
+        self.flush()
+        events: List[Tuple[float, str, str, str]] = []
+        segments = self.segments()
+        for index, (_, path) in enumerate(segments):
+            if int(path.stem) < stem:
+                continue
+            if int(path.stem) > stem:
+                stem, offset = int(path.stem), 0
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                f.seek(offset)
+                while len(events) < limit:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        if line and index + 1 < len(segments):
+                            # Torn tail of a segment that will not grow again
+                            offset += len(line)
+                            continue
+                        break
+                    offset += len(line)
+                    try:
+                        events.append(tuple(json.loads(line)))
+                    except ValueError:
+                        logger.warning(f"Skipping malformed event log line in {path}")
+            if len(events) >= limit:
+                break
+        return events, f"{stem}:{offset}"
+
+    def _read_segment(
+        self, path: Path, start: Optional[float], end: Optional[float]
+    ) -> Iterator[Tuple[float, str, str, str]]:
+        """Stream the in-range events of one segment."""
+        try:
+            f = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    timestamp, file_path, event_type, language = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed event log line in {path}")
+                    continue
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    break
+                yield timestamp, file_path, event_type, language
+
+    def _open_segment(self, timestamp: float) -> None:
+        """Close the current segment and start a new one at ``timestamp``."""
+        if self._file is not None:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = int(timestamp * 1000)
+        while (self.directory / f"{stamp:015d}{SEGMENT_SUFFIX}").exists():
+            stamp += 1
+        path = self.directory / f"{stamp:015d}{SEGMENT_SUFFIX}"
+        self._file = open(path, "a", encoding="utf-8", buffering=self.buffer_size)
+        self._segment_size = 0
+        logger.info(f"Opened event log segment {path}")
+
+
+def _parse_lines(data: bytes, path: Path) -> List[List]:
+    """Parse complete event log lines, in one pass unless some are malformed."""
+    try:
+        return json.loads(b"[" + data.rstrip(b"\n").replace(b"\n", b",") + b"]")
+    except ValueError:
+        events = []
+        for line in data.splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping malformed event log line in {path}")
+        return events
+
+
+class SegmentCache:
+    """
+    Columnar copies of event log segments, reused across queries.
+
+    Parsing the JSON lines dominates an aggregate query over the log, so
+    each segment is parsed into an EventBuffer once and kept while it is
+    unchanged; the newest segment is extended with the lines appended since
+    the previous query. Segments removed by retention are dropped, and the
+    least recently used ones are evicted beyond ``max_events``.
+
+    Buffers returned by ranges() may be extended by the next call, so
+    callers serialize their queries.
+
+    Attributes:
+        log (EventLog): Log whose segments are cached
+        max_events (int): Events kept cached between queries
+    """
+
+    def __init__(self, log: EventLog, max_events: int = 1_000_000) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            log: Log whose segments are cached
+            max_events: Events kept cached between queries
+        """
+        self.log = log
+        self.max_events = max_events
+        # Segment path -> (buffer, bytes parsed), least recently used first
+        self._segments: "OrderedDict[Path, Tuple[EventBuffer, int]]" = OrderedDict()
+
+    def ranges(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Tuple[EventBuffer, int, int]]:
+        """
+        Get the events with start <= timestamp < end as buffer slices.
+
+        Args:
+            start: Inclusive lower bound in epoch seconds, or None
+            end: Exclusive upper bound in epoch seconds, or None
+
+        Returns:
+            (buffer, lo, hi) per segment holding events in range, in time order
+        """
+        self.log.flush()
+        segments = self.log.segments()
+        listed = {path for _, path in segments}
+        for path in [path for path in self._segments if path not in listed]:
+            del self._segments[path]
+        ranges = []
+        used = set()
+        for index, (first, path) in enumerate(segments):
+            if end is not None and first >= end:
+                break
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if start is not None and next_first is not None and next_first <= start:
+                continue
+            buffer = self._load(path)
+            used.add(path)
+            lo, hi = buffer.index_range(start, end)
+            if hi > lo:
+                ranges.append((buffer, lo, hi))
+        self._evict(used)
+        return ranges
+
+    def __len__(self) -> int:
+        """Return the number of cached events."""
+        return sum(len(buffer) for buffer, _ in self._segments.values())
+
+    def _load(self, path: Path) -> EventBuffer:
+        """Return the buffer of a segment, parsing the lines not seen yet."""
+        buffer, offset = self._segments.pop(path, (None, 0))
+        if buffer is None:
+            buffer = EventBuffer()
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return buffer
+        # A line still being written (or a torn one) is left for later
+        complete = data.rfind(b"\n") + 1
+        for event in _parse_lines(data[:complete], path):
+            try:
+                timestamp, file_path, event_type, language = event
+                buffer.append(file_path, event_type, language, timestamp)
+            except (TypeError, ValueError):
+                logger.warning(f"Skipping malformed event log line in {path}")
+        self._segments[path] = (buffer, offset + complete)
+        return buffer
+
+    def _evict(self, in_use: Set[Path]) -> None:
+        """Drop least recently used segments beyond max_events, except those in use."""
+        cached = len(self)
+        for path, (buffer, _) in list(self._segments.items()):
+            if cached <= self.max_events:
+                break
+            if path not in in_use:
+                del self._segments[path]
+                cached -= len(buffer)
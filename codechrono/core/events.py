@@ -0,0 +1,235 @@
+"""
+Compact in-memory event storage for CodeChrono.
+
+This module stores file events column by column in typed arrays: paths and
+languages are interned into small integer ids, timestamps are epoch floats and
+event types are one-byte codes, so an event costs about 15 bytes instead of a
+dict with two strings.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .aggregate import count_ids, count_pairs, heatmap
+
+EVENT_TYPES = ("created", "modified", "deleted")
+EVENT_CODES: Dict[str, int] = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+
+class Interner:
+    """
+    Bidirectional mapping between strings and dense integer ids.
+
+    Attributes:
+        values (List[str]): String for each id
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        """
+        Return the id of ``value``, assigning a new one if needed.
+
+        Args:
+            value: String to intern
+
+        Returns:
+            Integer id
+        """
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __len__(self) -> int:
+        """Return the number of interned strings."""
+        return len(self.values)
+
+
+class EventBuffer:
+    """
+    Append-only columnar buffer of file events in time order.
+
+    Timestamps are kept non-decreasing (a clock step backwards is clamped to
+    the previous event), so time ranges are found by binary search.
+
+    Attributes:
+        paths (Interner): Path table
+        languages (Interner): Language table
+        timestamps (array): Epoch seconds per event
+        path_ids (array): Path id per event
+        event_codes (array): Index into EVENT_TYPES per event
+        language_ids (array): Language id per event
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty columns."""
+        self.paths = Interner()
+        self.languages = Interner()
+        self.timestamps = array("d")
+        self.path_ids = array("I")
+        self.event_codes = array("B")
+        self.language_ids = array("H")
+
+    @classmethod
+    def from_events(cls, events: Iterable[Tuple[float, str, str, str]]) -> "EventBuffer":
+        """
+        Build a buffer from (timestamp, path, event_type, language) tuples.
+
+        Args:
+            events: Events in time order, as read from an EventLog
+
+        Returns:
+            New buffer holding the events
+        """
+        buffer = cls()
+        for timestamp, path, event_type, language in events:
+            buffer.append(path, event_type, language, timestamp)
+        return buffer
+
+    def append(self, path: str, event_type: str, language: str, timestamp: float) -> None:
+        """
+        Add an event.
+
+        Args:
+            path: Path of the changed file
+            event_type: One of EVENT_TYPES
+            language: Language of the file
+            timestamp: Epoch seconds
+
+        Raises:
+            ValueError: If the event type is unknown
+        """
+        code = EVENT_CODES.get(event_type)
+        if code is None:
+            raise ValueError(f"Unsupported event type: {event_type}")
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            timestamp = self.timestamps[-1]
+        self.timestamps.append(timestamp)
+        self.path_ids.append(self.paths.intern(path))
+        self.event_codes.append(code)
+        self.language_ids.append(self.languages.intern(language))
+
+    def index_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Find the events with start <= timestamp < end.
+
+        Args:
+            start: Inclusive lower bound in epoch seconds, or None
+            end: Exclusive upper bound in epoch seconds, or None
+
+        Returns:
+            (lo, hi) slice bounds into the columns
+        """
+        lo = bisect_left(self.timestamps, start) if start is not None else 0
+        hi = bisect_left(self.timestamps, end) if end is not None else len(self.timestamps)
+        return lo, max(lo, hi)
+
+    def count_paths(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, int]:
+        """
+        Count events per path within a slice.
+
+        Args:
+            lo: First event index
+            hi: End event index, defaults to the end
+
+        Returns:
+            Mapping of path to event count
+        """
+        counts = count_ids(self.path_ids, len(self.paths), lo, hi)
+        return {path: count for path, count in zip(self.paths.values, counts) if count}
+
+    def count_languages(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, int]:
+        """
+        Count events per language within a slice.
+
+        Args:
+            lo: First event index
+            hi: End event index, defaults to the end
+
+        Returns:
+            Mapping of language to event count
+        """
+        counts = count_ids(self.language_ids, len(self.languages), lo, hi)
+        return {language: count for language, count in zip(self.languages.values, counts) if count}
+
+    def count_path_languages(self, lo: int = 0, hi: Optional[int] = None) -> Dict[Tuple[str, str], int]:
+        """
+        Count events per (path, language) pair within a slice.
+
+        Args:
+            lo: First event index
+            hi: End event index, defaults to the end
+
+        Returns:
+            Mapping of (path, language) to event count
+        """
+        paths = self.paths.values
+        languages = self.languages.values
+        return {
+            (paths[path_id], languages[language_id]): count
+            for (path_id, language_id), count in count_pairs(self.path_ids, self.language_ids, lo, hi).items()
+        }
+
+    def heatmap(self, lo: int = 0, hi: Optional[int] = None) -> List[List[int]]:
+        """
+        Count events per local weekday and hour within a slice.
+
+        Args:
+            lo: First event index
+            hi: End event index, defaults to the end
+
+        Returns:
+            7x24 nested list indexed by [weekday][hour], Monday first
+        """
+        return heatmap(self.timestamps, lo, hi)
+
+    def iter_events(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[str, float, str, str]]:
+        """
+        Iterate over events in a slice.
+
+        Args:
+            lo: First event index
+            hi: End event index, defaults to the end
+
+        Yields:
+            Tuples of (path, timestamp, event_type, language)
+        """
+        hi = len(self.timestamps) if hi is None else hi
+        paths = self.paths.values
+        languages = self.languages.values
+        for i in range(lo, hi):
+            yield (
+                paths[self.path_ids[i]],
+                self.timestamps[i],
+                EVENT_TYPES[self.event_codes[i]],
+                languages[self.language_ids[i]],
+            )
+
+    def trim(self, keep: int) -> None:
+        """
+        Drop all but the newest ``keep`` events.
+
+        Args:
+            keep: Number of most recent events to retain
+        """
+        drop = max(0, len(self.timestamps) - keep)
+        if drop:
+            for name in ("timestamps", "path_ids", "event_codes", "language_ids"):
+                setattr(self, name, getattr(self, name)[drop:])
+
+    def nbytes(self) -> int:
+        """Return the bytes used by the event columns (excluding the string tables)."""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.timestamps, self.path_ids, self.event_codes, self.language_ids)
+        )
+
+    def __len__(self) -> int:
+        """Return the number of events."""
+        return len(self.timestamps)
@@ -0,0 +1,400 @@
+"""
+Streaming exporters for CodeChrono.
+
+This module writes tracked events to files without materializing them: every
+exporter consumes an iterator of events in fixed-size chunks, so memory use is
+bounded by the chunk size rather than by the length of the exported range.
+Compressed and columnar formats use optional libraries when installed and a
+stdlib implementation otherwise.
+"""
+
+from array import array
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple
+import csv
+import gzip
+import io
+import json
+import logging
+import struct
+import sys
+
+from .events import EVENT_CODES, EVENT_TYPES
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[str, float, str, str]
+
+EXPORT_EXTENSIONS: Dict[str, str] = {
+    "json": "json",
+    "ndjson": "ndjson",
+    "csv": "csv",
+    "csv.gz": "csv.gz",
+    "csv.zst": "csv.zst",
+    "parquet": "parquet",
+    "columnar": "ccol",
+}
+
+EXPORT_FORMATS = tuple(EXPORT_EXTENSIONS)
+
+CSV_HEADER = ["file_path", "timestamp", "event_type", "language"]
+
+COLUMNAR_MAGIC = b"CCHRONO1"
+
+_BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def iter_chunks(events: Iterable[Event], size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Event]]:
+    """
+    Split an event stream into lists of at most ``size`` events.
+
+    Args:
+        events: Event iterator
+        size: Maximum chunk length
+
+    Yields:
+        Lists of events
+    """
+    events = iter(events)
+    while True:
+        chunk = list(islice(events, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _isoformat(timestamp: float) -> str:
+    """Format epoch seconds the way the JSON and CSV exports always have."""
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds")
+
+
+def export_json(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write the per-file JSON document of the original export format.
+
+    The document groups events by file, so unlike the other exporters this
+    one holds the exported range in memory; prefer NDJSON for large ranges.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Unused, accepted for a uniform signature
+
+    Returns:
+        Number of exported events
+    """
+    log: Dict[str, List[Dict]] = {}
+    count = 0
+    for path, timestamp, event_type, language in events:
+        log.setdefault(path, []).append({
+            "timestamp": _isoformat(timestamp),
+            "event_type": event_type,
+            "language": language
+        })
+        count += 1
+    with open(output_path, "w") as f:
+        json.dump(log, f, indent=2)
+    return count
+
+
+def export_ndjson(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write one JSON object per event and line.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Events serialized per write
+
+    Returns:
+        Number of exported events
+    """
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as f:
+        for chunk in iter_chunks(events, chunk_size):
+            f.write("".join(
+                json.dumps({
+                    "file_path": path,
+                    "timestamp": _isoformat(timestamp),
+                    "event_type": event_type,
+                    "language": language,
+                }) + "\n"
+                for path, timestamp, event_type, language in chunk
+            ))
+            count += len(chunk)
+    return count
+
+
+def _write_csv(events: Iterable[Event], f: io.TextIOBase, chunk_size: int) -> int:
+    """Write the CSV header and rows to an open text stream."""
+    writer = csv.writer(f)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for chunk in iter_chunks(events, chunk_size):
+        writer.writerows(
+            (path, _isoformat(timestamp), event_type, language)
+            for path, timestamp, event_type, language in chunk
+        )
+        count += len(chunk)
+    return count
+
+
+def export_csv(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write plain CSV.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Rows written per batch
+
+    Returns:
+        Number of exported events
+    """
+    with open(output_path, "w", newline="") as f:
+        return _write_csv(events, f, chunk_size)
+
+
+def export_csv_gzip(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write gzip-compressed CSV.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Rows written per batch
+
+    Returns:
+        Number of exported events
+    """
+    with gzip.open(output_path, "wt", newline="", compresslevel=6) as f:
+        return _write_csv(events, f, chunk_size)
+
+
+def _open_zstd(output_path: Path) -> BinaryIO:
+    """
+    Open a zstd-compressing binary writer.
+
+    Uses the standard library module where available (Python 3.14+) and the
+    zstandard package otherwise.
+
+    Raises:
+        RuntimeError: If no zstd implementation is installed
+    """
+    try:
+        from compression import zstd
+        return zstd.open(output_path, "wb")
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("The csv.zst format requires the 'zstandard' package (pip install zstandard)")
+    return zstandard.open(output_path, "wb")
+
+
+def export_csv_zstd(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write zstd-compressed CSV.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Rows written per batch
+
+    Returns:
+        Number of exported events
+
+    Raises:
+        RuntimeError: If no zstd implementation is installed
+    """
+    with _open_zstd(output_path) as raw:
+        with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            return _write_csv(events, f, chunk_size)
+
+
+def export_parquet(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write a Parquet file with one row group per chunk.
+
+    Paths, event types and languages are dictionary-encoded and timestamps
+    are stored as microsecond timestamps.
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Rows per row group
+
+    Returns:
+        Number of exported events
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("The parquet format requires 'pyarrow'; use the 'columnar' format without it")
+
+    strings = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([
+        ("file_path", strings),
+        ("timestamp", pa.timestamp("us")),
+        ("event_type", strings),
+        ("language", strings),
+    ])
+    count = 0
+    with pq.ParquetWriter(str(output_path), schema, compression="zstd") as writer:
+        for chunk in iter_chunks(events, chunk_size):
+            paths, timestamps, event_types, languages = zip(*chunk)
+            writer.write_batch(pa.record_batch([
+                pa.array(paths, pa.string()).dictionary_encode(),
+                pa.array([int(ts * 1_000_000) for ts in timestamps], pa.timestamp("us")),
+                pa.array(event_types, pa.string()).dictionary_encode(),
+                pa.array(languages, pa.string()).dictionary_encode(),
+            ], schema=schema))
+            count += len(chunk)
+    return count
+
+
+def _encode_strings(values: Iterable[str], typecode: str) -> Tuple[bytes, bytes]:
+    """Dictionary-encode strings into (JSON table, id array bytes)."""
+    table: Dict[str, int] = {}
+    ids = array(typecode, (table.setdefault(value, len(table)) for value in values))
+    return json.dumps(list(table)).encode("utf-8"), ids.tobytes()
+
+
+def export_columnar(events: Iterable[Event], output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write the stdlib-only columnar format.
+
+    The file starts with COLUMNAR_MAGIC and a byte-order flag (``<`` or
+    ``>``) for the arrays, followed by record batches. Each batch is a
+    little-endian ``uint32`` row count and six buffers, each prefixed with
+    its ``uint32`` length: float64 timestamps, the path table as a JSON
+    list, uint32 path ids, uint8 event type codes (EVENT_TYPES order), the
+    language table and uint16 language ids. Read it back with
+    read_columnar().
+
+    Args:
+        events: Events to export
+        output_path: Destination file
+        chunk_size: Rows per record batch
+
+    Returns:
+        Number of exported events
+    """
+    count = 0
+    with open(output_path, "wb") as f:
+        f.write(COLUMNAR_MAGIC + _BYTE_ORDER)
+        for chunk in iter_chunks(events, chunk_size):
+            paths, timestamps, event_types, languages = zip(*chunk)
+            path_table, path_ids = _encode_strings(paths, "I")
+            language_table, language_ids = _encode_strings(languages, "H")
+            buffers = [
+                array("d", timestamps).tobytes(),
+                path_table,
+                path_ids,
+                array("B", (EVENT_CODES[event_type] for event_type in event_types)).tobytes(),
+                language_table,
+                language_ids,
+            ]
+            f.write(struct.pack("<I", len(chunk)))
+            for buffer in buffers:
+                f.write(struct.pack("<I", len(buffer)))
+                f.write(buffer)
+            count += len(chunk)
+    return count
+
+
+def read_columnar(input_path: Path) -> Iterator[Event]:
+    """
+    Stream the events of a file written by export_columnar().
+
+    Args:
+        input_path: File to read
+
+    Yields:
+        Tuples of (file_path, timestamp, event_type, language)
+
+    Raises:
+        ValueError: If the file is not in the columnar format
+    """
+    with open(input_path, "rb") as f:
+        header = f.read(len(COLUMNAR_MAGIC) + 1)
+        if header[:-1] != COLUMNAR_MAGIC:
+            raise ValueError(f"Not a CodeChrono columnar file: {input_path}")
+        swap = header[-1:] != _BYTE_ORDER
+
+        def column(typecode: str, data: bytes) -> array:
+            values = array(typecode)
+            values.frombytes(data)
+            if swap:
+                values.byteswap()
+            return values
+
+        while True:
+            prefix = f.read(4)
+            if not prefix:
+                return
+            (rows,) = struct.unpack("<I", prefix)
+            buffers = []
+            for _ in range(6):
+                (size,) = struct.unpack("<I", f.read(4))
+                buffers.append(f.read(size))
+            timestamps = column("d", buffers[0])
+            path_table = json.loads(buffers[1])
+            path_ids = column("I", buffers[2])
+            codes = column("B", buffers[3])
+            language_table = json.loads(buffers[4])
+            language_ids = column("H", buffers[5])
+            for i in range(rows):
+                yield (
+                    path_table[path_ids[i]],
+                    timestamps[i],
+                    EVENT_TYPES[codes[i]],
+                    language_table[language_ids[i]],
+                )
+
+
+EXPORTERS: Dict[str, Callable[[Iterable[Event], Path, int], int]] = {
+    "json": export_json,
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+    "csv.gz": export_csv_gzip,
+    "csv.zst": export_csv_zstd,
+    "parquet": export_parquet,
+    "columnar": export_columnar,
+}
+
+
+def export_events(
+    events: Iterable[Event], format: str, output_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """
+    Stream events to a file in the given format.
+
+    Args:
+        events: Events to export, in time order
+        format: One of EXPORT_FORMATS
+        output_path: Destination file
+        chunk_size: Events processed per batch
+
+    Returns:
+        Number of exported events
+
+    Raises:
+        ValueError: If the format is unknown
+        RuntimeError: If the format needs an optional library that is missing
+    """
+    exporter = EXPORTERS.get(format)
+    if exporter is None:
+        raise ValueError(f"Unsupported export format: {format}")
+    count = exporter(events, output_path, chunk_size)
+    logger.info(f"Exported {count} events as {format} to {output_path}")
+    return count
@@ -0,0 +1,252 @@
+"""
+Append-only session journal for CodeChrono.
+
+This module persists ended coding sessions as one JSON record per line and
+periodically compacts them into a snapshot file, so recording a session is a
+single small append instead of a rewrite of the whole history.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+from .rollups import add_totals, apply_rollup, empty_rollups
+
+logger = logging.getLogger(__name__)
+
+# Sessions this short are not recorded
+MIN_SESSION_SECONDS = 60
+
+
+def empty_data() -> Dict:
+    """Return the initial tracker state used when no snapshot exists."""
+    return {"sessions": [], "languages": {}, "projects": {}, "rollups": empty_rollups()}
+
+
+def make_session(
+    language: str,
+    project: Optional[str],
+    start_time: datetime,
+    end_time: datetime,
+    edited_lines: Optional[int] = None,
+    edited_bytes: Optional[int] = None,
+) -> Optional[Dict]:
+    """
+    Build the record of an ended session.
+
+    Args:
+        language: Language of the session
+        project: Project of the session, or None
+        start_time: First activity
+        end_time: Last activity
+        edited_lines: Lines changed during the session, None if not measured
+        edited_bytes: Bytes changed during the session, None if not measured
+
+    Returns:
+        Session record, or None if the session is too short to record
+    """
+    seconds = (end_time - start_time).total_seconds()
+    if seconds <= MIN_SESSION_SECONDS:
+        return None
+    session = {
+        "language": language,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "duration": seconds / 3600,
+    }
+    if project:
+        session["project"] = project
+    if edited_lines is not None:
+        session["edited_lines"] = edited_lines
+        session["edited_bytes"] = edited_bytes or 0
+    return session
+
+
+def apply_session(data: Dict, session: Dict) -> None:
+    """
+    Fold an ended session into the aggregated tracker state.
+
+    Args:
+        data: Tracker state as returned by SessionJournal.load
+        session: Session record with language, start_time, end_time, duration
+            and optionally project
+    """
+    data["sessions"].append(session)
+    apply_totals(data, session)
+
+
+def apply_totals(data: Dict, session: Dict, sessions: int = 1) -> None:
+    """
+    Add a session to the all-time totals and rollups without keeping it.
+
+    Args:
+        data: Tracker state as returned by SessionJournal.load
+        session: Session record to account for
+        sessions: Number of sessions the record stands for
+    """
+    edited = session.get("edited_lines")
+    add_totals(data["languages"], session["language"], session["duration"], sessions, edited)
+    if session.get("project"):
+        add_totals(data["projects"], session["project"], session["duration"], sessions, edited)
+    apply_rollup(data["rollups"], session, sessions)
+
+
+class SessionJournal:
+    """
+    Snapshot plus append-only journal of ended sessions.
+
+    Every journal record carries a sequence number and the snapshot stores the
+    last sequence number it contains, so replay after a crash between writing
+    the snapshot and truncating the journal never applies a session twice.
+    Records are flushed to the OS on every append and fsynced in batches.
+
+    Attributes:
+        snapshot_path (Path): Compacted state file
+        journal_path (Path): Append-only journal file
+        seq (int): Sequence number of the last record written
+        pending_records (int): Journal records not yet compacted
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        journal_path: Optional[Path] = None,
+        fsync_batch: int = 8,
+        fsync_interval: float = 5.0,
+        compact_threshold: int = 256,
+    ) -> None:
+        """
+        Initialize the journal.
+
+        Args:
+            snapshot_path: Path of the compacted snapshot
+            journal_path: Path of the journal, defaults to ``<snapshot>.journal``
+            fsync_batch: Number of appends after which the journal is fsynced
+            fsync_interval: Seconds after which pending appends are fsynced
+            compact_threshold: Journal length at which compaction is due
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path.with_name(snapshot_path.name + ".journal")
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self.seq = 0
+        self.pending_records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self, repair: bool = True) -> Dict:
+        """
+        Rebuild tracker state from the snapshot and the journal tail.
+
+        A torn record at the end of the journal (the process died mid-write)
+        is discarded and truncated away so later appends start on a clean line.
+
+        Args:
+            repair: Truncate a torn record; readers that must not write pass
+                False and only skip it
+
+        Returns:
+            Tracker state dictionary
+        """
+        data = empty_data()
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path) as f:
+                data.update(json.load(f))
+        self.seq = data.pop("journal_seq", 0)
+        snapshot_seq = self.seq
+        self.pending_records = 0
+
+        if not self.journal_path.exists():
+            return data
+
+        good_offset = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A live tracker may be mid-append, so only a repairing load complains
+                    if repair:
+                        logger.warning(f"Discarding torn journal record in {self.journal_path}")
+                    break
+                good_offset += len(line)
+                if record["seq"] <= snapshot_seq:
+                    continue
+                apply_session(data, record["session"])
+                self.seq = record["seq"]
+                self.pending_records += 1
+
+        if repair and good_offset != self.journal_path.stat().st_size:
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_offset)
+
+        return data
+
+    def append(self, session: Dict) -> None:
+        """
+        Append an ended session to the journal.
+
+        Args:
+            session: Session record to persist
+        """
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, "a")
+            self.seq += 1
+            self._file.write(json.dumps({"seq": self.seq, "session": session}, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self.pending_records += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def needs_compaction(self) -> bool:
+        """Return True when the journal has grown past the compaction threshold."""
+        return self.pending_records >= self.compact_threshold
+
+    def compact(self, data: Dict) -> None:
+        """
+        Atomically write a snapshot of ``data`` and truncate the journal.
+
+        Args:
+            data: Current tracker state, including every journaled session
+        """
+        with self._lock:
+            self._sync()
+            tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(dict(data, journal_seq=self.seq), f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.journal_path, "w") as f:
+                os.fsync(f.fileno())
+            self.pending_records = 0
+            logger.info(f"Compacted session journal into {self.snapshot_path}")
+
+    def close(self) -> None:
+        """Fsync and close the journal file."""
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _sync(self) -> None:
+        """Fsync pending appends. Caller must hold the lock."""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
@@ -0,0 +1,424 @@
+"""
+Internal metrics for CodeChrono.
+
+This module provides counters, gauges and histograms in a process-wide
+registry, which the watcher, the trackers and the storage layer update as
+they work. The registry renders to the Prometheus text format for the web
+dashboard's ``/metrics`` endpoint, and a tracking process periodically writes
+a JSON snapshot that ``codechrono metrics`` reads from another process.
+"""
+
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = Path.home() / ".codechrono"
+
+# Latency buckets in seconds, from 10 microseconds to 5 seconds
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Counter:
+    """
+    Monotonically increasing count.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        """
+        Initialize the counter at zero.
+
+        Args:
+            name: Metric name
+            help: One-line description
+        """
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """Add ``amount`` to the counter."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        """Current count."""
+        return self._value
+
+    def snapshot(self) -> int:
+        """Return the value for a JSON snapshot."""
+        return self._value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Return the Prometheus samples as (name with labels, value)."""
+        return [(self.name, self._value)]
+
+
+class Gauge:
+    """
+    Value that goes up and down, either set explicitly or read from a callback.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str) -> None:
+        """
+        Initialize the gauge at zero.
+
+        Args:
+            name: Metric name
+            help: One-line description
+        """
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self._value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """
+        Read the gauge from a callback at collection time.
+
+        Args:
+            function: Callable returning the current value, None to go back
+                to the explicitly set value
+        """
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        """Current value."""
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception:
+                logger.exception(f"Failed to read gauge {self.name}")
+        return self._value
+
+    def snapshot(self) -> float:
+        """Return the value for a JSON snapshot."""
+        return self.value
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Return the Prometheus samples as (name with labels, value)."""
+        return [(self.name, self.value)]
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Attributes:
+        name (str): Metric name
+        help (str): One-line description
+        buckets (Tuple[float, ...]): Upper bounds of the buckets
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """
+        Initialize an empty histogram.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            buckets: Increasing upper bounds; values above the last one only
+                count towards the +Inf bucket
+        """
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        """Return a context manager observing the seconds spent inside it."""
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        """Number of observed values."""
+        return sum(self._counts)
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            fraction: Quantile between 0 and 1
+
+        Returns:
+            Bucket upper bound (inf for the overflow bucket), or None if empty
+        """
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = fraction * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        """Return count, sum and estimated quantiles for a JSON snapshot."""
+        with self._lock:
+            count, total = sum(self._counts), self._sum
+        return {
+            "count": count,
+            "sum": total,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+    def samples(self) -> List[Tuple[str, float]]:
+        """Return the Prometheus samples as (name with labels, value)."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            label = "+Inf" if bound == float("inf") else repr(bound)
+            samples.append((f'{self.name}_bucket{{le="{label}"}}', cumulative))
+        samples.append((f"{self.name}_sum", total))
+        samples.append((f"{self.name}_count", cumulative))
+        return samples
+
+
+class _Timer:
+    """Context manager feeding elapsed time into a histogram."""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """
+    Named collection of metrics.
+
+    Registering a name twice returns the existing metric, so modules can
+    declare the metrics they update without coordinating.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, *args):
+        """Return the metric called ``name``, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, *args)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Return the counter called ``name``, creating it if needed."""
+        return self._register(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        """Return the gauge called ``name``, creating it if needed."""
+        return self._register(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Return the histogram called ``name``, creating it if needed."""
+        return self._register(Histogram, name, help, buckets)
+
+    def snapshot(self) -> Dict:
+        """
+        Collect every metric.
+
+        Returns:
+            Mapping of metric name to its value (histograms to a summary dict)
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text, one sample per line
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: Path) -> None:
+        """
+        Atomically write a JSON snapshot for other processes to read.
+
+        Args:
+            path: Snapshot file
+        """
+        document = {"pid": os.getpid(), "written_at": time.time(), "metrics": self.snapshot()}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(document, indent=2))
+        os.replace(tmp_path, path)
+
+
+def metrics_file(tracker: str, directory: Path = METRICS_DIR) -> Path:
+    """
+    Return the snapshot file of a tracker, so concurrent trackers keep separate snapshots.
+
+    Args:
+        tracker: Tracker name, "start" or "watch"
+        directory: Directory holding the snapshots
+
+    Returns:
+        Path of the tracker's snapshot file
+    """
+    return directory / f"metrics-{tracker}.json"
+
+
+def snapshot_files(directory: Path = METRICS_DIR) -> List[Path]:
+    """
+    List the snapshot files written by trackers.
+
+    Args:
+        directory: Directory holding the snapshots
+
+    Returns:
+        Snapshot files, sorted by name
+    """
+    return sorted(directory.glob("metrics-*.json"))
+
+
+class SnapshotWriter:
+    """
+    Daemon thread writing registry snapshots at a fixed interval.
+
+    Attributes:
+        registry (MetricsRegistry): Registry to snapshot
+        path (Path): Snapshot file
+        interval (float): Seconds between snapshots
+    """
+
+    def __init__(self, registry: "MetricsRegistry", path: Path, interval: float = 10.0) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            registry: Registry to snapshot
+            path: Snapshot file
+            interval: Seconds between snapshots
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="codechrono-metrics", daemon=True)
+
+    def start(self) -> "SnapshotWriter":
+        """Write a first snapshot and start writing one every interval."""
+        self._write()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._write()
+
+    def _run(self) -> None:
+        """Write a snapshot every interval until stopped."""
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self) -> None:
+        """Write one snapshot, logging failures."""
+        try:
+            self.registry.write_snapshot(self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics to {self.path}: {e}")
+
+
+def read_snapshot(path: Path) -> Optional[Dict]:
+    """
+    Read a snapshot written by a tracking process.
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        The snapshot document, or None if there is none
+    """
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+REGISTRY = MetricsRegistry()
+
+EVENTS_RECEIVED = REGISTRY.counter("codechrono_events_received_total", "File system events received")
+EVENTS_IGNORED = REGISTRY.counter("codechrono_events_ignored_total", "Events dropped by ignore rules")
+EVENTS_COALESCED = REGISTRY.counter(
+    "codechrono_events_coalesced_total", "Events merged into a pending event for the same path"
+)
+EVENTS_TRACKED = REGISTRY.counter("codechrono_events_tracked_total", "Events recorded by a tracker")
+HANDLER_LATENCY = REGISTRY.histogram(
+    "codechrono_handler_latency_seconds", "Time spent handling one file system event"
+)
+PERSIST_LATENCY = REGISTRY.histogram(
+    "codechrono_persist_latency_seconds", "Time spent persisting one event or session"
+)
+QUEUE_DEPTH = REGISTRY.gauge("codechrono_queue_depth", "Events waiting for the worker thread")
+ACTIVE_SESSIONS = REGISTRY.gauge("codechrono_active_sessions", "Coding sessions currently open")
@@ -0,0 +1,538 @@
+"""
+Watch planning for CodeChrono.
+
+A recursive watchdog watch on Linux adds an inotify watch for every directory
+below the root, including ignored ones such as node_modules, and every
+scheduled watch costs an inotify instance, of which there are far fewer.
+This module walks the watched trees once and keeps each one under a single
+recursive watch unless an ignored subtree is large enough to be worth extra
+watches: then the directories above it get non-recursive watches and their
+other subdirectories recursive ones. Subtrees that do not fit the inotify
+budget are polled by a single thread whose interval adapts to activity and
+scan cost.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import logging
+import os
+import threading
+import time
+
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers.api import BaseObserver, ObservedWatch
+
+from ..utils.ignore import IgnoreMatcher
+
+logger = logging.getLogger(__name__)
+
+INOTIFY_LIMIT_FILES = (
+    "/proc/sys/fs/inotify/max_user_watches",
+    "/proc/sys/fs/inotify/max_user_instances",
+)
+
+
+# Ignored directories an extra watch has to keep out of the inotify watch
+# table when the budgets do not say what a watch is worth
+DEFAULT_MIN_PRUNED = 256
+
+# Directories counted per ignored subtree when weighing a split
+PRUNED_COUNT_LIMIT = 10000
+
+
+class WatchSpec(NamedTuple):
+    """One planned watch: a directory, whether it is recursive and how many directories it covers."""
+
+    path: str
+    recursive: bool
+    directories: int
+
+
+def inotify_limits() -> Optional[Tuple[int, int]]:
+    """
+    Read the per-user inotify limits.
+
+    Returns:
+        (max_user_watches, max_user_instances), or None where inotify is not used
+    """
+    try:
+        return tuple(int(Path(name).read_text()) for name in INOTIFY_LIMIT_FILES)
+    except (OSError, ValueError):
+        return None
+
+
+def _count_dirs(path: str, limit: int) -> int:
+    """Count the directories of a tree, stopping at ``limit``."""
+    count = 0
+    pending = [path]
+    while pending and count < limit:
+        count += 1
+        try:
+            with os.scandir(pending.pop()) as entries:
+                pending.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+    return count
+
+
+def _scan_tree(root: str, is_ignored_dir: Callable[[str], bool]) -> Tuple[str, int, int, list]:
+    """
+    Scan a tree into (path, kept directories, pruned directories, children) nodes.
+
+    Pruned directories are those in ignored subtrees, which a recursive
+    watch would cover too; they are counted up to PRUNED_COUNT_LIMIT per
+    ignored subtree.
+    """
+    kept = 1
+    pruned = 0
+    children = []
+    try:
+        with os.scandir(root) as entries:
+            subdirs = sorted(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+    except OSError:
+        subdirs = []
+    for subdir in subdirs:
+        if is_ignored_dir(subdir):
+            pruned += _count_dirs(subdir, PRUNED_COUNT_LIMIT)
+            continue
+        child = _scan_tree(subdir, is_ignored_dir)
+        kept += child[1]
+        pruned += child[2]
+        children.append(child)
+    return root, kept, pruned, children
+
+
+def _plan_node(node: Tuple[str, int, int, list], min_pruned: int) -> List[WatchSpec]:
+    """Choose between one recursive watch and a split for a scanned node."""
+    path, kept, pruned, children = node
+    recursive = [WatchSpec(path, True, kept + pruned)]
+    if not pruned:
+        return recursive
+    split = [WatchSpec(path, False, 1)]
+    for child in children:
+        split.extend(_plan_node(child, min_pruned))
+    saved = kept + pruned - sum(spec.directories for spec in split)
+    if saved > 0 and saved >= min_pruned * (len(split) - 1):
+        return split
+    return recursive
+
+
+def plan_tree(
+    root: str,
+    is_ignored_dir: Callable[[str], bool],
+    min_pruned: int = DEFAULT_MIN_PRUNED,
+    max_watches: Optional[int] = None,
+) -> List[WatchSpec]:
+    """
+    Plan the watches covering the non-ignored directories below ``root``.
+
+    By default the whole tree gets one recursive watch, ignored directories
+    included; the handler filters their events. A directory is only split
+    into a non-recursive watch plus watches for its kept subdirectories when
+    every extra watch keeps at least ``min_pruned`` ignored directories (a
+    large node_modules, say) out of the inotify watch table. If the plan
+    needs more than ``max_watches`` watches, splits are made more selective
+    until it fits or the tree is down to a single watch.
+
+    Args:
+        root: Directory to cover
+        is_ignored_dir: Predicate telling whether a directory is excluded
+        min_pruned: Ignored directories an extra watch has to save
+        max_watches: Maximum number of watches, None for no limit
+
+    Returns:
+        Watch specs, shallowest first
+    """
+    tree = _scan_tree(os.path.abspath(root), is_ignored_dir)
+    min_pruned = max(1, min_pruned)
+    while True:
+        specs = _plan_node(tree, min_pruned)
+        if max_watches is None or len(specs) <= max(1, max_watches):
+            return sorted(specs, key=lambda spec: spec.path.count(os.sep))
+        min_pruned *= 4
+
+
+class AdaptivePoller:
+    """
+    Polls directory trees on one thread and dispatches the changes it finds.
+
+    The interval drops to ``min_interval`` after a scan that found changes,
+    grows by ``backoff`` after each quiet scan up to ``max_interval``, and
+    never goes below the last scan time divided by ``cpu_fraction``, so a
+    huge tree cannot keep the thread busy.
+
+    Attributes:
+        interval (float): Current seconds between scans
+        last_scan (float): Duration of the last scan in seconds
+    """
+
+    def __init__(
+        self,
+        handler: FileSystemEventHandler,
+        is_ignored_dir: Callable[[str], bool],
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        cpu_fraction: float = 0.1,
+    ) -> None:
+        """
+        Initialize the poller.
+
+        Args:
+            handler: Handler receiving watchdog events
+            is_ignored_dir: Predicate pruning directories from scans
+            min_interval: Shortest time between scans
+            max_interval: Longest time between scans
+            backoff: Interval growth factor after a scan without changes
+            cpu_fraction: Largest share of time spent scanning
+        """
+        self.handler = handler
+        self.is_ignored_dir = is_ignored_dir
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.cpu_fraction = cpu_fraction
+        self.interval = min_interval
+        self.last_scan = 0.0
+        self._snapshots: Dict[str, Dict[str, Tuple[bool, int, int]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, root: str) -> None:
+        """
+        Start polling a directory tree.
+
+        Args:
+            root: Directory to poll
+        """
+        snapshot = self._scan(root)
+        with self._lock:
+            self._snapshots[root] = snapshot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="codechrono-poller", daemon=True)
+                self._thread.start()
+
+    def roots(self) -> List[str]:
+        """Return the polled directories."""
+        with self._lock:
+            return list(self._snapshots)
+
+    def entries(self) -> int:
+        """Return the number of files and directories tracked by the poller."""
+        with self._lock:
+            return sum(len(snapshot) for snapshot in self._snapshots.values())
+
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def poll(self) -> int:
+        """
+        Scan every polled tree once and dispatch the differences.
+
+        Returns:
+            Number of changes found
+        """
+        started = time.monotonic()
+        changes = 0
+        for root in self.roots():
+            snapshot = self._scan(root)
+            with self._lock:
+                previous = self._snapshots.get(root)
+                if previous is None:
+                    continue
+                self._snapshots[root] = snapshot
+            changes += self._dispatch_changes(previous, snapshot)
+        self.last_scan = time.monotonic() - started
+        if changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        self.interval = max(self.interval, self.last_scan / self.cpu_fraction)
+        return changes
+
+    def _run(self) -> None:
+        """Poll until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Polling failed")
+
+    def _scan(self, root: str) -> Dict[str, Tuple[bool, int, int]]:
+        """Map every entry below ``root`` to (is_dir, mtime_ns, size), pruning ignored directories."""
+        snapshot: Dict[str, Tuple[bool, int, int]] = {}
+        pending = [root]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            if is_dir and self.is_ignored_dir(entry.path):
+                                continue
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        snapshot[entry.path] = (is_dir, stat.st_mtime_ns, stat.st_size)
+                        if is_dir:
+                            pending.append(entry.path)
+            except OSError:
+                continue
+        return snapshot
+
+    def _dispatch_changes(self, previous: Dict, current: Dict) -> int:
+        """Dispatch created, deleted and modified events between two snapshots."""
+        changes = 0
+        for path, (is_dir, mtime, size) in current.items():
+            old = previous.get(path)
+            if old is None:
+                self.handler.dispatch(DirCreatedEvent(path) if is_dir else FileCreatedEvent(path))
+            elif not is_dir and (old[1] != mtime or old[2] != size):
+                self.handler.dispatch(FileModifiedEvent(path))
+            else:
+                continue
+            changes += 1
+        for path, (is_dir, _, _) in previous.items():
+            if path not in current:
+                self.handler.dispatch(DirDeletedEvent(path) if is_dir else FileDeletedEvent(path))
+                changes += 1
+        return changes
+
+
+class WatchPlanner:
+    """
+    Schedules watches for a handler within the inotify budget.
+
+    Where inotify is not in use (and no budget is given) every root simply
+    gets one recursive watch, which is cheap on those platforms. Otherwise an
+    extra watch is worth ``min_pruned`` directory watches: trees are only
+    split around ignored subtrees that large, and small ignored directories
+    such as __pycache__ stay inside recursive watches, whose handler filters
+    their events.
+
+    Attributes:
+        observer (BaseObserver): Observer the watches are scheduled on
+        handler (FileSystemEventHandler): Handler receiving the events
+        ignore_matcher (IgnoreMatcher): Decides which subtrees are pruned
+        watch_budget (Optional[int]): Directories that may be watched natively
+        emitter_budget (Optional[int]): Watches (inotify instances) that may be scheduled
+        min_pruned (int): Ignored directories an extra watch has to save
+        poller (AdaptivePoller): Poller for subtrees beyond the budget
+    """
+
+    def __init__(
+        self,
+        observer: BaseObserver,
+        handler: FileSystemEventHandler,
+        ignore_matcher: IgnoreMatcher,
+        watch_budget: Optional[int] = None,
+        emitter_budget: Optional[int] = None,
+        poll_min_interval: float = 1.0,
+        poll_max_interval: float = 30.0,
+        min_pruned: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the planner.
+
+        Args:
+            observer: Observer to schedule watches on
+            handler: Handler receiving the events
+            ignore_matcher: Matcher deciding which subtrees are pruned
+            watch_budget: Directories that may be watched natively, defaults
+                to half of fs.inotify.max_user_watches
+            emitter_budget: Watches that may be scheduled, defaults to a
+                quarter of fs.inotify.max_user_instances, which editors and
+                other watchers share
+            poll_min_interval: Shortest polling interval in seconds
+            poll_max_interval: Longest polling interval in seconds
+            min_pruned: Ignored directories an extra watch has to save,
+                defaults to the watch budget per watch
+        """
+        self.observer = observer
+        self.handler = handler
+        self.ignore_matcher = ignore_matcher
+        limits = inotify_limits()
+        if limits is not None:
+            watch_budget = watch_budget if watch_budget is not None else limits[0] // 2
+            emitter_budget = emitter_budget if emitter_budget is not None else max(1, limits[1] // 4)
+        self.watch_budget = watch_budget
+        self.emitter_budget = emitter_budget
+        if min_pruned is None:
+            min_pruned = watch_budget // emitter_budget if watch_budget and emitter_budget else DEFAULT_MIN_PRUNED
+        self.min_pruned = max(1, min_pruned)
+        self.poller = AdaptivePoller(handler, ignore_matcher.is_ignored_dir, poll_min_interval, poll_max_interval)
+        self._watches: Dict[str, Tuple[ObservedWatch, WatchSpec]] = {}
+        self._polled: Set[str] = set()
+        # Directories created so far in each ignored subtree under a recursive watch
+        self._pruned_growth: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def limited(self) -> bool:
+        """Whether watches are planned against a budget."""
+        return self.watch_budget is not None or self.emitter_budget is not None
+
+    def schedule(self, roots: Iterable[str]) -> None:
+        """
+        Plan and schedule the watches for some root directories.
+
+        Args:
+            roots: Directories to watch
+        """
+        with self._lock:
+            for root in roots:
+                root = os.path.abspath(root)
+                if not self.limited:
+                    self._watch(WatchSpec(root, True, 0))
+                else:
+                    self._place_tree(root)
+        report = self.report()
+        logger.info(
+            f"Watching {report['watched_directories']} directories with {report['native_watches']} watches"
+            + (f" ({report['budget_used']:.1%} of budget)" if report["budget_used"] is not None else "")
+            + (f", polling {report['polled_subtrees']} subtrees" if report["polled_subtrees"] else "")
+        )
+
+    def directory_created(self, path: str) -> None:
+        """
+        Extend the plan to a directory created under a watched root.
+
+        A new directory below a non-recursive watch gets watches of its own.
+        Directories created in an ignored subtree below a recursive watch are
+        counted, and once the subtree (say, a node_modules being installed)
+        has grown by ``min_pruned`` directories the recursive watch is planned
+        again, so its contents stop consuming watches if that pays off.
+
+        Args:
+            path: The new directory
+        """
+        if not self.limited:
+            return
+        path = os.path.abspath(path)
+        with self._lock:
+            ancestor = self._recursive_ancestor(os.path.dirname(path))
+            if ancestor is not None:
+                ignored = self._ignored_root(path, ancestor)
+                if ignored is not None:
+                    grown = self._pruned_growth.get(ignored, 0) + 1
+                    self._pruned_growth[ignored] = grown
+                    # Check again each time the subtree has doubled, so a
+                    # tree it never pays to split is only rescanned a few times
+                    if grown >= self.min_pruned and grown & (grown - 1) == 0:
+                        logger.info(f"Ignored directory {ignored} grew; re-planning {ancestor}")
+                        self._unwatch(ancestor)
+                        self._place_tree(ancestor)
+                return
+            if self.ignore_matcher.is_ignored_dir(path) or self._is_polled(path):
+                return
+            if os.path.dirname(path) in self._watches and path not in self._watches:
+                self._place_tree(path)
+
+    def report(self) -> Dict:
+        """
+        Describe the current plan and its budget use.
+
+        Returns:
+            Dictionary with watch, budget and polling figures
+        """
+        with self._lock:
+            directories = sum(spec.directories for _, spec in self._watches.values())
+            emitters = len(self._watches)
+            used = [
+                used / budget
+                for used, budget in ((directories, self.watch_budget), (emitters, self.emitter_budget))
+                if budget
+            ]
+            return {
+                "native_watches": emitters,
+                "watched_directories": directories,
+                "watch_budget": self.watch_budget,
+                "emitter_budget": self.emitter_budget,
+                "budget_used": max(used) if used else None,
+                "polled_subtrees": len(self._polled),
+                "polled_entries": self.poller.entries(),
+                "poll_interval": self.poller.interval,
+            }
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self.poller.stop()
+
+    def _place_tree(self, root: str) -> None:
+        """Watch natively what fits the budget and poll the rest."""
+        self._release_missing()
+        max_watches = None
+        if self.emitter_budget is not None:
+            max_watches = self.emitter_budget - len(self._watches)
+        for spec in plan_tree(root, self.ignore_matcher.is_ignored_dir, self.min_pruned, max_watches):
+            if self._is_polled(spec.path):
+                continue
+            if self._fits(spec):
+                self._watch(spec)
+            else:
+                logger.warning(f"Watch budget exhausted; polling {spec.path}")
+                self._polled.add(spec.path)
+                self.poller.add(spec.path)
+
+    def _fits(self, spec: WatchSpec) -> bool:
+        """Check whether a spec fits the remaining budget."""
+        if self.emitter_budget is not None and len(self._watches) + 1 > self.emitter_budget:
+            return False
+        if self.watch_budget is not None:
+            used = sum(s.directories for _, s in self._watches.values())
+            if used + spec.directories > self.watch_budget:
+                return False
+        return True
+
+    def _watch(self, spec: WatchSpec) -> None:
+        """Schedule a native watch."""
+        watch = self.observer.schedule(self.handler, spec.path, recursive=spec.recursive)
+        self._watches[spec.path] = (watch, spec)
+
+    def _unwatch(self, path: str) -> None:
+        """Remove a native watch."""
+        watch, _ = self._watches.pop(path)
+        try:
+            self.observer.unschedule(watch)
+        except KeyError:
+            pass
+
+    def _release_missing(self) -> None:
+        """Give back the budget of watches whose directory was deleted."""
+        for path in [path for path in self._watches if not os.path.isdir(path)]:
+            self._unwatch(path)
+
+    def _recursive_ancestor(self, path: str) -> Optional[str]:
+        """Return the root of the recursive watch covering ``path``, if any."""
+        while True:
+            entry = self._watches.get(path)
+            if entry is not None and entry[1].recursive:
+                return path
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+    def _ignored_root(self, path: str, ancestor: str) -> Optional[str]:
+        """Return the outermost ignored directory between ``ancestor`` and ``path``, if any."""
+        ignored = None
+        while path != ancestor and path.startswith(ancestor + os.sep):
+            if self.ignore_matcher.is_ignored_dir(path):
+                ignored = path
+            path = os.path.dirname(path)
+        return ignored
+
+    def _is_polled(self, path: str) -> bool:
+        """Check whether ``path`` lies in a polled subtree."""
+        return any(path == root or path.startswith(root + os.sep) for root in self._polled)
@@ -0,0 +1,140 @@
+"""
+Opt-in sampling profiler for CodeChrono's long-running processes.
+
+The tracking processes spend their time on the observer, worker and poller
+threads while the main thread sleeps, which a cProfile session started from
+a signal handler (it only profiles the thread it runs on) would miss. This
+profiler instead samples the stacks of every thread from a background thread
+and writes them as collapsed stacks, the input format of flamegraph.pl and
+speedscope. Sending SIGUSR1 starts a profile; sending it again writes it.
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = Path.home() / ".codechrono" / "profiles"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of all threads at a fixed interval.
+
+    Attributes:
+        interval (float): Seconds between samples
+        samples (Counter): Collapsed stack string to number of samples
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether samples are being taken."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if self.running:
+            return
+        self.samples.clear()
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="codechrono-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if not self.running:
+            return
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def dump(self, path: Path) -> int:
+        """
+        Write the samples as collapsed stacks ("frame;frame;frame count").
+
+        Args:
+            path: Output file
+
+        Returns:
+            Number of samples written
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(self.samples.values())
+
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+def install_profile_toggle(directory: Path = DEFAULT_PROFILE_DIR, interval: float = 0.005) -> Optional[SamplingProfiler]:
+    """
+    Toggle a SamplingProfiler with SIGUSR1.
+
+    The first signal starts sampling, the next one writes
+    ``profile-<pid>-<time>.folded`` to ``directory`` and stops. Must be
+    called from the main thread.
+
+    Args:
+        directory: Where profiles are written
+        interval: Seconds between samples
+
+    Returns:
+        The profiler, or None where SIGUSR1 does not exist
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        logger.warning("Profiling toggle needs SIGUSR1, which this platform lacks")
+        return None
+    profiler = SamplingProfiler(interval)
+
+    def toggle(signum, frame):
+        if not profiler.running:
+            profiler.start()
+            logger.warning(f"Profiling started; send SIGUSR1 to {os.getpid()} again to write it")
+            return
+        profiler.stop()
+        path = directory / f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        try:
+            count = profiler.dump(path)
+            logger.warning(f"Wrote {count} profile samples to {path}")
+        except OSError as e:
+            logger.error(f"Failed to write profile to {path}: {e}")
+
+    signal.signal(signal.SIGUSR1, toggle)
+    return profiler
@@ -0,0 +1,453 @@
+"""
+Retention and downsampling for CodeChrono.
+
+Raw history grows without bound: every ended session is a database row and
+every file event a line in the event log. A RetentionPolicy keeps raw data
+for ``raw_days``, then downsamples it to hourly aggregates, which become
+daily aggregates after ``hourly_days``. Sessions are downsampled inside the
+session store (see SessionStore.downsample); event log segments are folded
+into an EventTiers database of per-file, per-language event counts, plus
+per-hour totals across all files that keep the activity heatmap complete.
+Queries read the tiers next to the raw data, counting an aggregate as
+occurring at the start of its hour or day.
+
+A RetentionWorker applies the policy from a background thread in small
+batches, so tracking is never held up for long, and reports the space
+reclaimed by each pass.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+import sqlite3
+import threading
+
+from .eventlog import EventLog
+from .metrics import REGISTRY
+from .rollups import DAILY, HOURLY, bucket_start
+
+logger = logging.getLogger(__name__)
+
+TIERS_FILE = "tiers.db"
+
+# Every UTC offset in use is a multiple of 15 minutes, so a quarter hour
+# never straddles two local hours
+QUARTER_HOUR = 900
+
+RECORDS_DOWNSAMPLED = REGISTRY.counter(
+    "codechrono_retention_downsampled_total", "Sessions and events moved into aggregate tiers"
+)
+BYTES_RECLAIMED = REGISTRY.counter("codechrono_retention_reclaimed_bytes_total", "Storage reclaimed by retention")
+
+TIERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    language TEXT NOT NULL,
+    UNIQUE (path, language)
+);
+CREATE TABLE IF NOT EXISTS file_buckets (
+    start_ts REAL NOT NULL,
+    span INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    PRIMARY KEY (start_ts, span, file_id)
+);
+CREATE TABLE IF NOT EXISTS hour_totals (
+    start_ts REAL PRIMARY KEY,
+    events INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS folded_segments (
+    name TEXT PRIMARY KEY,
+    events INTEGER NOT NULL
+);
+"""
+
+FILE_BUCKET_UPSERT = """
+INSERT INTO file_buckets (start_ts, span, file_id, events) VALUES (?, ?, ?, ?)
+ON CONFLICT (start_ts, span, file_id) DO UPDATE SET events = events + excluded.events
+"""
+
+
+class RetentionPolicy(NamedTuple):
+    """
+    How long each tier of history is kept.
+
+    Attributes:
+        raw_days: Sessions and events older than this are downsampled
+        hourly_days: Hourly aggregates older than this become daily ones
+        interval: Seconds between background passes
+        batch_size: Rows moved per transaction
+        max_segments: Event log segments folded per pass
+    """
+
+    raw_days: float = 90.0
+    hourly_days: float = 365.0
+    interval: float = 3600.0
+    batch_size: int = 5000
+    max_segments: int = 8
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional["RetentionPolicy"]:
+        """
+        Build a policy from a "retention" configuration section.
+
+        Args:
+            config: Mapping of policy fields, or None
+
+        Returns:
+            The policy, or None if retention is not configured
+
+        Raises:
+            ValueError: If the section has unknown keys or inconsistent values
+        """
+        if not config:
+            return None
+        unknown = set(config) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown retention settings: {', '.join(sorted(unknown))}")
+        policy = cls(**config)
+        if policy.raw_days <= 0 or policy.hourly_days < policy.raw_days:
+            raise ValueError("Retention needs 0 < raw_days <= hourly_days")
+        return policy
+
+    def horizons(self, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """
+        Return the times before which data is downsampled.
+
+        Args:
+            now: Current time, defaults to now
+
+        Returns:
+            (raw data horizon, hourly aggregate horizon)
+        """
+        now = now or datetime.now()
+        return now - timedelta(days=self.raw_days), now - timedelta(days=self.hourly_days)
+
+
+def _range_clause(start: Optional[float], end: Optional[float]) -> Tuple[str, List[float]]:
+    """Build a WHERE clause selecting buckets that start in [start, end)."""
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append("start_ts >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("start_ts < ?")
+        params.append(end)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+class EventTiers:
+    """
+    SQLite store of downsampled file events.
+
+    Attributes:
+        db_path (Path): Location of the database file
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Open (and create if needed) the tiers database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(TIERS_SCHEMA)
+
+    def folded(self, name: str) -> bool:
+        """Return True if the segment of that file name was already folded in."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM folded_segments WHERE name = ?", (name,)).fetchone() is not None
+
+    def fold_segment(self, name: str, events: Iterable[Tuple[float, str, str, str]], hourly_before: float) -> int:
+        """
+        Add the events of one segment to the tiers in a single transaction.
+
+        Events before ``hourly_before`` go straight to the daily tier. The
+        segment is recorded as folded, so a segment whose removal failed is
+        not counted twice.
+
+        Args:
+            name: File name of the segment
+            events: Its events, as (timestamp, path, event_type, language)
+            hourly_before: Epoch time before which events are kept per day
+
+        Returns:
+            Number of events folded
+        """
+        counts: Dict[Tuple[float, str, str], int] = {}
+        hour_starts: Dict[int, float] = {}
+        count = 0
+        for timestamp, path, _, language in events:
+            quarter = int(timestamp // QUARTER_HOUR)
+            hour = hour_starts.get(quarter)
+            if hour is None:
+                hour = hour_starts[quarter] = bucket_start(timestamp, HOURLY)
+            key = (hour, path, language)
+            counts[key] = counts.get(key, 0) + 1
+            count += 1
+
+        hours: Dict[float, int] = {}
+        buckets: Dict[Tuple[float, int, str, str], int] = {}
+        for (hour, path, language), events_in_hour in counts.items():
+            hours[hour] = hours.get(hour, 0) + events_in_hour
+            key = (bucket_start(hour, DAILY), DAILY) if hour < hourly_before else (hour, HOURLY)
+            buckets[key + (path, language)] = buckets.get(key + (path, language), 0) + events_in_hour
+
+        with self._lock, self._conn:
+            file_ids = self._file_ids({(path, language) for _, _, path, language in buckets})
+            self._conn.executemany(FILE_BUCKET_UPSERT, [
+                (start, span, file_ids[path, language], events_in_bucket)
+                for (start, span, path, language), events_in_bucket in buckets.items()
+            ])
+            self._conn.executemany(
+                "INSERT INTO hour_totals (start_ts, events) VALUES (?, ?) "
+                "ON CONFLICT (start_ts) DO UPDATE SET events = events + excluded.events",
+                list(hours.items()),
+            )
+            self._conn.execute("INSERT INTO folded_segments (name, events) VALUES (?, ?)", (name, count))
+        return count
+
+    def downsample(self, hourly_before: float, limit: int = 5000) -> int:
+        """
+        Merge one batch of hourly buckets older than ``hourly_before`` into daily ones.
+
+        Args:
+            hourly_before: Epoch time before which hours merge into days
+            limit: Maximum number of hourly buckets merged
+
+        Returns:
+            Number of hourly buckets merged
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT rowid, start_ts, file_id, events FROM file_buckets "
+                "WHERE span = ? AND start_ts < ? ORDER BY start_ts LIMIT ?",
+                (HOURLY, hourly_before, limit),
+            ).fetchall()
+            days: Dict[Tuple[float, int], int] = {}
+            for _, start, file_id, events in rows:
+                key = (bucket_start(start, DAILY), file_id)
+                days[key] = days.get(key, 0) + events
+            self._conn.executemany("DELETE FROM file_buckets WHERE rowid = ?", [(row[0],) for row in rows])
+            self._conn.executemany(
+                FILE_BUCKET_UPSERT, [(day, DAILY, file_id, events) for (day, file_id), events in days.items()]
+            )
+        return len(rows)
+
+    def file_counts(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[Tuple[str, str], int]:
+        """
+        Count downsampled events per (path, language) for buckets starting in [start, end).
+
+        Args:
+            start: Inclusive lower bound in epoch seconds, or None
+            end: Exclusive upper bound in epoch seconds, or None
+
+        Returns:
+            Mapping of (path, language) to event count
+        """
+        where, params = _range_clause(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT files.path, files.language, SUM(buckets.events) FROM "
+                f"(SELECT file_id, events FROM file_buckets {where}) AS buckets "
+                "JOIN files ON files.id = buckets.file_id GROUP BY buckets.file_id",
+                params,
+            ).fetchall()
+        return {(path, language): count for path, language, count in rows}
+
+    def hour_counts(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[float, int]:
+        """
+        Count downsampled events per local hour in [start, end), across all files.
+
+        Args:
+            start: Inclusive lower bound in epoch seconds, or None
+            end: Exclusive upper bound in epoch seconds, or None
+
+        Returns:
+            Mapping of hour start (epoch seconds) to event count
+        """
+        where, params = _range_clause(start, end)
+        with self._lock:
+            return dict(self._conn.execute(f"SELECT start_ts, events FROM hour_totals {where}", params).fetchall())
+
+    def used_bytes(self) -> int:
+        """Return the size of the database pages in use (excluding free pages)."""
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return (pages - free) * page_size
+
+    def vacuum(self) -> int:
+        """
+        Rewrite the database to return free pages to the filesystem.
+
+        Returns:
+            Number of bytes the database file shrank by
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            before = self.db_path.stat().st_size
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return before - self.db_path.stat().st_size
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _file_ids(self, files: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Return the ids of (path, language) pairs, adding new ones. Caller holds the lock."""
+        ids = {}
+        for path, language in files:
+            self._conn.execute("INSERT OR IGNORE INTO files (path, language) VALUES (?, ?)", (path, language))
+            ids[path, language] = self._conn.execute(
+                "SELECT id FROM files WHERE path = ? AND language = ?", (path, language)
+            ).fetchone()[0]
+        return ids
+
+
+def apply_event_retention(
+    event_log: EventLog,
+    tiers: EventTiers,
+    raw_before: datetime,
+    hourly_before: datetime,
+    max_segments: int = 8,
+    batch_size: int = 5000,
+) -> Dict:
+    """
+    Fold event log segments older than the raw horizon into the tiers.
+
+    A segment is folded once all of its events are older than ``raw_before``,
+    which is known when the next segment starts before it; the newest
+    segment, still being written, is never touched. Folded segments are
+    deleted.
+
+    Args:
+        event_log: Event log to trim
+        tiers: Tiers receiving the folded events
+        raw_before: Events that occurred earlier are downsampled
+        hourly_before: Hourly buckets that started earlier become daily
+        max_segments: Segments folded by this call
+        batch_size: Hourly buckets merged per transaction
+
+    Returns:
+        Report with the numbers of "segments", "events" and
+        "hourly_buckets" moved, the "bytes_reclaimed" and whether more
+        segments are "pending"
+    """
+    raw_cutoff, hourly_cutoff = raw_before.timestamp(), hourly_before.timestamp()
+    report = {"segments": 0, "events": 0, "hourly_buckets": 0, "pending": False}
+    used = tiers.used_bytes()
+    freed = 0
+    segments = event_log.segments()
+    for (_, path), (next_first, _) in zip(segments, segments[1:]):
+        if next_first > raw_cutoff:
+            break
+        if report["segments"] >= max_segments:
+            report["pending"] = True
+            break
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            continue
+        if not tiers.folded(path.name):
+            report["events"] += tiers.fold_segment(path.name, event_log.read_segment(path), hourly_cutoff)
+        path.unlink(missing_ok=True)
+        freed += size
+        report["segments"] += 1
+    while True:
+        merged = tiers.downsample(hourly_cutoff, batch_size)
+        report["hourly_buckets"] += merged
+        if merged < batch_size:
+            break
+    report["bytes_reclaimed"] = freed - (tiers.used_bytes() - used)
+    if report["segments"]:
+        logger.info(f"Folded {report['events']} events from {report['segments']} event log segments")
+    return report
+
+
+class RetentionWorker:
+    """
+    Daemon thread applying retention passes in the background.
+
+    Each pass is a callable returning a report as above. A pass reporting
+    "pending" work is repeated after a short pause instead of the full
+    interval, so a long backlog is worked off in small steps.
+
+    Attributes:
+        passes (Dict[str, Callable[[], Dict]]): Retention passes by name
+        interval (float): Seconds between rounds of passes
+        last_reports (Dict[str, Dict]): Report of each pass's latest run
+    """
+
+    def __init__(
+        self,
+        passes: Dict[str, Callable[[], Dict]],
+        interval: float = 3600.0,
+        delay: float = 60.0,
+        pause: float = 1.0,
+    ) -> None:
+        """
+        Initialize the worker.
+
+        Args:
+            passes: Retention passes by name
+            interval: Seconds between rounds of passes
+            delay: Seconds before the first round, to stay out of startup
+            pause: Seconds between rounds while work is pending
+        """
+        self.passes = passes
+        self.interval = interval
+        self.delay = delay
+        self.pause = pause
+        self.last_reports: Dict[str, Dict] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="codechrono-retention", daemon=True)
+
+    def start(self) -> "RetentionWorker":
+        """Start applying retention."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after the pass in progress, if any."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def run_once(self) -> bool:
+        """
+        Run every pass once, logging failures.
+
+        Returns:
+            True if a pass has more work pending
+        """
+        pending = False
+        for name, run in self.passes.items():
+            try:
+                report = run()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Retention pass {name} failed: {e}")
+                continue
+            self.last_reports[name] = report
+            RECORDS_DOWNSAMPLED.inc(report.get("sessions", 0) + report.get("events", 0))
+            BYTES_RECLAIMED.inc(max(report.get("bytes_reclaimed", 0), 0))
+            pending = pending or report.get("pending", False)
+        return pending
+
+    def _run(self) -> None:
+        """Run rounds of passes until stopped."""
+        delay = self.delay
+        while not self._stop.wait(delay):
+            delay = self.pause if self.run_once() else self.interval
@@ -0,0 +1,138 @@
+"""
+Pre-aggregated rollups for CodeChrono.
+
+This module maintains per-day and per-ISO-week buckets of coding hours broken
+down by language and by project. Buckets are updated as each session ends, so
+windowed reports sum a handful of buckets instead of scanning sessions.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+PERIODS = ("day", "week")
+
+# Spans, in seconds, of the downsampled tiers kept by retention
+HOURLY = 3600
+DAILY = 86400
+
+
+def empty_rollups() -> Dict:
+    """Return an empty rollup structure."""
+    return {period: {} for period in PERIODS}
+
+
+def empty_totals() -> Dict:
+    """Return an empty per-language/per-project totals bucket."""
+    return {"languages": {}, "projects": {}}
+
+
+def day_key(day: date) -> str:
+    """Return the bucket key of a calendar day."""
+    return day.isoformat()
+
+
+def week_key(day: date) -> str:
+    """Return the bucket key of the ISO week containing ``day``."""
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def bucket_start(timestamp: float, span: int) -> float:
+    """
+    Return the start of the local hour or day containing a moment.
+
+    Args:
+        timestamp: Epoch seconds
+        span: HOURLY or DAILY
+
+    Returns:
+        Epoch seconds of the start of the bucket
+    """
+    moment = datetime.fromtimestamp(timestamp)
+    if span == DAILY:
+        return datetime.combine(moment.date(), time.min).timestamp()
+    return moment.replace(minute=0, second=0, microsecond=0).timestamp()
+
+
+def add_totals(counters: Dict, key: str, hours: float, sessions: int = 1, edited_lines: Optional[int] = None) -> None:
+    """
+    Add hours and sessions to the counters stored under ``key``.
+
+    Entries only get an "edited_lines" counter once a session with measured
+    edits is added, so histories recorded without edit measurement keep
+    their shape.
+    """
+    entry = counters.setdefault(key, {"total_hours": 0, "sessions": 0})
+    entry["total_hours"] += hours
+    entry["sessions"] += sessions
+    if edited_lines is not None:
+        entry["edited_lines"] = entry.get("edited_lines", 0) + edited_lines
+
+
+def merge_totals(target: Dict, bucket: Dict) -> None:
+    """
+    Add the counters of one bucket into another.
+
+    Args:
+        target: Bucket to accumulate into
+        bucket: Bucket to add
+    """
+    for dimension in ("languages", "projects"):
+        for key, entry in bucket.get(dimension, {}).items():
+            add_totals(target[dimension], key, entry["total_hours"], entry["sessions"], entry.get("edited_lines"))
+
+
+def apply_rollup(rollups: Dict, session: Dict, sessions: int = 1) -> None:
+    """
+    Add a session to the day and week buckets of the day it started.
+
+    Args:
+        rollups: Rollup structure to update
+        session: Session record with language, start_time, duration and
+            optionally project and edited_lines
+        sessions: Number of sessions the record stands for (a downsampled
+            record sums several)
+    """
+    started = datetime.fromisoformat(session["start_time"]).date()
+    edited = session.get("edited_lines")
+    for period, key in (("day", day_key(started)), ("week", week_key(started))):
+        bucket = rollups[period].setdefault(key, empty_totals())
+        add_totals(bucket["languages"], session["language"], session["duration"], sessions, edited)
+        if session.get("project"):
+            add_totals(bucket["projects"], session["project"], session["duration"], sessions, edited)
+
+
+def sum_days(rollups: Dict, first: date, last: date) -> Dict:
+    """
+    Sum the buckets covering the calendar days [first, last].
+
+    Whole ISO weeks inside the range are read from their week bucket and the
+    remaining days from day buckets.
+
+    Args:
+        rollups: Rollup structure to read
+        first: First day included
+        last: Last day included
+
+    Returns:
+        Totals bucket with "languages" and "projects" counters
+    """
+    totals = empty_totals()
+    day = first
+    while day <= last:
+        if day.isoweekday() == 1 and day + timedelta(days=6) <= last:
+            merge_totals(totals, rollups["week"].get(week_key(day), {}))
+            day += timedelta(days=7)
+        else:
+            merge_totals(totals, rollups["day"].get(day_key(day), {}))
+            day += timedelta(days=1)
+    return totals
+
+
+def session_count(rollups: Dict) -> int:
+    """Return the number of sessions accounted for in the day buckets."""
+    return sum(
+        entry["sessions"]
+        for bucket in rollups["day"].values()
+        for entry in bucket["languages"].values()
+    )
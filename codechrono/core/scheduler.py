@@ -0,0 +1,96 @@
+"""
+Deadline scheduling for CodeChrono.
+
+This module keeps one deadline per key (a language session, a pending file
+event) in a heap, so the worker can sleep exactly until the next one expires
+instead of polling every key on a fixed interval.
+"""
+
+from typing import Dict, Hashable, List, Optional, Tuple
+import heapq
+import itertools
+
+
+class DeadlineScheduler:
+    """
+    Min-heap of per-key deadlines with cheap rescheduling.
+
+    Pushing back a key's deadline only updates a dictionary; the stale heap
+    entry is moved to the new deadline when it reaches the top. The heap
+    therefore holds about one entry per key however often keys are
+    rescheduled. Deadlines are plain floats on whatever clock the caller
+    uses consistently (normally time.monotonic()).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty scheduler."""
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._deadlines: Dict[Hashable, float] = {}
+        self._counter = itertools.count()
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """
+        Set (or move) the deadline of a key.
+
+        Args:
+            key: Identity of the scheduled item
+            deadline: Time at which the key expires
+        """
+        current = self._deadlines.get(key)
+        if current is None or deadline < current:
+            heapq.heappush(self._heap, (deadline, next(self._counter), key))
+        self._deadlines[key] = deadline
+
+    def cancel(self, key: Hashable) -> None:
+        """
+        Remove a key's deadline if it has one.
+
+        Args:
+            key: Identity of the scheduled item
+        """
+        self._deadlines.pop(key, None)
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Return the earliest pending deadline.
+
+        Returns:
+            Earliest deadline, or None if nothing is scheduled
+        """
+        while self._heap:
+            deadline, _, key = self._heap[0]
+            current = self._deadlines.get(key)
+            if current == deadline:
+                return deadline
+            if current is not None and current > deadline:
+                heapq.heapreplace(self._heap, (current, next(self._counter), key))
+            else:
+                heapq.heappop(self._heap)
+        return None
+
+    def pop_expired(self, now: float) -> List[Hashable]:
+        """
+        Remove and return the keys whose deadline is at or before ``now``.
+
+        Args:
+            now: Current time on the scheduler's clock
+
+        Returns:
+            Expired keys, earliest deadline first
+        """
+        expired = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return expired
+            _, _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            expired.append(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return True if the key has a pending deadline."""
+        return key in self._deadlines
+
+    def __len__(self) -> int:
+        """Return the number of scheduled keys."""
+        return len(self._deadlines)
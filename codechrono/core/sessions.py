@@ -0,0 +1,124 @@
+"""
+Session boundaries for the ActivityTracker's event bus.
+
+The ActivityTracker records individual file events, but live consumers such
+as the dashboard's event stream also want to know when someone starts and
+stops working on a project. A SessionMonitor groups events per (project,
+language) the way the legacy tracker does: a session starts with the first
+event and ends once no event arrived for ``idle_timeout`` seconds. Starts
+and ends are published as "session" messages.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from .bus import EventBus
+from .scheduler import DeadlineScheduler
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]
+
+
+class SessionMonitor:
+    """
+    Publishes session starts and ends derived from file events.
+
+    A daemon thread sleeps until the next session's idle deadline; events
+    only update a dictionary and the deadline heap.
+
+    Attributes:
+        bus (EventBus): Bus receiving the "session" messages
+        idle_timeout (float): Seconds without events that end a session
+    """
+
+    def __init__(self, bus: EventBus, idle_timeout: float = 300.0) -> None:
+        """
+        Initialize the monitor.
+
+        Args:
+            bus: Bus to publish on
+            idle_timeout: Seconds without events that end a session
+        """
+        self.bus = bus
+        self.idle_timeout = idle_timeout
+        # (project, language) -> [first event, last event], epoch seconds
+        self._sessions: Dict[SessionKey, List[float]] = {}
+        self._deadlines = DeadlineScheduler()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="codechrono-sessions", daemon=True)
+
+    def start(self) -> "SessionMonitor":
+        """Start ending idle sessions in the background; returns the monitor."""
+        self._thread.start()
+        return self
+
+    def touch(self, project: str, language: str, timestamp: float) -> None:
+        """
+        Account for an event, starting a session if none is open.
+
+        Args:
+            project: Project of the changed file
+            language: Language of the changed file
+            timestamp: Epoch time of the event
+        """
+        key = (project, language)
+        with self._cond:
+            if self._stopped:
+                return
+            session = self._sessions.get(key)
+            if session is None:
+                self._sessions[key] = [timestamp, timestamp]
+                self._publish("start", key, timestamp)
+            else:
+                session[1] = max(session[1], timestamp)
+            self._deadlines.schedule(key, self._sessions[key][1] + self.idle_timeout)
+            self._cond.notify()
+
+    def open_sessions(self) -> int:
+        """Return the number of sessions currently open."""
+        with self._cond:
+            return len(self._sessions)
+
+    def stop(self) -> None:
+        """End every open session and stop the background thread."""
+        with self._cond:
+            self._stopped = True
+            for key in list(self._sessions):
+                self._end(key)
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        """End sessions as their idle deadlines pass."""
+        with self._cond:
+            while not self._stopped:
+                for key in self._deadlines.pop_expired(time.time()):
+                    self._end(key)
+                deadline = self._deadlines.next_deadline()
+                self._cond.wait(None if deadline is None else max(0.0, deadline - time.time()))
+
+    def _end(self, key: SessionKey) -> None:
+        """Close a session and announce it (called with the lock held)."""
+        start, last = self._sessions.pop(key)
+        self._deadlines.cancel(key)
+        self._publish("end", key, start, last)
+
+    def _publish(self, action: str, key: SessionKey, start: float, end: Optional[float] = None) -> None:
+        """Publish one "session" message shaped like the legacy tracker's."""
+        project, language = key
+        message = {
+            "action": action,
+            "language": language,
+            "project": project,
+            "start_time": datetime.fromtimestamp(start).isoformat(),
+        }
+        if end is not None:
+            message.update(end_time=datetime.fromtimestamp(end).isoformat(), duration=(end - start) / 3600)
+        self.bus.publish("session", message)
+        logger.debug(f"Session {action}: {language} in {project}")
@@ -0,0 +1,835 @@
+"""
+Session storage for CodeChrono.
+
+This module keeps the session history in an SQLite database indexed on start
+time, so reports over a time window only read the rows inside that window.
+Recently ended sessions live in the append-only journal until compaction
+moves them into the database. Retention may downsample old sessions into
+hourly and then daily buckets per project and language; totals read both
+tiers, with a bucket counted as starting at the start of its hour or day.
+SessionReader answers the same queries without writing anything, for
+commands that only report.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import logging
+import sqlite3
+import threading
+
+from .aggregate import group_totals
+from .journal import SessionJournal, apply_session, apply_totals
+from .rollups import DAILY, HOURLY, add_totals, bucket_start, empty_rollups, empty_totals, session_count, sum_days
+
+logger = logging.getLogger(__name__)
+
+TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    language TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    duration REAL NOT NULL,
+    project TEXT,
+    edited_lines INTEGER,
+    edited_bytes INTEGER
+);
+"""
+
+# Columns of a session record, in the order of the session dictionaries
+SESSION_COLUMNS = "language, start_time, end_time, duration, project, edited_lines, edited_bytes"
+
+# Downsampled sessions: one row per (hour or day, project, language), the
+# project '' for sessions outside any. Retention records in "retention" the
+# time before which raw sessions may have been downsampled.
+TIER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_buckets (
+    start_ts REAL NOT NULL,
+    span INTEGER NOT NULL,
+    project TEXT NOT NULL,
+    language TEXT NOT NULL,
+    duration REAL NOT NULL,
+    sessions INTEGER NOT NULL,
+    edited_lines INTEGER,
+    edited_bytes INTEGER,
+    PRIMARY KEY (start_ts, span, project, language)
+);
+CREATE TABLE IF NOT EXISTS retention (
+    name TEXT PRIMARY KEY,
+    horizon REAL NOT NULL
+);
+"""
+
+# Adds to an existing bucket; edit counts stay NULL until a measured session
+BUCKET_UPSERT = """
+INSERT INTO session_buckets
+    (start_ts, span, project, language, duration, sessions, edited_lines, edited_bytes)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (start_ts, span, project, language) DO UPDATE SET
+    duration = duration + excluded.duration,
+    sessions = sessions + excluded.sessions,
+    edited_lines = COALESCE(edited_lines + excluded.edited_lines, edited_lines, excluded.edited_lines),
+    edited_bytes = COALESCE(edited_bytes + excluded.edited_bytes, edited_bytes, excluded.edited_bytes)
+"""
+
+# Sessions are tracked per (project, language), so that triple identifies one
+INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_sessions_start_ts ON sessions (start_ts);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_key ON sessions (COALESCE(project, ''), language, start_time);
+"""
+
+
+def session_key(session: Dict) -> Tuple[str, str, str]:
+    """Return the (project, language, start_time) identity of a session."""
+    return session.get("project") or "", session["language"], session["start_time"]
+
+
+def _totals_entry(hours: float, sessions: int, edited_lines: Optional[int]) -> Dict:
+    """Build a totals counter, with "edited_lines" only if any session measured edits."""
+    entry = {"total_hours": hours, "sessions": sessions}
+    if edited_lines is not None:
+        entry["edited_lines"] = edited_lines
+    return entry
+
+
+def _add_edited_lines(counters: Dict, sessions: Iterable[Dict], key: Callable[[Dict], Hashable]) -> None:
+    """Add the edited lines of measured sessions to the counters of their keys."""
+    for session in sessions:
+        if session.get("edited_lines") is not None:
+            entry = counters[key(session)]
+            entry["edited_lines"] = entry.get("edited_lines", 0) + session["edited_lines"]
+
+
+def _fold_bucket(buckets: Dict, key: Tuple, duration: float, sessions: int,
+                 edited_lines: Optional[int], edited_bytes: Optional[int]) -> None:
+    """Add sessions to a pending bucket row, keyed (start_ts, span, project, language)."""
+    row = buckets.setdefault(key, [0.0, 0, None, None])
+    row[0] += duration
+    row[1] += sessions
+    if edited_lines is not None:
+        row[2] = (row[2] or 0) + edited_lines
+        row[3] = (row[3] or 0) + (edited_bytes or 0)
+
+
+def _range_clause(start: Optional[datetime], end: Optional[datetime]) -> tuple:
+    """Build a WHERE clause and parameters selecting sessions by start time."""
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append("start_ts >= ?")
+        params.append(start.timestamp())
+    if end is not None:
+        conditions.append("start_ts < ?")
+        params.append(end.timestamp())
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def _in_range(session: Dict, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """Check whether a session started inside [start, end)."""
+    started = datetime.fromisoformat(session["start_time"])
+    return (start is None or started >= start) and (end is None or started < end)
+
+
+class SessionStore:
+    """
+    SQLite-backed store of ended sessions, indexed on start time.
+
+    Attributes:
+        db_path (Path): Location of the database file
+    """
+
+    def __init__(self, db_path: Path, read_only: bool = False) -> None:
+        """
+        Open (and create if needed) the session database.
+
+        Args:
+            db_path: Path to the SQLite database file
+            read_only: Open an existing database for queries only, without
+                creating, migrating or otherwise modifying it
+
+        Raises:
+            sqlite3.DatabaseError: In read-only mode, if the database is
+                missing or predates the current schema
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if read_only:
+            uri = f"{db_path.resolve().as_uri()}?mode=ro"
+            if not db_path.with_name(db_path.name + "-wal").exists():
+                # No writer has it open and the file is fully checkpointed:
+                # skip locking rather than leave -wal/-shm files behind. A
+                # writer starting meanwhile appends to its own -wal file and
+                # only checkpoints into this one after many pages, well past
+                # a short read. While a writer holds the -wal file, reads
+                # lock as usual and reuse its -wal/-shm files.
+                uri += "&immutable=1"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+            tables = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if not {"project", "edited_lines"} <= columns or "session_buckets" not in tables:
+                self._conn.close()
+                raise sqlite3.DatabaseError(f"{db_path} needs a schema upgrade")
+            return
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(TABLE_SCHEMA)
+        self._migrate()
+        self._conn.executescript(INDEX_SCHEMA)
+        self._conn.executescript(TIER_SCHEMA)
+
+    def _migrate(self) -> None:
+        """Upgrade databases created by earlier versions."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "project" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN project TEXT")
+        if "edited_lines" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN edited_lines INTEGER")
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN edited_bytes INTEGER")
+        (table_sql,) = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'sessions'").fetchone()
+        if "UNIQUE" in table_sql:
+            # Uniqueness used to be (language, start_time); rebuild the table
+            # without the constraint so it can move to the key index.
+            self._conn.executescript(
+                "BEGIN;"
+                "ALTER TABLE sessions RENAME TO sessions_old;"
+                + TABLE_SCHEMA +
+                "INSERT INTO sessions (language, start_time, end_time, start_ts, duration, project) "
+                "SELECT language, start_time, end_time, start_ts, duration, project FROM sessions_old;"
+                "DROP TABLE sessions_old;"
+                "COMMIT;"
+            )
+            logger.info(f"Migrated session keys in {self.db_path}")
+
+    def add_sessions(self, sessions: Iterable[Dict]) -> int:
+        """
+        Insert sessions in a single transaction, ignoring ones already stored.
+
+        Args:
+            sessions: Session records to insert
+
+        Returns:
+            Number of sessions actually inserted
+        """
+        rows = [
+            (
+                s["language"],
+                s["start_time"],
+                s["end_time"],
+                datetime.fromisoformat(s["start_time"]).timestamp(),
+                s["duration"],
+                s.get("project"),
+                s.get("edited_lines"),
+                s.get("edited_bytes"),
+            )
+            for s in sessions
+        ]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sessions "
+                "(language, start_time, end_time, start_ts, duration, project, edited_lines, edited_bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def sessions_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """
+        Return sessions that started in [start, end), oldest first.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            List of session records
+        """
+        where, params = _range_clause(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {SESSION_COLUMNS} FROM sessions {where} ORDER BY start_ts",
+                params,
+            ).fetchall()
+        return [{key: row[key] for key in row.keys() if row[key] is not None} for row in rows]
+
+    def language_totals(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Aggregate hours and session counts per language for a time window.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            Mapping of language to {"total_hours", "sessions"}
+        """
+        where, params = _range_clause(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT language, SUM(duration), SUM(sessions), SUM(edited_lines) FROM ("
+                f"SELECT language, duration, 1 AS sessions, edited_lines FROM sessions {where} UNION ALL "
+                f"SELECT language, duration, sessions, edited_lines FROM session_buckets {where}"
+                ") GROUP BY language",
+                params * 2,
+            ).fetchall()
+        return {language: _totals_entry(hours, count, edited) for language, hours, count, edited in rows}
+
+    def project_language_totals(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Dict[Tuple[Optional[str], str], Dict]:
+        """
+        Aggregate hours and session counts per (project, language) for a time window.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            Mapping of (project, language) to {"total_hours", "sessions"};
+            the project is None for sessions outside any project
+        """
+        where, params = _range_clause(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT project, language, SUM(duration), SUM(sessions), SUM(edited_lines) FROM ("
+                f"SELECT project, language, duration, 1 AS sessions, edited_lines FROM sessions {where} UNION ALL "
+                f"SELECT NULLIF(project, ''), language, duration, sessions, edited_lines FROM session_buckets {where}"
+                ") GROUP BY project, language",
+                params * 2,
+            ).fetchall()
+        return {
+            (project, language): _totals_entry(hours, count, edited)
+            for project, language, hours, count, edited in rows
+        }
+
+    def stored_keys(self, sessions: List[Dict]) -> Set[Tuple[str, str, str]]:
+        """
+        Return the session_key() of each of ``sessions`` already stored.
+
+        Args:
+            sessions: Session records to look up
+
+        Returns:
+            Set of keys present in the database
+        """
+        earliest = min(datetime.fromisoformat(s["start_time"]).timestamp() for s in sessions)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT COALESCE(project, ''), language, start_time FROM sessions WHERE start_ts >= ?", (earliest,)
+            ).fetchall()
+        candidates = {session_key(s) for s in sessions}
+        return {tuple(row) for row in rows} & candidates
+
+    def sessions_after(self, row_id: int, limit: int = 1000) -> Tuple[List[Dict], int]:
+        """
+        Return sessions in insertion order, for followers such as an uploader.
+
+        Args:
+            row_id: Row id of the last session already consumed, 0 for none
+            limit: Maximum number of sessions to return
+
+        Returns:
+            (sessions, row id of the last one returned or ``row_id`` if none)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, {SESSION_COLUMNS} FROM sessions "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (row_id, limit),
+            ).fetchall()
+        if rows:
+            row_id = rows[-1]["id"]
+        return [{key: row[key] for key in row.keys() if key != "id" and row[key] is not None} for row in rows], row_id
+
+    def count(self) -> int:
+        """Return the number of stored sessions."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def buckets(self) -> List[Dict]:
+        """
+        Return the downsampled sessions, oldest first.
+
+        Returns:
+            Records shaped like sessions, starting at the start of their
+            bucket, with the number of sessions summed in "sessions"
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_ts, project, language, duration, sessions, edited_lines, edited_bytes "
+                "FROM session_buckets ORDER BY start_ts"
+            ).fetchall()
+        buckets = []
+        for row in rows:
+            bucket = {
+                "language": row["language"],
+                "start_time": datetime.fromtimestamp(row["start_ts"]).isoformat(),
+                "duration": row["duration"],
+                "sessions": row["sessions"],
+            }
+            if row["project"]:
+                bucket["project"] = row["project"]
+            if row["edited_lines"] is not None:
+                bucket["edited_lines"] = row["edited_lines"]
+                bucket["edited_bytes"] = row["edited_bytes"]
+            buckets.append(bucket)
+        return buckets
+
+    def downsample(self, raw_before: float, hourly_before: float, limit: int = 5000) -> Dict[str, int]:
+        """
+        Move one batch of old sessions into hourly or daily buckets.
+
+        Sessions that started before ``raw_before`` go to hourly buckets, or
+        straight to daily ones if they started before ``hourly_before``, and
+        hourly buckets older than ``hourly_before`` are merged into daily
+        ones. Totals over any window of whole buckets are unchanged.
+
+        Args:
+            raw_before: Epoch time before which sessions are downsampled
+            hourly_before: Epoch time before which hours merge into days
+            limit: Maximum number of sessions and of hourly buckets moved
+
+        Returns:
+            Number of "sessions" and "hourly_buckets" moved
+        """
+        buckets: Dict[Tuple, List] = {}
+        with self._lock, self._conn:
+            hours = self._conn.execute(
+                "SELECT rowid, start_ts, project, language, duration, sessions, edited_lines, edited_bytes "
+                "FROM session_buckets WHERE span = ? AND start_ts < ? ORDER BY start_ts LIMIT ?",
+                (HOURLY, hourly_before, limit),
+            ).fetchall()
+            for row in hours:
+                key = (bucket_start(row["start_ts"], DAILY), DAILY, row["project"], row["language"])
+                _fold_bucket(buckets, key, row["duration"], row["sessions"], row["edited_lines"], row["edited_bytes"])
+            # The newest row is never removed, so its id is not reused and
+            # followers reading by row id (an uploader) miss nothing
+            rows = self._conn.execute(
+                "SELECT id, start_ts, project, language, duration, edited_lines, edited_bytes FROM sessions "
+                "WHERE start_ts < ? AND id < (SELECT MAX(id) FROM sessions) ORDER BY start_ts LIMIT ?",
+                (raw_before, limit),
+            ).fetchall()
+            for row in rows:
+                span = DAILY if row["start_ts"] < hourly_before else HOURLY
+                key = (bucket_start(row["start_ts"], span), span, row["project"] or "", row["language"])
+                _fold_bucket(buckets, key, row["duration"], 1, row["edited_lines"], row["edited_bytes"])
+            self._conn.executemany("DELETE FROM session_buckets WHERE rowid = ?", [(row["rowid"],) for row in hours])
+            self._conn.executemany("DELETE FROM sessions WHERE id = ?", [(row["id"],) for row in rows])
+            self._conn.executemany(BUCKET_UPSERT, [key + tuple(value) for key, value in buckets.items()])
+            self._conn.execute(
+                "INSERT INTO retention (name, horizon) VALUES ('sessions', ?) "
+                "ON CONFLICT (name) DO UPDATE SET horizon = MAX(horizon, excluded.horizon)",
+                (raw_before,),
+            )
+        return {"sessions": len(rows), "hourly_buckets": len(hours)}
+
+    def raw_horizon(self) -> Optional[float]:
+        """
+        Return the time before which sessions may have been downsampled.
+
+        Returns:
+            Epoch seconds, or None if retention never ran
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT horizon FROM retention WHERE name = 'sessions'").fetchone()
+        return row[0] if row else None
+
+    def used_bytes(self) -> int:
+        """Return the size of the database pages in use (excluding free pages)."""
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return (pages - free) * page_size
+
+    def vacuum(self) -> int:
+        """
+        Rewrite the database to return free pages to the filesystem.
+
+        Returns:
+            Number of bytes the database file shrank by
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            before = self.db_path.stat().st_size
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return before - self.db_path.stat().st_size
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class SessionQueries:
+    """
+    Queries over an indexed store plus the not-yet-compacted journal tail.
+
+    Shared by SessionRepository and SessionReader, which provide ``store``
+    (a SessionStore) and ``data`` (state as returned by SessionJournal.load).
+    """
+
+    store: SessionStore
+    data: Dict
+
+    def _reconcile(self) -> bool:
+        """
+        Drop journal tail sessions the store already holds.
+
+        A crash between committing to the store and writing the snapshot
+        leaves already-stored sessions in the journal tail; dropping them
+        keeps queries from counting a session twice.
+
+        Returns:
+            False if the rollups disagree with the all-time totals and need
+            recomputing
+        """
+        if self.data["sessions"]:
+            stored = self.store.stored_keys(self.data["sessions"])
+            self.data["sessions"] = [
+                s for s in self.data["sessions"] if session_key(s) not in stored
+            ]
+        # Snapshots written before rollups existed only carry all-time totals
+        return session_count(self.data["rollups"]) == sum(e["sessions"] for e in self.data["languages"].values())
+
+    def _recompute_aggregates(self) -> int:
+        """
+        Recompute all-time totals and rollups in memory from the session history.
+
+        Returns:
+            Number of sessions processed
+        """
+        self.data["languages"] = {}
+        self.data["projects"] = {}
+        self.data["rollups"] = empty_rollups()
+        sessions = self.sessions_between()
+        for session in sessions:
+            apply_totals(self.data, session)
+        count = len(sessions)
+        # Sessions downsampled by retention only survive as buckets
+        for bucket in self.store.buckets():
+            apply_totals(self.data, bucket, bucket["sessions"])
+            count += bucket["sessions"]
+        return count
+
+    def sessions_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """
+        Return sessions that started in [start, end), oldest first.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            List of session records
+        """
+        sessions = self.store.sessions_between(start, end)
+        tail = [s for s in self.data["sessions"] if _in_range(s, start, end)]
+        if tail:
+            sessions.extend(tail)
+            sessions.sort(key=lambda s: s["start_time"])
+        return sessions
+
+    def language_totals(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Aggregate hours and session counts per language for a time window.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            Mapping of language to {"total_hours", "sessions"}
+        """
+        totals = self.store.language_totals(start, end)
+        for session in self.data["sessions"]:
+            if not _in_range(session, start, end):
+                continue
+            add_totals(totals, session["language"], session["duration"], 1, session.get("edited_lines"))
+        return totals
+
+    def project_language_totals(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Dict[Tuple[Optional[str], str], Dict]:
+        """
+        Aggregate hours and session counts per (project, language) for a time window.
+
+        Args:
+            start: Inclusive lower bound, or None for no bound
+            end: Exclusive upper bound, or None for no bound
+
+        Returns:
+            Mapping of (project, language) to {"total_hours", "sessions"}
+        """
+        totals = self.store.project_language_totals(start, end)
+        tail = [s for s in self.data["sessions"] if _in_range(s, start, end)]
+        grouped = group_totals([(s.get("project"), s["language"]) for s in tail], [s["duration"] for s in tail])
+        for key, (hours, count) in grouped.items():
+            add_totals(totals, key, hours, count)
+        _add_edited_lines(totals, tail, lambda s: (s.get("project"), s["language"]))
+        return totals
+
+    def window_totals(self, start: datetime, end: Optional[datetime] = None) -> Dict:
+        """
+        Aggregate hours per language and project for [start, end) from rollups.
+
+        Whole days inside the window are summed from day/week buckets; only
+        the sessions on a partial first or last day are read individually.
+
+        Args:
+            start: Inclusive lower bound
+            end: Exclusive upper bound, or None for up to now
+
+        Returns:
+            Totals bucket with "languages" and "projects" counters
+        """
+        first_full = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+        last_full = end.date() - timedelta(days=1) if end else datetime.now().date()
+        if first_full > last_full:
+            edges = [(start, end)]
+            totals = empty_totals()
+        else:
+            edges = [(start, datetime.combine(first_full, time.min))]
+            if end:
+                edges.append((datetime.combine(last_full + timedelta(days=1), time.min), end))
+            totals = sum_days(self.data["rollups"], first_full, last_full)
+
+        for edge_start, edge_end in edges:
+            if edge_start == edge_end:
+                continue
+            # Also counts downsampled buckets starting on the partial days
+            for (project, language), entry in self.project_language_totals(edge_start, edge_end).items():
+                hours, count, edited = entry["total_hours"], entry["sessions"], entry.get("edited_lines")
+                add_totals(totals["languages"], language, hours, count, edited)
+                if project:
+                    add_totals(totals["projects"], project, hours, count, edited)
+        return totals
+
+
+class SessionRepository(SessionQueries):
+    """
+    Single entry point for recording and querying sessions.
+
+    New sessions are applied to the in-memory state and appended to the
+    journal; compaction moves the journaled sessions into the SessionStore and
+    snapshots the remaining state (all-time language totals), so the snapshot
+    stays small no matter how long the history grows. Queries combine the
+    indexed store with the not-yet-compacted journal tail.
+
+    Attributes:
+        journal (SessionJournal): Write-ahead journal of ended sessions
+        store (SessionStore): Indexed session history
+        data (Dict): Language totals plus sessions not yet in the store
+        lock (threading.RLock): Held while recording and compacting; hold it
+            to query from a thread other than the one recording
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, db_path: Path) -> None:
+        """
+        Open the journal and the store and replay the journal tail.
+
+        Args:
+            snapshot_path: Path of the JSON snapshot
+            journal_path: Path of the session journal
+            db_path: Path of the SQLite session store
+        """
+        self.journal = SessionJournal(snapshot_path, journal_path)
+        self.store = SessionStore(db_path)
+        self.lock = threading.RLock()
+        self.data = self.journal.load()
+        if not self._reconcile():
+            logger.info("Rollups are out of date, rebuilding from session history")
+            self.rebuild_aggregates()
+
+    def record(self, session: Dict) -> None:
+        """
+        Durably record an ended session.
+
+        Args:
+            session: Session record to persist
+        """
+        with self.lock:
+            apply_session(self.data, session)
+            self.journal.append(session)
+            if self.journal.needs_compaction():
+                self.compact()
+
+    def merge_sessions(self, sessions: Iterable[Dict]) -> int:
+        """
+        Record reconstructed sessions that do not overlap recorded ones.
+
+        A session is skipped when a recorded session of its language
+        overlaps it in time, whatever project either is attributed to: one
+        directory may have been recorded under another name (or none, before
+        projects were attributed), and time cannot be spent twice in one
+        language. Merging the same (or a re-derived) history again therefore
+        adds nothing, and tracked sessions always win. Reconstructed sessions
+        of different projects may still overlap each other. Sessions older
+        than the retention horizon are skipped as well.
+
+        Args:
+            sessions: Session records, e.g. from a backfill
+
+        Returns:
+            Number of sessions recorded
+        """
+        sessions = sorted(sessions, key=lambda s: s["start_time"])
+        horizon = self.store.raw_horizon()
+        if horizon is not None:
+            # Overlaps cannot be checked against downsampled history
+            sessions = [s for s in sessions if datetime.fromisoformat(s["start_time"]).timestamp() >= horizon]
+        if not sessions:
+            return 0
+        earliest = datetime.fromisoformat(sessions[0]["start_time"]) - timedelta(days=1)
+        # language -> (start times, end times) of the disjoint spans covered by
+        # recorded sessions, so only the latest span starting before a
+        # candidate ends can overlap it
+        recorded: Dict[str, Tuple[List[str], List[str]]] = {}
+        for session in sorted(self.sessions_between(earliest), key=lambda s: s["start_time"]):
+            starts, ends = recorded.setdefault(session["language"], ([], []))
+            if ends and ends[-1] > session["start_time"]:
+                ends[-1] = max(ends[-1], session["end_time"])
+            else:
+                starts.append(session["start_time"])
+                ends.append(session["end_time"])
+        # (project, language) -> spans of the sessions merged by this call
+        merged_spans: Dict[Tuple[str, str], Tuple[List[str], List[str]]] = {}
+
+        def overlaps(times: Optional[Tuple[List[str], List[str]]], session: Dict) -> bool:
+            """Check whether one of a set of disjoint spans overlaps ``session``."""
+            if times is None:
+                return False
+            starts, ends = times
+            index = bisect_left(starts, session["end_time"])
+            return bool(index) and ends[index - 1] > session["start_time"]
+
+        merged = 0
+        for session in sessions:
+            project, language, _ = session_key(session)
+            if overlaps(recorded.get(language), session) or overlaps(merged_spans.get((project, language)), session):
+                continue
+            self.record(session)
+            starts, ends = merged_spans.setdefault((project, language), ([], []))
+            index = bisect_left(starts, session["end_time"])
+            starts.insert(index, session["start_time"])
+            ends.insert(index, session["end_time"])
+            merged += 1
+        self.compact()
+        return merged
+
+    def compact(self) -> None:
+        """Move journaled sessions into the store and snapshot the rest."""
+        with self.lock:
+            if self.data["sessions"]:
+                inserted = self.store.add_sessions(self.data["sessions"])
+                logger.info(f"Moved {inserted} sessions into {self.store.db_path}")
+            self.data["sessions"] = []
+            self.journal.compact(self.data)
+
+    def apply_retention(self, raw_before: datetime, hourly_before: datetime, batch_size: int = 5000) -> Dict:
+        """
+        Downsample sessions older than the retention horizons.
+
+        Runs in batches of one short transaction each, so recording and
+        queries are only held up for one batch at a time. All-time totals
+        and rollups are unaffected.
+
+        Args:
+            raw_before: Sessions that started earlier are downsampled
+            hourly_before: Hourly buckets that started earlier become daily
+            batch_size: Sessions (and hourly buckets) moved per transaction
+
+        Returns:
+            Report with the number of "sessions" and "hourly_buckets" moved
+            and the "bytes_reclaimed" in the database
+        """
+        report = {"sessions": 0, "hourly_buckets": 0}
+        used = self.store.used_bytes()
+        while True:
+            moved = self.store.downsample(raw_before.timestamp(), hourly_before.timestamp(), batch_size)
+            for key, count in moved.items():
+                report[key] += count
+            if max(moved.values()) < batch_size:
+                break
+        report["bytes_reclaimed"] = used - self.store.used_bytes()
+        if report["sessions"] or report["hourly_buckets"]:
+            logger.info(f"Downsampled {report['sessions']} sessions and {report['hourly_buckets']} hourly buckets")
+        return report
+
+    def rebuild_aggregates(self) -> int:
+        """
+        Recompute all-time totals and rollups from the full session history,
+        downsampled buckets included.
+
+        Returns:
+            Number of sessions processed
+        """
+        with self.lock:
+            count = self._recompute_aggregates()
+            self.compact()
+        return count
+
+    def close(self) -> None:
+        """Compact pending sessions and release files."""
+        with self.lock:
+            if self.journal.pending_records or self.data["sessions"]:
+                self.compact()
+            self.journal.close()
+        self.store.close()
+
+
+class SessionReader(SessionQueries):
+    """
+    Read-only view of the session history for short-lived commands.
+
+    Loading never repairs the journal, creates or migrates the database or
+    writes a snapshot, so it is safe next to a running tracker, and no
+    threads are started. The database is only opened once a query needs it;
+    one written by an earlier version is left for a writing command to
+    upgrade, and queries needing it raise sqlite3.DatabaseError.
+
+    Attributes:
+        db_path (Path): Location of the SQLite session store
+        data (Dict): Language totals plus sessions not yet in the store
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path, db_path: Path) -> None:
+        """
+        Load the snapshot and the journal tail.
+
+        Args:
+            snapshot_path: Path of the JSON snapshot
+            journal_path: Path of the session journal
+            db_path: Path of the SQLite session store
+        """
+        self.db_path = db_path
+        self._store: Optional[SessionStore] = None
+        self.data = SessionJournal(snapshot_path, journal_path).load(repair=False)
+        if not self._reconcile():
+            logger.info("Rollups are out of date, recomputing them in memory")
+            self._recompute_aggregates()
+
+    @property
+    def store(self) -> SessionStore:
+        """The session store, opened read-only on first use."""
+        if self._store is None:
+            if not self.db_path.exists():
+                # Nothing compacted yet: an empty in-memory store answers queries
+                self._store = SessionStore(Path(":memory:"))
+            else:
+                self._store = SessionStore(self.db_path, read_only=True)
+        return self._store
+
+    def close(self) -> None:
+        """Close the database connection, if one was opened."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -7,34 +7,120 @@ time tracking, and activity logging.
 
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import json
 import logging
+import threading
+import time
+
+from .aggregate import HEATMAP_DAYS, HEATMAP_HOURS
+from .bus import EventBus
+from .editsize import EditMeter
+from .eventlog import DEFAULT_EVENT_LOG_DIR, EventLog, SegmentCache
+from .events import EventBuffer
+from .export import DEFAULT_CHUNK_SIZE, EXPORT_EXTENSIONS, EXPORT_FORMATS, export_events
+from .metrics import EVENTS_TRACKED, PERSIST_LATENCY
+from .retention import TIERS_FILE, EventTiers, RetentionPolicy, apply_event_retention
+from .sessions import SessionMonitor
+from ..utils.languages import UNKNOWN_LANGUAGE, LanguageRegistry
+from ..utils.projects import DEFAULT_PROJECTS_FILE, NO_PROJECT, ProjectResolver
 
 logger = logging.getLogger(__name__)
 
+
+def _add_counts(totals: Dict, counts: Dict) -> None:
+    """Add per-key counts into running totals."""
+    for key, count in counts.items():
+        totals[key] = totals.get(key, 0) + count
+
+
 class ActivityTracker:
     """
     Tracks coding activity across multiple files and projects.
     
+    With persistence enabled, events are streamed to an on-disk EventLog and
+    all queries read from it, so a fresh tracker (e.g. in the summary
+    command) sees what the tracking process recorded. The in-memory buffer
+    then only holds the most recent ``max_memory_events`` events of this
+    process. Under a retention policy, old segments of the log are folded
+    into hourly and daily per-file counts, which the summaries, project
+    activity and heatmap include; exports only cover raw events.
+    
     Attributes:
-        activity_log (Dict): Dictionary storing activity data
+        events (EventBuffer): Columnar log of events tracked by this process
+        event_log (Optional[EventLog]): On-disk event log, None if not persisting
+        bus (Optional[EventBus]): Bus receiving a "file" message per tracked event
+        sessions (Optional[SessionMonitor]): Publishes "session" starts and
+            ends on the bus, None without a bus
         watched_files (Set[Path]): Set of files being monitored
         start_time (datetime): When tracking began
+        languages (LanguageRegistry): Extension/file name to language lookup
+        projects (ProjectResolver): Path to project lookup, saved to the
+            projects file shared with the legacy tracker and backfill
+        edit_meter (Optional[EditMeter]): Measures edit sizes, None unless
+            the "measure_edits" option is set
+        edited_lines (Dict[str, int]): Lines changed per language since
+            tracking began, when edits are measured
+        retention (Optional[RetentionPolicy]): Policy from the "retention"
+            option, None to keep all raw events
+        event_tiers (Optional[EventTiers]): Downsampled events, None until
+            retention has been configured
     """
     
-    def __init__(self, config_path: Optional[Path] = None) -> None:
+    def __init__(
+        self, config_path: Optional[Path] = None, persist: bool = True, bus: Optional[EventBus] = None
+    ) -> None:
         """
         Initialize the activity tracker.
         
         Args:
             config_path: Optional path to configuration file
+            persist: Whether to record events in and read them from the
+                on-disk event log (configured by "event_log_dir")
+            bus: Optional bus to publish tracked events and session
+                boundaries on
         """
-        self.activity_log: Dict = {}
+        self.events = EventBuffer()
+        # Guards the in-memory buffer against live queries from other threads
+        self._events_lock = threading.Lock()
+        self.bus = bus
         self.watched_files: Set[Path] = set()
         self.start_time: datetime = datetime.now()
         self.config_path = config_path or Path("config.json")
         self._load_config()
+        self.languages = LanguageRegistry.from_config(self.config)
+        self.max_memory_events: int = self.config.get("max_memory_events", 1_000_000)
+        self.event_log: Optional[EventLog] = None
+        self._segment_cache: Optional[SegmentCache] = None
+        # Serializes queries over the event log, whose cached buffers they share
+        self._query_lock = threading.Lock()
+        projects_path = None
+        self.retention = RetentionPolicy.from_config(self.config.get("retention"))
+        self.event_tiers: Optional[EventTiers] = None
+        if persist:
+            log_dir = Path(self.config.get("event_log_dir", DEFAULT_EVENT_LOG_DIR)).expanduser()
+            self.event_log = EventLog(
+                log_dir,
+                segment_bytes=self.config.get("event_log_segment_bytes", 8 * 1024 * 1024),
+                flush_interval=self.config.get("event_log_flush_interval", 2.0),
+            )
+            # Next to the legacy tracker's names by default, so both agree
+            default_projects = log_dir.parent / DEFAULT_PROJECTS_FILE.name
+            self._segment_cache = SegmentCache(self.event_log, self.config.get("query_cache_events", 1_000_000))
+            projects_path = Path(self.config.get("projects_file", default_projects)).expanduser()
+            if self.retention is not None or (log_dir / TIERS_FILE).exists():
+                self.event_tiers = EventTiers(log_dir / TIERS_FILE)
+        self.projects = ProjectResolver(projects_path)
+        self.edit_meter: Optional[EditMeter] = None
+        if self.config.get("measure_edits"):
+            self.edit_meter = EditMeter(
+                max_files=self.config.get("edit_cache_files", 4096),
+                max_file_bytes=self.config.get("edit_max_file_bytes", 4 * 1024 * 1024),
+            )
+        self.edited_lines: Dict[str, int] = {}
+        self.sessions: Optional[SessionMonitor] = None
+        if bus is not None:
+            self.sessions = SessionMonitor(bus, self.config.get("session_idle_timeout", 300)).start()
         
     def _load_config(self) -> None:
         """Load configuration from file."""
@@ -56,62 +142,379 @@ class ActivityTracker:
             file_path: Path to the changed file
             event_type: Type of change (created, modified, deleted)
         """
-        timestamp = datetime.now().isoformat()
-        if file_path not in self.activity_log:
-            self.activity_log[file_path] = []
+        path = str(file_path)
+        language = self.languages.get_language(path)
+        timestamp = time.time()
+        edit = self.edit_meter.measure(path, event_type) if self.edit_meter is not None else None
+        with self._events_lock:
+            if edit is not None:
+                self.edited_lines[language] = self.edited_lines.get(language, 0) + edit.lines
+            self.events.append(path, event_type, language, timestamp)
+            if self.event_log is not None and len(self.events) > self.max_memory_events:
+                self.events.trim(self.max_memory_events // 2)
+        EVENTS_TRACKED.inc()
+        if self.event_log is not None:
+            with PERSIST_LATENCY.time():
+                self.event_log.append(path, event_type, language, timestamp)
+        if self.bus is not None:
+            project = self.projects.resolve(path) or NO_PROJECT
+            if self.sessions is not None and language != UNKNOWN_LANGUAGE:
+                self.sessions.touch(project, language, timestamp)
+            message = {
+                "file_path": path,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds"),
+                "event_type": event_type,
+                "language": language,
+                "project": project,
+            }
+            if edit is not None:
+                message.update(edited_lines=edit.lines, edited_bytes=edit.bytes)
+            self.bus.publish("file", message)
+        logger.debug(f"Tracked {event_type} event for {file_path}")
+        
+    @property
+    def activity_log(self) -> Dict[str, List[Dict]]:
+        """
+        Per-file view of all events, materialized on demand.
+        
+        Returns:
+            Mapping of file path to its events as dictionaries
+        """
+        log: Dict[str, List[Dict]] = {}
+        for path, timestamp, event_type, language in self.iter_events():
+            log.setdefault(path, []).append({
+                "timestamp": timestamp.isoformat(timespec="microseconds"),
+                "event_type": event_type,
+                "language": language
+            })
+        return log
+        
+    def add_watch_roots(self, paths: List[Path]) -> None:
+        """
+        Register watched directories, and git repositories inside them, as projects.
+        
+        Args:
+            paths: Watched directories
+        """
+        self.projects.add_watch_roots(str(path) for path in paths)
+        
+    def directory_created(self, path: Path) -> None:
+        """
+        Notice new repositories appearing under a watched directory.
+        
+        Args:
+            path: Newly created directory
+        """
+        self.projects.directory_created(str(path))
+        
+    def track_file_changes(self, events: List[Tuple[Path, str]]) -> None:
+        """
+        Record a batch of coalesced file change events.
+        
+        Args:
+            events: List of (file_path, event_type) tuples
+        """
+        for file_path, event_type in events:
+            self.track_file_change(file_path, event_type)
+            
+    def iter_events(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> Iterator[Tuple[str, datetime, str, str]]:
+        """
+        Iterate over the events that occurred in [start_time, end_time).
+        
+        Args:
+            start_time: Inclusive lower bound, or None for no bound
+            end_time: Exclusive upper bound, or None for no bound
             
-        self.activity_log[file_path].append({
-            "timestamp": timestamp,
-            "event_type": event_type
-        })
-        logger.info(f"Tracked {event_type} event for {file_path}")
+        Yields:
+            Tuples of (file_path, timestamp, event_type, language)
+        """
+        for path, timestamp, event_type, language in self.iter_raw_events(start_time, end_time):
+            yield path, datetime.fromtimestamp(timestamp), event_type, language
+
+    def iter_raw_events(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> Iterator[Tuple[str, float, str, str]]:
+        """
+        Iterate over the events in [start_time, end_time) with epoch timestamps.
+        
+        The range is pushed down to the event log, which only opens the
+        segments overlapping it.
         
-    def get_activity_summary(self, start_time: Optional[datetime] = None) -> Dict:
+        Args:
+            start_time: Inclusive lower bound, or None for no bound
+            end_time: Exclusive upper bound, or None for no bound
+            
+        Yields:
+            Tuples of (file_path, epoch seconds, event_type, language)
+        """
+        start = start_time.timestamp() if start_time else None
+        end = end_time.timestamp() if end_time else None
+        if self.event_log is not None:
+            for timestamp, path, event_type, language in self.event_log.read(start, end):
+                yield path, timestamp, event_type, language
+            return
+        lo, hi = self.events.index_range(start, end)
+        yield from self.events.iter_events(lo, hi)
+
+    def get_activity_summary(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> Dict:
         """
-        Generate a summary of coding activity.
+        Generate a summary of coding activity in [start_time, end_time).
         
         Args:
             start_time: Optional start time for filtering activity
+            end_time: Optional exclusive end time
             
         Returns:
             Dictionary containing activity summary
         """
-        summary = {
-            "total_files": len(self.activity_log),
-            "total_events": sum(len(events) for events in self.activity_log.values()),
-            "file_activity": {}
+        file_activity: Dict[str, int] = {}
+        language_activity: Dict[str, int] = {}
+        with self._query_lock:
+            for buffer, lo, hi in self._load_ranges(start_time, end_time):
+                _add_counts(file_activity, buffer.count_paths(lo, hi))
+                _add_counts(language_activity, buffer.count_languages(lo, hi))
+        for (path, language), count in self._tier_counts(start_time, end_time).items():
+            file_activity[path] = file_activity.get(path, 0) + count
+            language_activity[language] = language_activity.get(language, 0) + count
+        return {
+            "total_files": len(file_activity),
+            "total_events": sum(file_activity.values()),
+            "file_activity": file_activity,
+            "language_activity": language_activity
+        }
+        
+    def live_status(self) -> Dict:
+        """
+        Report this process's tracking state from memory.
+
+        Returns:
+            Dictionary with the start time, the number of events held in
+            memory and the time, file and language of the latest one, plus
+            the lines edited per language when edits are measured
+        """
+        with self._events_lock:
+            count = len(self.events)
+            latest = None
+            if count:
+                latest = {
+                    "timestamp": datetime.fromtimestamp(self.events.timestamps[-1]).isoformat(timespec="seconds"),
+                    "file_path": self.events.paths.values[self.events.path_ids[-1]],
+                    "language": self.events.languages.values[self.events.language_ids[-1]],
+                }
+            edited_lines = dict(self.edited_lines)
+        status = {
+            "started": self.start_time.isoformat(timespec="seconds"),
+            "events_in_memory": count,
+            "latest_event": latest,
+        }
+        if self.edit_meter is not None:
+            status["edited_lines"] = edited_lines
+        return status
+
+    def live_summary(self, start_time: Optional[datetime] = None) -> Dict:
+        """
+        Summarize the events this process holds in memory, without reading the event log.
+
+        Only covers activity since the process started, up to the most
+        recent ``max_memory_events`` events.
+
+        Args:
+            start_time: Optional start time for filtering activity
+
+        Returns:
+            Dictionary shaped like get_activity_summary's
+        """
+        with self._events_lock:
+            lo, hi = self.events.index_range(start_time.timestamp() if start_time else None)
+            file_activity = self.events.count_paths(lo, hi)
+            language_activity = self.events.count_languages(lo, hi)
+        return {
+            "total_files": len(file_activity),
+            "total_events": sum(file_activity.values()),
+            "file_activity": file_activity,
+            "language_activity": language_activity
         }
+
+    def flush(self) -> None:
+        """Hand buffered event log writes to the operating system now."""
+        if self.event_log is not None:
+            self.event_log.flush()
+
+    def get_project_activity(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """
+        Group activity in [start_time, end_time) by project.
+        
+        Projects are resolved once per distinct file, not per event.
+        
+        Args:
+            start_time: Inclusive lower bound, or None for no bound
+            end_time: Exclusive upper bound, or None for no bound
+            
+        Returns:
+            Mapping of project name to {"events", "files", "languages"},
+            where "languages" maps language to event count
+        """
+        counts: Dict[Tuple[str, str], int] = {}
+        with self._query_lock:
+            for buffer, lo, hi in self._load_ranges(start_time, end_time):
+                _add_counts(counts, buffer.count_path_languages(lo, hi))
+        for key, count in self._tier_counts(start_time, end_time).items():
+            counts[key] = counts.get(key, 0) + count
+        projects: Dict[str, Dict] = {}
+        for (path, language), count in counts.items():
+            project = projects.setdefault(
+                self.projects.resolve(path) or NO_PROJECT, {"events": 0, "files": set(), "languages": {}}
+            )
+            project["events"] += count
+            project["files"].add(path)
+            project["languages"][language] = project["languages"].get(language, 0) + count
+        for project in projects.values():
+            project["files"] = len(project["files"])
+        return projects
+        
+    def get_activity_heatmap(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> List[List[int]]:
+        """
+        Count events per local weekday and hour in [start_time, end_time).
         
-        for file_path, events in self.activity_log.items():
-            if start_time:
-                events = [e for e in events if datetime.fromisoformat(e["timestamp"]) >= start_time]
-            summary["file_activity"][str(file_path)] = len(events)
+        Args:
+            start_time: Inclusive lower bound, or None for no bound
+            end_time: Exclusive upper bound, or None for no bound
             
-        return summary
+        Returns:
+            7x24 nested list indexed by [weekday][hour], Monday first
+        """
+        grid = [[0] * HEATMAP_HOURS for _ in range(HEATMAP_DAYS)]
+        with self._query_lock:
+            for buffer, lo, hi in self._load_ranges(start_time, end_time):
+                for day, hours in enumerate(buffer.heatmap(lo, hi)):
+                    for hour, count in enumerate(hours):
+                        grid[day][hour] += count
+        if self.event_tiers is not None:
+            start, end = self._epoch_range(start_time, end_time)
+            for hour, count in self.event_tiers.hour_counts(start, end).items():
+                moment = datetime.fromtimestamp(hour)
+                grid[moment.weekday()][moment.hour] += count
+        return grid
+        
+    def data_version(self) -> str:
+        """
+        Return a token that changes whenever tracked data changes.
+        
+        Returns:
+            Opaque version string, suitable as a cache key
+        """
+        if self.event_log is not None:
+            return self.event_log.version()
+        return f"mem-{len(self.events)}-{self.events.timestamps[-1] if self.events else 0}"
         
-    def export_data(self, format: str = "json", output_path: Optional[Path] = None) -> None:
+    def apply_retention(self, policy: Optional[RetentionPolicy] = None, now: Optional[datetime] = None) -> Dict:
+        """
+        Fold event log segments older than the policy's raw horizon into the tiers.
+
+        Each call folds at most ``max_segments`` segments; repeat it while
+        the report says more are "pending".
+
+        Args:
+            policy: Policy to apply, defaults to the configured one
+            now: Current time, defaults to now
+
+        Returns:
+            Report from apply_event_retention
+
+        Raises:
+            RuntimeError: If events are not persisted or no policy is set
+        """
+        policy = policy or self.retention
+        if self.event_log is None or policy is None:
+            raise RuntimeError("Retention needs the event log and a retention policy")
+        if self.event_tiers is None:
+            self.event_tiers = EventTiers(self.event_log.directory / TIERS_FILE)
+        raw_before, hourly_before = policy.horizons(now)
+        return apply_event_retention(
+            self.event_log, self.event_tiers, raw_before, hourly_before, policy.max_segments, policy.batch_size
+        )
+
+    def _tier_counts(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> Dict[Tuple[str, str], int]:
+        """Count downsampled events per (path, language) in [start_time, end_time)."""
+        if self.event_tiers is None:
+            return {}
+        return self.event_tiers.file_counts(*self._epoch_range(start_time, end_time))
+
+    @staticmethod
+    def _epoch_range(
+        start_time: Optional[datetime], end_time: Optional[datetime]
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Convert optional range bounds to epoch seconds."""
+        return (start_time.timestamp() if start_time else None, end_time.timestamp() if end_time else None)
+
+    def _load_ranges(
+        self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None
+    ) -> List[Tuple[EventBuffer, int, int]]:
+        """
+        Get the events of a time range as buffer columns for aggregation.
+        
+        Without persistence this is a slice of the in-memory buffer; with it,
+        one slice per event log segment, parsed once and cached between
+        queries (called with the query lock held).
+        
+        Returns:
+            List of (buffer, lo, hi) with events at buffer indices [lo, hi)
+        """
+        start, end = self._epoch_range(start_time, end_time)
+        if self._segment_cache is None:
+            return [(self.events, *self.events.index_range(start, end))]
+        return self._segment_cache.ranges(start, end)
+        
+    def export_data(
+        self,
+        format: str = "json",
+        output_path: Optional[Path] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> int:
         """
         Export activity data to a file.
         
+        Events are streamed from storage in chunks; see codechrono.core.export
+        for the formats.
+        
         Args:
-            format: Export format (json, csv)
+            format: Export format, one of EXPORT_FORMATS
             output_path: Path to save the export file
-        """
-        if not output_path:
-            output_path = Path(f"codechrono_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}")
+            start_time: Only export events at or after this time
+            end_time: Only export events before this time
             
-        if format == "json":
-            with open(output_path, "w") as f:
-                json.dump(self.activity_log, f, indent=2)
-        elif format == "csv":
-            import csv
-            with open(output_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["file_path", "timestamp", "event_type"])
-                for file_path, events in self.activity_log.items():
-                    for event in events:
-                        writer.writerow([file_path, event["timestamp"], event["event_type"]])
-        else:
+        Returns:
+            Number of exported events
+        """
+        if format not in EXPORT_FORMATS:
             raise ValueError(f"Unsupported export format: {format}")
+        if not output_path:
+            extension = EXPORT_EXTENSIONS[format]
+            output_path = Path(f"codechrono_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}")
             
-        logger.info(f"Exported activity data to {output_path}") 
\ No newline at end of file
+        return export_events(
+            self.iter_raw_events(start_time, end_time),
+            format,
+            output_path,
+            self.config.get("export_chunk_size", DEFAULT_CHUNK_SIZE),
+        )
+        
+    def close(self) -> None:
+        """End open sessions, then flush and close the on-disk event log and the tiers."""
+        if self.sessions is not None:
+            self.sessions.stop()
+        if self.event_log is not None:
+            self.event_log.close()
+        if self.event_tiers is not None:
+            self.event_tiers.close()
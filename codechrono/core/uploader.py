@@ -0,0 +1,244 @@
+"""
+Upload of local history to a team collector.
+
+An Uploader follows one local stream (the session store of the legacy
+tracker, or the event log of ``codechrono start``) and sends it to a
+collector in gzip-compressed JSON batches. The position reached is the
+collector's per-host cursor: it is fetched when the uploader starts and
+advanced by each acknowledged batch, so nothing is kept locally and an
+upload interrupted at any point resumes from the last stored batch. Failed
+uploads are retried with exponential backoff and jitter, leaving the local
+store as the buffer while the collector is unreachable.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import gzip
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .eventlog import EventLog
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RECORDS_UPLOADED = REGISTRY.counter("codechrono_upload_records_total", "Records acknowledged by the collector")
+UPLOAD_FAILURES = REGISTRY.counter("codechrono_upload_failures_total", "Failed uploads to the collector")
+
+# Reads up to ``limit`` records after a cursor: (records, next cursor)
+BatchReader = Callable[[str, int], Tuple[List[Dict], str]]
+
+
+def session_batches(repository, compact_interval: float = 900.0) -> BatchReader:
+    """
+    Follow the sessions of a SessionRepository, by row id in its store.
+
+    Only sessions compacted into the store are uploaded. Compaction rewrites
+    the snapshot, so rather than compacting on every upload this reader
+    moves journaled sessions into the store at most once per
+    ``compact_interval`` seconds; in between, they wait for the regular
+    compaction or the next allowed one.
+
+    Args:
+        repository: Repository of the recording tracker
+        compact_interval: Minimum seconds between compactions triggered by
+            uploads
+
+    Returns:
+        Batch reader for an Uploader of the "sessions" stream
+    """
+    last_compaction: Optional[float] = None
+
+    def read(cursor: str, limit: int) -> Tuple[List[Dict], str]:
+        nonlocal last_compaction
+        now = time.monotonic()
+        if last_compaction is None or now - last_compaction >= compact_interval:
+            with repository.lock:
+                if repository.data["sessions"]:
+                    repository.compact()
+                    last_compaction = now
+        sessions, row_id = repository.store.sessions_after(int(cursor or 0), limit)
+        return sessions, str(row_id)
+
+    return read
+
+
+def event_batches(event_log: EventLog, resolve_project: Callable[[str], Optional[str]]) -> BatchReader:
+    """
+    Follow an event log, by its read_from() cursor.
+
+    Args:
+        event_log: Event log of the tracker
+        resolve_project: Maps a file path to its project name or None
+
+    Returns:
+        Batch reader for an Uploader of the "events" stream
+    """
+    def read(cursor: str, limit: int) -> Tuple[List[Dict], str]:
+        events, cursor = event_log.read_from(cursor or "0:0", limit)
+        return [
+            {
+                "timestamp": timestamp,
+                "path": path,
+                "event_type": event_type,
+                "language": language,
+                "project": resolve_project(path),
+            }
+            for timestamp, path, event_type, language in events
+        ], cursor
+
+    return read
+
+
+class Uploader:
+    """
+    Sends one local stream to a collector from a background thread.
+
+    Attributes:
+        url (str): Base URL of the collector
+        stream (str): "sessions" or "events"
+        host (str): Name this machine uploads under
+        cursor (Optional[str]): Position acknowledged by the collector, None
+            until it has been fetched
+        uploaded (int): Records sent since starting
+        failures (int): Consecutive failed attempts
+    """
+
+    def __init__(
+        self,
+        url: str,
+        stream: str,
+        read_batch: BatchReader,
+        host: Optional[str] = None,
+        token: Optional[str] = None,
+        batch_size: int = 500,
+        interval: float = 30.0,
+        max_backoff: float = 600.0,
+        timeout: float = 10.0,
+    ) -> None:
+        """
+        Initialize the uploader.
+
+        Args:
+            url: Base URL of the collector, e.g. http://team-server:5050
+            stream: "sessions" or "events"
+            read_batch: Reads records after a cursor, see session_batches()
+                and event_batches()
+            host: Name to upload under, defaults to the host name
+            token: Bearer token expected by the collector, if any
+            batch_size: Maximum records per request
+            interval: Seconds between uploads once caught up
+            max_backoff: Upper bound of the retry delay in seconds
+            timeout: Seconds to wait for each HTTP request
+        """
+        self.url = url.rstrip("/")
+        self.stream = stream
+        self.read_batch = read_batch
+        self.host = host or socket.gethostname()
+        self.token = token
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cursor: Optional[str] = None
+        self.uploaded = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Uploader":
+        """Upload from a daemon thread until stop() is called."""
+        self._thread = threading.Thread(target=self._run, name=f"codechrono-upload-{self.stream}", daemon=True)
+        self._thread.start()
+        logger.info(f"Uploading {self.stream} as {self.host} to {self.url}")
+        return self
+
+    def stop(self, drain: bool = True) -> None:
+        """
+        Stop the background thread.
+
+        Args:
+            drain: Make a last attempt to upload what is pending
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if drain:
+            try:
+                self.upload_pending()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not upload pending {self.stream} to {self.url}: {e}")
+
+    def upload_pending(self) -> int:
+        """
+        Upload batches until the local stream is exhausted.
+
+        Returns:
+            Number of records sent
+
+        Raises:
+            OSError: If the collector cannot be reached or rejects a batch
+        """
+        if self.cursor is None:
+            self.cursor = self._request("GET", "/api/cursor", {"host": self.host, "stream": self.stream})["cursor"] or ""
+        sent = 0
+        while True:
+            records, next_cursor = self.read_batch(self.cursor, self.batch_size)
+            if not records:
+                return sent
+            self._request("POST", "/api/ingest", body={
+                "host": self.host,
+                "stream": self.stream,
+                "cursor": next_cursor,
+                "records": records,
+            })
+            self.cursor = next_cursor
+            sent += len(records)
+            self.uploaded += len(records)
+            RECORDS_UPLOADED.inc(len(records))
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next attempt, backing off after failures."""
+        if not self.failures:
+            return self.interval
+        delay = min(self.max_backoff, self.interval * 2 ** min(self.failures, 16))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self) -> None:
+        """Upload periodically until stopped."""
+        while not self._stop.is_set():
+            try:
+                self.upload_pending()
+                self.failures = 0
+            except (OSError, ValueError) as e:
+                self.failures += 1
+                UPLOAD_FAILURES.inc()
+                logger.warning(f"Upload of {self.stream} to {self.url} failed ({self.failures} in a row): {e}")
+            self._stop.wait(self.next_delay())
+
+    def _request(self, method: str, path: str, query: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+        """Make one request to the collector and decode its JSON reply."""
+        url = self.url + path
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = gzip.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), compresslevel=6)
+            headers.update({"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            detail = e.read()[:200].decode("utf-8", "replace")
+            raise OSError(f"Collector answered {e.code}: {detail}") from e
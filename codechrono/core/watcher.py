@@ -1,17 +1,122 @@
 """
 File system watching functionality for CodeChrono.
 
-This module handles monitoring file system changes using watchdog.
+This module handles monitoring file system changes using watchdog and
+coalescing the bursts of events editors emit for a single save.
 """
 
 from pathlib import Path
-from typing import Callable, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import logging
+import threading
+import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
+from .dispatch import BoundedEventQueue, EventWorker
+from .metrics import EVENTS_COALESCED, EVENTS_IGNORED, EVENTS_RECEIVED, HANDLER_LATENCY, QUEUE_DEPTH
+from .planner import WatchPlanner
+from .scheduler import DeadlineScheduler
+from ..utils.ignore import IgnoreMatcher
+
 logger = logging.getLogger(__name__)
 
+# Result of an event following another one for the same path; None cancels both
+COALESCE_RULES: Dict[Tuple[str, str], Optional[str]] = {
+    ("created", "modified"): "created",
+    ("created", "deleted"): None,
+    ("modified", "created"): "modified",
+    ("modified", "deleted"): "deleted",
+    ("deleted", "created"): "modified",
+    ("deleted", "modified"): "modified",
+}
+
+class EventCoalescer:
+    """
+    Merges events for the same path that arrive within a time window.
+    
+    A path is released once no event has arrived for it for ``window``
+    seconds, or ``max_delay`` seconds after its first pending event so a file
+    that is written continuously still gets reported. Release times are kept
+    in a DeadlineScheduler, so callers can sleep until the next one.
+    
+    Attributes:
+        window (float): Quiet period in seconds before a path is released
+        max_delay (float): Upper bound on how long a path is held back
+    """
+    
+    def __init__(self, window: float = 0.5, max_delay: Optional[float] = None) -> None:
+        """
+        Initialize the coalescer.
+        
+        Args:
+            window: Quiet period in seconds before a path is released
+            max_delay: Longest time a path is held, defaults to 4 * window
+        """
+        self.window = window
+        self.max_delay = max_delay if max_delay is not None else window * 4
+        self._pending: Dict[Path, List] = {}
+        self._releases = DeadlineScheduler()
+        self._lock = threading.Lock()
+        
+    def add(self, file_path: Path, event_type: str) -> None:
+        """
+        Record an event, merging it with the pending one for the same path.
+        
+        Args:
+            file_path: Path of the changed file
+            event_type: Type of change (created, modified, deleted)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(file_path)
+            if entry is None:
+                self._pending[file_path] = [event_type, now]
+                self._releases.schedule(file_path, now + self.window)
+                return
+            EVENTS_COALESCED.inc()
+            merged = COALESCE_RULES.get((entry[0], event_type), event_type)
+            if merged is None:
+                del self._pending[file_path]
+                self._releases.cancel(file_path)
+            else:
+                entry[0] = merged
+                self._releases.schedule(file_path, min(now + self.window, entry[1] + self.max_delay))
+                
+    def flush(self, force: bool = False) -> List[Tuple[Path, str]]:
+        """
+        Release the paths whose window has elapsed.
+        
+        Args:
+            force: Release every pending path regardless of timing
+            
+        Returns:
+            List of (file_path, event_type); with ``force`` in order of first
+            occurrence, otherwise in order of release time
+        """
+        with self._lock:
+            if force:
+                ready = list(self._pending)
+                self._releases = DeadlineScheduler()
+            else:
+                ready = self._releases.pop_expired(time.monotonic())
+            return [(path, self._pending.pop(path)[0]) for path in ready]
+            
+    def next_release(self) -> Optional[float]:
+        """
+        Return the seconds until the next pending path is due.
+        
+        Returns:
+            Seconds (possibly negative if overdue), or None if nothing is pending
+        """
+        with self._lock:
+            deadline = self._releases.next_deadline()
+        return None if deadline is None else deadline - time.monotonic()
+            
+    def __len__(self) -> int:
+        """Return the number of paths with pending events."""
+        return len(self._pending)
+
 class CodeChangeHandler(FileSystemEventHandler):
     """
     Handles file system events for code changes.
@@ -19,18 +124,32 @@ class CodeChangeHandler(FileSystemEventHandler):
     Attributes:
         callback (Callable): Function to call when changes are detected
         exclude_patterns (Set[str]): Patterns to exclude from monitoring
+        ignore_matcher (IgnoreMatcher): Compiled form of exclude_patterns
+        directory_callback (Optional[Callable]): Function called with new directories
     """
     
-    def __init__(self, callback: Callable[[Path, str], None], exclude_patterns: Optional[Set[str]] = None) -> None:
+    def __init__(
+        self,
+        callback: Callable[[Path, str], None],
+        exclude_patterns: Optional[Set[str]] = None,
+        directory_callback: Optional[Callable[[Path], None]] = None,
+    ) -> None:
         """
         Initialize the change handler.
         
         Args:
             callback: Function to call with (file_path, event_type)
-            exclude_patterns: Set of patterns to exclude from monitoring
+            exclude_patterns: Set of patterns to exclude from monitoring; globs
+                match path components, plain strings match anywhere in the path
+            directory_callback: Optional function called on the observer
+                thread with each created or moved-in directory, ignored or not
+                (e.g. to notice a new repository's .git directory); it must
+                be cheap
         """
         self.callback = callback
+        self.directory_callback = directory_callback
         self.exclude_patterns = exclude_patterns or set()
+        self.ignore_matcher = IgnoreMatcher.from_exclude_patterns(self.exclude_patterns)
         
     def on_any_event(self, event: FileSystemEvent) -> None:
         """
@@ -39,37 +158,136 @@ class CodeChangeHandler(FileSystemEventHandler):
         Args:
             event: The file system event that occurred
         """
+        EVENTS_RECEIVED.inc()
+        with HANDLER_LATENCY.time():
+            self._handle(event)
+            
+    def _handle(self, event: FileSystemEvent) -> None:
+        """Route an event to the directory callback or _dispatch()."""
         if event.is_directory:
+            if self.directory_callback is not None and event.event_type in ("created", "moved"):
+                self.directory_callback(Path(getattr(event, "dest_path", "") or event.src_path))
             return
             
-        file_path = Path(event.src_path)
-        
-        # Skip excluded files
-        if any(pattern in str(file_path) for pattern in self.exclude_patterns):
-            return
+        # Editors save atomically by renaming a temporary file over the
+        # target; report that as the temporary going away and the target
+        # being modified.
+        if event.event_type == "moved":
+            self._dispatch(event.src_path, "deleted")
+            self._dispatch(event.dest_path, "modified")
+        elif event.event_type in ["created", "modified", "deleted"]:
+            self._dispatch(event.src_path, event.event_type)
             
-        if event.event_type in ["created", "modified", "deleted"]:
-            self.callback(file_path, event.event_type)
+    def _dispatch(self, path: str, event_type: str) -> None:
+        """Pass an event on to the callback unless the path is excluded."""
+        if self.ignore_matcher.is_ignored(path):
+            EVENTS_IGNORED.inc()
+            return
+        self.callback(Path(path), event_type)
             
 class FileWatcher:
     """
     Watches directories for file changes.
     
+    The observer thread only puts events on a bounded queue. A worker
+    thread runs them through an EventCoalescer and delivers them either one at
+    a time to ``callback`` or as lists to ``batch_callback``, so a slow
+    callback never blocks the observer.
+    
     Attributes:
         observer (Observer): Watchdog observer instance
         handler (CodeChangeHandler): Event handler instance
+        queue (BoundedEventQueue): Events waiting for the worker
+        worker (EventWorker): Thread running coalescing and callbacks
+        planner (WatchPlanner): Schedules pruned, budget-aware watches
+        coalescer (Optional[EventCoalescer]): Merges duplicate events, None if disabled
+        events_received (int): Events accepted by the handler
+        events_delivered (int): Events passed on after coalescing
     """
     
-    def __init__(self, callback: Callable[[Path, str], None], exclude_patterns: Optional[Set[str]] = None) -> None:
+    def __init__(
+        self,
+        callback: Callable[[Path, str], None],
+        exclude_patterns: Optional[Set[str]] = None,
+        coalesce_window: float = 0.5,
+        batch_callback: Optional[Callable[[List[Tuple[Path, str]]], None]] = None,
+        queue_size: int = 10000,
+        overflow: str = "coalesce",
+        directory_callback: Optional[Callable[[Path], None]] = None,
+        watch_budget: Optional[int] = None,
+    ) -> None:
         """
         Initialize the file watcher.
         
         Args:
             callback: Function to call when changes are detected
             exclude_patterns: Set of patterns to exclude from monitoring
+            coalesce_window: Seconds to merge events for the same path, 0 disables
+            batch_callback: Optional function receiving each batch of
+                coalesced events instead of ``callback``
+            queue_size: Maximum number of events waiting for the worker
+            overflow: Queue overflow policy, "drop-oldest" or "coalesce"
+            directory_callback: Optional function called on the observer
+                thread with each new directory
+            watch_budget: Directories that may be watched natively, defaults
+                to half of the inotify watch limit
         """
+        self.callback = callback
+        self.batch_callback = batch_callback
+        self.events_received = 0
+        self.events_delivered = 0
+        self.coalescer = EventCoalescer(coalesce_window) if coalesce_window > 0 else None
         self.observer = Observer()
-        self.handler = CodeChangeHandler(callback, exclude_patterns)
+        self.queue = BoundedEventQueue(queue_size, overflow)
+        QUEUE_DEPTH.set_function(lambda: len(self.queue))
+        self.directory_callback = directory_callback
+        self.handler = CodeChangeHandler(self._enqueue, exclude_patterns, self._directory_created)
+        self.planner = WatchPlanner(self.observer, self.handler, self.handler.ignore_matcher, watch_budget)
+        if self.coalescer is None:
+            self.worker = EventWorker(self.queue, self._receive)
+        else:
+            self.worker = EventWorker(
+                self.queue, self._receive, tick=self._flush, tick_delay=self.coalescer.next_release
+            )
+        
+    def _enqueue(self, file_path: Path, event_type: str) -> None:
+        """Queue an event from the handler (runs on the observer thread)."""
+        self.queue.put(file_path, (file_path, event_type))
+        
+    def _directory_created(self, path: Path) -> None:
+        """Extend the watches to a new directory (runs on the observer thread)."""
+        try:
+            self.planner.directory_created(str(path))
+        except OSError as e:
+            logger.warning(f"Failed to watch new directory {path}: {e}")
+        if self.directory_callback is not None:
+            self.directory_callback(path)
+            
+    def _receive(self, file_path: Path, event_type: str) -> None:
+        """Accept a queued event (runs on the worker thread)."""
+        self.events_received += 1
+        if self.coalescer is None:
+            self._deliver([(file_path, event_type)])
+        else:
+            self.coalescer.add(file_path, event_type)
+            
+    def _flush(self, force: bool = False) -> None:
+        """Deliver the coalesced events that are ready."""
+        batch = self.coalescer.flush(force)
+        if batch:
+            self._deliver(batch)
+            
+    def _deliver(self, batch: List[Tuple[Path, str]]) -> None:
+        """Hand a batch of events to the configured callback."""
+        self.events_delivered += len(batch)
+        try:
+            if self.batch_callback is not None:
+                self.batch_callback(batch)
+            else:
+                for file_path, event_type in batch:
+                    self.callback(file_path, event_type)
+        except Exception:
+            logger.exception("Event callback failed")
         
     def start_watching(self, paths: List[Path]) -> None:
         """
@@ -78,18 +296,45 @@ class FileWatcher:
         Args:
             paths: List of paths to watch
         """
+        roots = []
         for path in paths:
             if not path.exists():
                 logger.warning(f"Path does not exist: {path}")
                 continue
                 
-            self.observer.schedule(self.handler, str(path), recursive=True)
+            self.handler.ignore_matcher.add_gitignore(path)
+            roots.append(str(path))
             logger.info(f"Started watching: {path}")
             
+        self.planner.schedule(roots)
+        self.worker.start()
         self.observer.start()
         
     def stop_watching(self) -> None:
-        """Stop watching all paths."""
+        """Stop watching all paths and deliver any pending events."""
         self.observer.stop()
         self.observer.join()
-        logger.info("Stopped watching all paths") 
\ No newline at end of file
+        self.planner.stop()
+        self.worker.stop()
+        if self.coalescer is not None:
+            self._flush(force=True)
+        logger.info(
+            f"Stopped watching all paths ({self.events_received} events received, "
+            f"{self.events_delivered} delivered)"
+        )
+        
+    def stats(self) -> Dict[str, int]:
+        """
+        Report event counters.
+        
+        Returns:
+            Dictionary with received, delivered and pending event counts
+            and the queue and watch plan metrics under "queue" and "watches"
+        """
+        return {
+            "events_received": self.events_received,
+            "events_delivered": self.events_delivered,
+            "events_pending": len(self.coalescer) if self.coalescer is not None else 0,
+            "queue": self.queue.stats(),
+            "watches": self.planner.report(),
+        } 
\ No newline at end of file
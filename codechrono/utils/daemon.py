@@ -0,0 +1,161 @@
+"""
+Process management helpers for CodeChrono.
+
+This module turns the tracker into a background daemon with a pidfile and
+lets the CLI block until a shutdown signal arrives without using any CPU.
+"""
+
+from pathlib import Path
+from typing import Callable, Optional
+import atexit
+import logging
+import os
+import signal
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIDFILE = Path.home() / ".codechrono.pid"
+
+
+def read_pid(pidfile: Path) -> Optional[int]:
+    """
+    Read the process id stored in a pidfile.
+
+    Args:
+        pidfile: Path of the pidfile
+
+    Returns:
+        The pid, or None if the file is missing or malformed
+    """
+    try:
+        return int(pidfile.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def is_running(pid: int) -> bool:
+    """
+    Check whether a process with the given pid exists.
+
+    Args:
+        pid: Process id
+
+    Returns:
+        True if the process is alive
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_pidfile(pidfile: Path) -> None:
+    """
+    Record the current pid and remove the file again at exit.
+
+    Args:
+        pidfile: Path of the pidfile
+
+    Raises:
+        RuntimeError: If another live process owns the pidfile
+    """
+    pid = read_pid(pidfile)
+    if pid is not None and pid != os.getpid() and is_running(pid):
+        raise RuntimeError(f"CodeChrono is already running with pid {pid} ({pidfile})")
+    pidfile.write_text(f"{os.getpid()}\n")
+    atexit.register(remove_pidfile, pidfile)
+
+
+def remove_pidfile(pidfile: Path) -> None:
+    """
+    Remove the pidfile if it belongs to the current process.
+
+    Args:
+        pidfile: Path of the pidfile
+    """
+    if read_pid(pidfile) == os.getpid():
+        try:
+            pidfile.unlink()
+        except OSError:
+            pass
+
+
+def daemonize(pidfile: Path, log_file: Optional[Path] = None) -> None:
+    """
+    Detach from the terminal using the classic double fork.
+
+    Must be called before any threads are started. The parent process exits;
+    only the daemon returns from this function.
+
+    Args:
+        pidfile: Path where the daemon's pid is written
+        log_file: Optional file receiving stdout, stderr and log output
+
+    Raises:
+        RuntimeError: If another daemon is already running
+    """
+    pid = read_pid(pidfile)
+    if pid is not None and is_running(pid):
+        raise RuntimeError(f"CodeChrono is already running with pid {pid} ({pidfile})")
+
+    if os.fork() > 0:
+        os._exit(0)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with open(os.devnull, "rb") as devnull:
+        os.dup2(devnull.fileno(), sys.stdin.fileno())
+    with open(log_file or os.devnull, "ab") as out:
+        os.dup2(out.fileno(), sys.stdout.fileno())
+        os.dup2(out.fileno(), sys.stderr.fileno())
+    if log_file:
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.INFO,
+            format="%(asctime)s %(name)s %(levelname)s %(message)s",
+        )
+
+    write_pidfile(pidfile)
+
+
+def wait_for_shutdown(
+    on_signal: Optional[Callable[[int], None]] = None, stop: Optional[threading.Event] = None
+) -> Optional[int]:
+    """
+    Block the calling (main) thread until SIGINT or SIGTERM arrives.
+
+    The thread sleeps on an event, so waiting costs no CPU.
+
+    Args:
+        on_signal: Optional function called with the signal number
+        stop: Optional event another thread may set to end the wait
+
+    Returns:
+        The signal number that ended the wait, or None if ``stop`` was set
+    """
+    if stop is None:
+        stop = threading.Event()
+    received = []
+
+    def handle(signum, frame):
+        received.append(signum)
+        if on_signal is not None:
+            on_signal(signum)
+        stop.set()
+
+    previous = {sig: signal.signal(sig, handle) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        while not stop.wait(3600):
+            pass
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    return received[0] if received else None
@@ -0,0 +1,284 @@
+"""
+Path ignore matching for CodeChrono.
+
+This module compiles glob patterns, plain substrings and .gitignore rules into
+a few regular expressions once, and caches the verdict for every directory it
+has seen, so checking an event path costs a cache hit plus one match on the
+file name instead of an fnmatch call per path component and pattern.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import fnmatch
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+GLOB_CHARS = frozenset("*?[")
+
+
+def _gitignore_regex(pattern: str) -> str:
+    """
+    Translate one .gitignore glob into a regex matching a repo-relative path.
+
+    Args:
+        pattern: Glob with any leading "!" and trailing "/" already removed
+
+    Returns:
+        Regular expression source matching the whole relative path
+    """
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.lstrip("/")
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(out) + r"\Z"
+
+
+class GitignoreRules:
+    """
+    Compiled rules from one .gitignore file.
+
+    All rules are combined into a single alternation, last rule first, so the
+    first alternative that matches is the rule git would apply and its group
+    name tells whether it was a negation.
+
+    Attributes:
+        root (str): Directory containing the .gitignore file
+    """
+
+    def __init__(self, root: str, lines: Iterable[str]) -> None:
+        """
+        Compile .gitignore lines.
+
+        Args:
+            root: Directory the rules are relative to
+            lines: Raw lines of the .gitignore file
+        """
+        self.root = root
+        dir_rules: List[str] = []
+        file_rules: List[str] = []
+        for index, line in enumerate(lines):
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            group = f"{'n' if negated else 'p'}{index}"
+            source = f"(?P<{group}>{_gitignore_regex(line.rstrip('/'))})"
+            dir_rules.append(source)
+            if not dir_only:
+                file_rules.append(source)
+        self._dir_re = self._compile(dir_rules)
+        self._file_re = self._compile(file_rules)
+
+    @staticmethod
+    def _compile(rules: List[str]) -> Optional["re.Pattern[str]"]:
+        """Combine rules into one regex that tries the last rule first."""
+        if not rules:
+            return None
+        return re.compile("|".join(reversed(rules)))
+
+    def ignores(self, relative_path: str, is_dir: bool) -> bool:
+        """
+        Check whether a repo-relative path is ignored by these rules.
+
+        Args:
+            relative_path: Path relative to root, "/"-separated
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the last matching rule ignores the path
+        """
+        regex = self._dir_re if is_dir else self._file_re
+        if regex is None:
+            return False
+        match = regex.match(relative_path)
+        return match is not None and match.lastgroup[0] == "p"
+
+
+_NOT_IGNORED: Tuple[bool, Optional[GitignoreRules], str] = (False, None, "")
+_IGNORED: Tuple[bool, Optional[GitignoreRules], str] = (True, None, "")
+
+
+class IgnoreMatcher:
+    """
+    Decides whether file system event paths should be ignored.
+
+    A path is ignored when any of its components matches a glob pattern, the
+    path contains one of the plain substrings, or a .gitignore of a watched
+    repository excludes it or one of its parent directories.
+
+    Attributes:
+        patterns (List[str]): Glob patterns matched against path components
+        substrings (List[str]): Plain strings searched for in the whole path
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str] = (),
+        substrings: Iterable[str] = (),
+        cache_size: int = 4096,
+    ) -> None:
+        """
+        Compile the patterns.
+
+        Args:
+            patterns: fnmatch-style globs applied to each path component
+            substrings: Strings that exclude any path containing them
+            cache_size: Number of directory verdicts kept in the LRU cache
+        """
+        self.patterns = list(patterns)
+        self.substrings = list(substrings)
+        self._part_re = (
+            re.compile("|".join(fnmatch.translate(os.path.normcase(p)) for p in self.patterns))
+            if self.patterns else None
+        )
+        self._substring_re = (
+            re.compile("|".join(re.escape(os.path.normcase(s)) for s in self.substrings))
+            if self.substrings else None
+        )
+        self._gitignores: Dict[str, GitignoreRules] = {}
+        self._dir_verdict = lru_cache(maxsize=cache_size)(self._compute_dir_verdict)
+
+    @classmethod
+    def from_exclude_patterns(cls, exclude_patterns: Iterable[str], **kwargs) -> "IgnoreMatcher":
+        """
+        Build a matcher from config-style exclude patterns.
+
+        Entries containing glob characters are matched against path
+        components; the others exclude any path that contains them.
+
+        Args:
+            exclude_patterns: Mixed glob and plain exclude patterns
+            **kwargs: Passed through to the constructor
+
+        Returns:
+            Configured matcher
+        """
+        patterns = [p for p in exclude_patterns if GLOB_CHARS & set(p)]
+        substrings = [p for p in exclude_patterns if not GLOB_CHARS & set(p)]
+        return cls(patterns, substrings, **kwargs)
+
+    def add_gitignore(self, root: Path) -> bool:
+        """
+        Load the .gitignore at the top of a watched repository.
+
+        Args:
+            root: Watched directory
+
+        Returns:
+            True if a .gitignore file was found and loaded
+        """
+        gitignore = root / ".gitignore"
+        if not gitignore.is_file():
+            return False
+        try:
+            with open(gitignore, encoding="utf-8", errors="replace") as f:
+                rules = GitignoreRules(str(root), f)
+        except (OSError, re.error) as e:
+            logger.warning(f"Failed to load {gitignore}: {e}")
+            return False
+        self._gitignores[os.path.normcase(os.path.abspath(root))] = rules
+        self._dir_verdict.cache_clear()
+        return True
+
+    def is_ignored(self, path: str) -> bool:
+        """
+        Check whether a file path should be ignored.
+
+        Args:
+            path: Path reported by the file system event
+
+        Returns:
+            True if the path is excluded
+        """
+        path = os.path.normcase(path)
+        directory, name = os.path.split(path)
+        ignored, rules, relative = self._dir_verdict(directory)
+        if ignored:
+            return True
+        if self._part_re is not None and self._part_re.match(name):
+            return True
+        if self._substring_re is not None and self._substring_re.search(path):
+            return True
+        if rules is not None:
+            return rules.ignores(f"{relative}/{name}" if relative else name, is_dir=False)
+        return False
+
+    def is_ignored_dir(self, path: str) -> bool:
+        """
+        Check whether a directory, and therefore everything below it, is ignored.
+
+        Unlike is_ignored(), gitignore rules are applied with directory
+        semantics, so "build/" style patterns match.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            True if the directory is excluded
+        """
+        return self._dir_verdict(os.path.normcase(path))[0]
+
+    def cache_info(self):
+        """Return hit/miss statistics of the directory verdict cache."""
+        return self._dir_verdict.cache_info()
+
+    def _compute_dir_verdict(self, directory: str) -> Tuple[bool, Optional[GitignoreRules], str]:
+        """
+        Compute (ignored, gitignore rules in scope, path relative to their root).
+
+        Builds on the cached verdict of the parent directory, so each new
+        directory costs a single component match.
+        """
+        parent, name = os.path.split(directory)
+        if not name:
+            return _NOT_IGNORED
+        ignored, rules, relative = self._dir_verdict(parent)
+        if ignored:
+            return _IGNORED
+        if self._part_re is not None and self._part_re.match(name):
+            return _IGNORED
+        if self._substring_re is not None and self._substring_re.search(directory):
+            return _IGNORED
+
+        own_rules = self._gitignores.get(directory)
+        if own_rules is not None:
+            return (False, own_rules, "")
+        if rules is not None:
+            relative = f"{relative}/{name}" if relative else name
+            if rules.ignores(relative, is_dir=True):
+                return _IGNORED
+        return (False, rules, relative)
@@ -0,0 +1,139 @@
+"""
+Language detection for CodeChrono.
+
+This module maps file paths to programming languages through a registry that
+is inverted once into extension and file name dictionaries, so each lookup is
+a couple of dict probes regardless of how many languages are registered.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_LANGUAGE = "other"
+
+# Language detection by file extension
+LANGUAGE_EXTENSIONS: Dict[str, list] = {
+    'python': ['.py', '.pyx', '.pyi', '.pyw'],
+    'javascript': ['.js', '.jsx', '.mjs'],
+    'typescript': ['.ts', '.tsx', '.d.ts'],
+    'java': ['.java'],
+    'c++': ['.cpp', '.hpp', '.cc', '.h'],
+    'rust': ['.rs'],
+    'go': ['.go'],
+    'ruby': ['.rb'],
+    'php': ['.php'],
+    'swift': ['.swift'],
+    'kotlin': ['.kt'],
+    'html': ['.html', '.htm'],
+    'css': ['.css', '.scss', '.sass'],
+    'markdown': ['.md', '.markdown'],
+}
+
+# Language detection by exact file name, for files without a telling extension
+LANGUAGE_FILENAMES: Dict[str, str] = {
+    'Makefile': 'make',
+    'GNUmakefile': 'make',
+    'Dockerfile': 'docker',
+    'Rakefile': 'ruby',
+    'Gemfile': 'ruby',
+}
+
+
+class LanguageRegistry:
+    """
+    Inverted extension/file name to language lookup.
+
+    Attributes:
+        extensions (Dict[str, str]): Lower-case extension (".py", ".d.ts") to language
+        filenames (Dict[str, str]): Exact file name ("Makefile") to language
+    """
+
+    def __init__(
+        self,
+        languages: Mapping[str, Iterable[str]] = LANGUAGE_EXTENSIONS,
+        filenames: Mapping[str, str] = LANGUAGE_FILENAMES,
+    ) -> None:
+        """
+        Build the lookup tables.
+
+        Args:
+            languages: Mapping of language to its extensions
+            filenames: Mapping of exact file name to language
+        """
+        self.extensions: Dict[str, str] = {}
+        self.filenames: Dict[str, str] = dict(filenames)
+        self._max_ext_parts = 1
+        for language, extensions in languages.items():
+            self.register(language, extensions)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "LanguageRegistry":
+        """
+        Build the default registry extended with the config's "languages".
+
+        Each entry maps a language to a list of extensions (starting with
+        ".") or exact file names, e.g. {"zig": [".zig"], "make": ["Justfile"]}.
+
+        Args:
+            config: Parsed configuration file, may be None
+
+        Returns:
+            Registry including the user-defined languages
+        """
+        registry = cls()
+        for language, entries in ((config or {}).get("languages") or {}).items():
+            if isinstance(entries, str):
+                entries = [entries]
+            registry.register(language, entries)
+        return registry
+
+    def register(self, language: str, entries: Iterable[str]) -> None:
+        """
+        Add extensions or file names for a language, overriding earlier ones.
+
+        Args:
+            language: Language name
+            entries: Extensions (".zig", ".d.ts") or exact file names
+        """
+        for entry in entries:
+            if entry.startswith("."):
+                ext = entry.lower()
+                self.extensions[ext] = language
+                self._max_ext_parts = max(self._max_ext_parts, ext.count("."))
+            else:
+                self.filenames[entry] = language
+
+    def get_language(self, file_path: str) -> str:
+        """
+        Detect the language of a file.
+
+        Exact file names win over extensions, and longer multi-part
+        extensions (".d.ts") win over their last part (".ts").
+
+        Args:
+            file_path: Path of the file
+
+        Returns:
+            Language name, or "other" if unknown
+        """
+        name = os.path.basename(file_path)
+        language = self.filenames.get(name)
+        if language is not None:
+            return language
+
+        lowered = name.lower()
+        start = lowered.find(".", 1)
+        if start < 0:
+            return UNKNOWN_LANGUAGE
+        if self._max_ext_parts == 1:
+            return self.extensions.get(lowered[lowered.rfind("."):], UNKNOWN_LANGUAGE)
+
+        parts = lowered[start:].split(".")[1:]
+        for count in range(min(len(parts), self._max_ext_parts), 0, -1):
+            language = self.extensions.get("." + ".".join(parts[-count:]))
+            if language is not None:
+                return language
+        return UNKNOWN_LANGUAGE
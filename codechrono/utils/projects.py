@@ -0,0 +1,232 @@
+"""
+Project attribution for CodeChrono.
+
+This module maps file paths to the project that owns them. Project roots are
+the watched directories plus the git repositories found beneath them; they
+are kept in a trie of path components, so resolving a path costs one dict
+lookup per component and never touches the filesystem. Nested roots win over
+their parents (a repository inside a watched monorepo directory owns its
+files). A root keeps the name it was first given, and the names are saved
+to a file shared by every command, so a directory is attributed to the same
+project by the trackers and by backfill.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+NO_PROJECT = "(none)"
+
+# Root → name mapping shared by the trackers and backfill
+DEFAULT_PROJECTS_FILE = Path.home() / ".codechrono" / "projects.json"
+
+# Directories never searched for nested repositories
+SKIP_DIRS = frozenset({"node_modules", "venv", ".venv", "__pycache__", "dist", "build", "target"})
+
+
+def _components(path: str) -> Tuple[str, ...]:
+    """Split an absolute, normalized path into its components."""
+    return tuple(part for part in os.path.abspath(path).split(os.sep) if part)
+
+
+class ProjectTrie:
+    """
+    Prefix trie from path components to project names.
+
+    Each node is a dict of child components; the name of a project rooted at
+    a node is stored under the ``None`` key.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty trie."""
+        self._root: Dict = {}
+        self._roots: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, root: str, name: Optional[str] = None) -> str:
+        """
+        Register a project root.
+
+        Without a name, the project is named after the directory, or after
+        as many trailing path components as it takes to tell it apart from
+        the roots already registered: /work/a/api and then /work/b/api
+        become "api" and "b/api". Registered roots are never renamed.
+
+        Args:
+            root: Directory owning the project's files
+            name: Project name, defaults to a unique name derived from the path
+
+        Returns:
+            The project name
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self._roots and not name:
+                return self._roots[root]
+            self._set_name(root, name or self._default_name(root))
+        return self._roots[root]
+
+    def _default_name(self, root: str) -> str:
+        """Name a root after its shortest path suffix no other root shares (called with the lock held)."""
+        parts = _components(root)
+        names = set(self._roots.values())
+        for depth in range(1, len(parts) + 1):
+            name = "/".join(parts[-depth:])
+            clashes = any(_components(other)[-depth:] == parts[-depth:] for other in self._roots)
+            if not clashes and name not in names:
+                return name
+        return root
+
+    def _set_name(self, root: str, name: str) -> None:
+        """Store a root's name in the trie (called with the lock held)."""
+        node = self._root
+        for part in _components(root):
+            node = node.setdefault(part, {})
+        node[None] = name
+        self._roots[root] = name
+
+    def resolve(self, path: str) -> Optional[str]:
+        """
+        Find the project of a path.
+
+        Args:
+            path: File or directory path
+
+        Returns:
+            Name of the deepest project root containing the path, or None
+        """
+        node = self._root
+        project = node.get(None)
+        for part in _components(path):
+            node = node.get(part)
+            if node is None:
+                break
+            project = node.get(None, project)
+        return project
+
+    def roots(self) -> Dict[str, str]:
+        """Return a copy of the registered root → name mapping."""
+        with self._lock:
+            return dict(self._roots)
+
+    def __contains__(self, root: str) -> bool:
+        """Return True if ``root`` is a registered project root."""
+        return os.path.abspath(root) in self._roots
+
+    def __len__(self) -> int:
+        """Return the number of registered roots."""
+        return len(self._roots)
+
+
+def find_repositories(root: str, max_depth: int = 4) -> Iterator[str]:
+    """
+    Yield the git repositories at or below a directory.
+
+    Runs once per root at startup; ignored-looking directories and the
+    insides of repositories' .git directories are not searched.
+
+    Args:
+        root: Directory to search
+        max_depth: Maximum directory depth below ``root`` to search
+
+    Yields:
+        Repository working tree paths
+    """
+    root = os.path.abspath(root)
+    base_depth = root.count(os.sep)
+    for current, dirs, files in os.walk(root):
+        if ".git" in dirs or ".git" in files:
+            yield current
+        if current.count(os.sep) - base_depth >= max_depth:
+            dirs[:] = []
+        else:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+
+
+class ProjectResolver(ProjectTrie):
+    """
+    Project trie with discovery of repositories and optional persistence.
+
+    Attributes:
+        path (Optional[Path]): JSON file the roots are saved to and loaded from
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        """
+        Initialize the resolver, loading saved roots if ``path`` exists.
+
+        Args:
+            path: Optional JSON file persisting the roots
+        """
+        super().__init__()
+        self.path = path
+        self.reload()
+
+    def reload(self) -> None:
+        """Adopt the roots saved by other processes since this one loaded ``path``."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            saved = json.loads(self.path.read_text())
+            for root, name in saved.items():
+                if root not in self:
+                    self.add(root, name)
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Failed to load project roots from {self.path}: {e}")
+
+    def add_watch_roots(self, roots: Iterable[str], discover: bool = True) -> None:
+        """
+        Register watched directories and the repositories inside them.
+
+        Args:
+            roots: Watched directories
+            discover: Whether to search the directories for git repositories
+        """
+        self.reload()
+        for root in roots:
+            if os.path.abspath(root) not in self:
+                self.add(root)
+            if discover and os.path.isdir(root):
+                for repository in find_repositories(root):
+                    if repository not in self:
+                        self.add(repository)
+        self.save()
+
+    def directory_created(self, path: str) -> Optional[str]:
+        """
+        Register a repository when its .git directory appears.
+
+        Args:
+            path: Path of a newly created directory
+
+        Returns:
+            Name of the new project, or None if the directory is not a .git
+        """
+        if os.path.basename(path) != ".git":
+            return None
+        repository = os.path.dirname(os.path.abspath(path))
+        self.reload()
+        if repository in self:
+            return None
+        name = self.add(repository)
+        logger.info(f"Discovered project {name} at {repository}")
+        self.save()
+        return name
+
+    def save(self) -> None:
+        """Write the roots to ``path`` if persistence is enabled, keeping those saved by other processes."""
+        if self.path is None:
+            return
+        self.reload()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(self.roots(), indent=2))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save project roots to {self.path}: {e}")
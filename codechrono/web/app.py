@@ -1 +1,345 @@
- 
\ No newline at end of file
+"""
+Web dashboard for CodeChrono.
+
+This module serves the dashboard page and its JSON API. Query results are
+cached per (query, data version), and every response carries an ETag derived
+from the same key, so a browser polling an unchanged range gets a 304 without
+the server touching the event log. Live views follow new events through the
+cursor-based ``/api/events`` endpoint, or get them pushed over the
+Server-Sent Events stream at ``/api/stream``, instead of refetching history.
+``/metrics`` exposes the internal metrics of the serving process in the
+Prometheus text format.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from flask import Flask, Response, abort, render_template, request
+from werkzeug.serving import BaseWSGIServer, make_server
+
+from ..core.bus import EventBus
+from ..core.metrics import REGISTRY
+from ..core.tracker import ActivityTracker
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of query results.
+
+    Keys include the data version, so entries never need invalidating; stale
+    versions simply age out. Cached values are shared and must not be
+    mutated.
+
+    Attributes:
+        max_entries (int): Maximum number of cached results
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that computed the result
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for ``key``, computing it on a miss.
+
+        Args:
+            key: Cache key, including the data version
+            compute: Function producing the result
+
+        Returns:
+            The cached or freshly computed result
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _etag(key: Hashable) -> str:
+    """Derive a strong (unquoted) ETag from a cache key."""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]
+
+
+def _parse_time(name: str) -> Optional[datetime]:
+    """Parse an ISO timestamp query parameter, aborting with 400 if invalid."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, f"Invalid {name}: {value}")
+
+
+def _window() -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Read the query time range from ``since``/``until`` or ``days``.
+
+    ``days`` (default 7) counts back from the current hour, so the cache key
+    only changes once an hour for rolling windows.
+    """
+    since, until = _parse_time("since"), _parse_time("until")
+    if since is None and "since" not in request.args:
+        days = request.args.get("days", 7, type=int)
+        if days > 0:
+            since = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    return since, until
+
+
+def _sse(topic: str, payload: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {topic}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _bus_stream(bus: EventBus, topics: Optional[Tuple[str, ...]], buffer_size: int) -> Iterator[str]:
+    """
+    Relay bus messages to one client.
+
+    The client gets its own bounded subscription; when it reads too slowly
+    its oldest messages are dropped and it is told how many via an
+    "overflow" message, so it can refetch the aggregates.
+    """
+    subscription = bus.subscribe(topics, buffer_size)
+    reported = 0
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            messages = subscription.get(timeout=15)
+            if subscription.closed:
+                return
+            if subscription.dropped != reported:
+                yield _sse("overflow", {"dropped": subscription.dropped - reported})
+                reported = subscription.dropped
+            if not messages:
+                yield ": keepalive\n\n"
+            for topic, payload in messages:
+                yield _sse(topic, payload)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def _log_stream(tracker: ActivityTracker, interval: float = 1.0) -> Iterator[str]:
+    """
+    Relay newly logged events to one client by tailing the event log.
+
+    Used when the dashboard runs in a different process than the tracker and
+    therefore cannot subscribe to its bus.
+    """
+    cursor = tracker.event_log.tail_cursor()
+    idle = 0.0
+    yield "retry: 3000\n\n"
+    while True:
+        batch, cursor = tracker.event_log.read_from(cursor, 1000)
+        for timestamp, path, event_type, language in batch:
+            yield _sse("file", {
+                "file_path": path,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds"),
+                "event_type": event_type,
+                "language": language,
+            })
+        if batch:
+            idle = 0.0
+            continue
+        idle += interval
+        if idle >= 15:
+            yield ": keepalive\n\n"
+            idle = 0.0
+        time.sleep(interval)
+
+
+def create_app(
+    tracker: Optional[ActivityTracker] = None, cache_size: int = 256, bus: Optional[EventBus] = None
+) -> Flask:
+    """
+    Build the dashboard application.
+
+    Args:
+        tracker: Tracker to read from, defaults to one reading the on-disk
+            event log written by ``codechrono start``
+        cache_size: Maximum number of cached query results
+        bus: Bus of the tracking process when the dashboard runs inside it;
+            without one, the event stream tails the event log instead
+
+    Returns:
+        Configured Flask application
+    """
+    app = Flask(__name__)
+    tracker = tracker or ActivityTracker()
+    cache = ResultCache(cache_size)
+    app.config["TRACKER"] = tracker
+    app.config["RESULT_CACHE"] = cache
+    REGISTRY.gauge("codechrono_dashboard_cache_hits", "Dashboard queries served from the cache").set_function(
+        lambda: cache.hits
+    )
+    REGISTRY.gauge("codechrono_dashboard_cache_misses", "Dashboard queries computed").set_function(
+        lambda: cache.misses
+    )
+
+    def summary_data(since: Optional[datetime], until: Optional[datetime]) -> Dict:
+        """Compute (or reuse) the activity summary shared by several endpoints."""
+        key = ("summary-data", since, until, tracker.data_version())
+        return cache.get_or_compute(key, lambda: tracker.get_activity_summary(since, until))
+
+    def cached_json(query: Tuple, compute: Callable[[], Any]) -> Response:
+        """Serve a query result from the cache with ETag/304 handling."""
+        key = (query, tracker.data_version())
+        etag = _etag(key)
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            body = cache.get_or_compute(key, lambda: json.dumps(compute()).encode("utf-8"))
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.route("/")
+    def index() -> str:
+        return render_template("index.html")
+
+    @app.route("/api/summary")
+    def summary() -> Response:
+        since, until = _window()
+
+        def compute() -> Dict:
+            result = summary_data(since, until)
+            return {
+                "total_files": result["total_files"],
+                "total_events": result["total_events"],
+                "total_languages": len(result["language_activity"]),
+            }
+
+        return cached_json(("summary", since, until), compute)
+
+    @app.route("/api/languages")
+    def languages() -> Response:
+        since, until = _window()
+
+        def compute() -> Dict:
+            counts = summary_data(since, until)["language_activity"]
+            return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+        return cached_json(("languages", since, until), compute)
+
+    @app.route("/api/files")
+    def files() -> Response:
+        since, until = _window()
+        limit = request.args.get("limit", 50, type=int)
+
+        def compute() -> list:
+            counts = summary_data(since, until)["file_activity"]
+            top = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+            return [{"file": path, "events": count} for path, count in top]
+
+        return cached_json(("files", since, until, limit), compute)
+
+    @app.route("/api/heatmap")
+    def heatmap() -> Response:
+        since, until = _window()
+        return cached_json(("heatmap", since, until), lambda: tracker.get_activity_heatmap(since, until))
+
+    @app.route("/api/events")
+    def events() -> Response:
+        if tracker.event_log is None:
+            abort(404, "Live events require the on-disk event log")
+        limit = min(request.args.get("limit", 500, type=int), 5000)
+        cursor = request.args.get("cursor") or tracker.event_log.tail_cursor()
+        try:
+            batch, next_cursor = tracker.event_log.read_from(cursor, limit)
+        except ValueError as e:
+            abort(400, str(e))
+        return Response(json.dumps({
+            "cursor": next_cursor,
+            "events": [
+                {
+                    "file_path": path,
+                    "timestamp": datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds"),
+                    "event_type": event_type,
+                    "language": language,
+                }
+                for timestamp, path, event_type, language in batch
+            ],
+        }), mimetype="application/json")
+
+    @app.route("/metrics")
+    def metrics() -> Response:
+        return Response(REGISTRY.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/api/stream")
+    def stream() -> Response:
+        if bus is not None:
+            topics = tuple(request.args.getlist("topic")) or None
+            buffer_size = max(1, min(request.args.get("buffer", 256, type=int), 4096))
+            messages = _bus_stream(bus, topics, buffer_size)
+        elif tracker.event_log is not None:
+            messages = _log_stream(tracker)
+        else:
+            abort(404, "Live events require a bus or the on-disk event log")
+        return Response(messages, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
+    return app
+
+
+def serve_in_background(app: Flask, host: str = "127.0.0.1", port: int = 5000) -> BaseWSGIServer:
+    """
+    Serve the dashboard from a daemon thread of the current process.
+
+    Args:
+        app: Application from create_app()
+        host: Interface to bind
+        port: Port to bind
+
+    Returns:
+        The running server; call its shutdown() method to stop it
+    """
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="codechrono-dashboard", daemon=True).start()
+    logger.info(f"Dashboard listening on http://{host}:{server.server_port}")
+    return server
+
+
+def main() -> None:
+    """Run the dashboard with Flask's development server."""
+    parser = argparse.ArgumentParser(description="CodeChrono web dashboard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--config", type=Path, help="Path to config file")
+    args = parser.parse_args()
+    create_app(ActivityTracker(args.config)).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
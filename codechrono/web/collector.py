@@ -0,0 +1,143 @@
+"""
+Team collector server for CodeChrono.
+
+Trackers running with an uploader POST batches to ``/api/ingest`` as
+gzip-compressed JSON::
+
+    {"host": "laptop", "stream": "sessions", "cursor": "1234", "records": [...]}
+
+Each batch is stored in one transaction together with the host's cursor,
+which uploaders read back from ``/api/cursor`` when they start. Records
+already stored are ignored, so a retried batch is acknowledged without
+being counted twice. ``/api/team/summary`` and ``/api/team/hosts`` report
+on what has been collected.
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+import argparse
+import hmac
+import json
+import logging
+import zlib
+
+from flask import Flask, Response, abort, request
+
+from ..core.collector import STREAMS, CollectorStore
+from ..core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTOR_DB = Path.home() / ".codechrono" / "collector.db"
+
+# Limits for one batch, compressed and decompressed
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+MAX_BATCH_BYTES = 64 * 1024 * 1024
+
+BATCHES_RECEIVED = REGISTRY.counter("codechrono_collector_batches_total", "Upload batches stored by the collector")
+RECORDS_ACCEPTED = REGISTRY.counter("codechrono_collector_records_total", "New records stored by the collector")
+RECORDS_DUPLICATE = REGISTRY.counter(
+    "codechrono_collector_duplicates_total", "Uploaded records the collector already had"
+)
+
+
+def _decompress(body: bytes) -> bytes:
+    """Inflate a gzip request body, refusing bodies that inflate too far."""
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, MAX_BATCH_BYTES)
+    except zlib.error:
+        abort(400, "Invalid gzip body")
+    if inflater.unconsumed_tail:
+        abort(413, f"Batch inflates beyond {MAX_BATCH_BYTES} bytes")
+    return data
+
+
+def create_collector_app(store: CollectorStore, token: Optional[str] = None) -> Flask:
+    """
+    Build the collector application.
+
+    Args:
+        store: Database receiving the uploads
+        token: Bearer token required on every request, or None to accept all
+
+    Returns:
+        Configured Flask application
+    """
+    app = Flask(__name__)
+    app.config["COLLECTOR_STORE"] = store
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+    @app.before_request
+    def authenticate() -> None:
+        if token is None or request.path == "/metrics":
+            return
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            abort(401)
+
+    @app.route("/api/ingest", methods=["POST"])
+    def ingest() -> Response:
+        body = request.get_data()
+        encoding = request.headers.get("Content-Encoding", "identity")
+        if encoding == "gzip":
+            body = _decompress(body)
+        elif encoding != "identity":
+            abort(415, f"Unsupported Content-Encoding: {encoding}")
+        try:
+            batch = json.loads(body)
+            host, stream, cursor, records = batch["host"], batch["stream"], batch["cursor"], batch["records"]
+        except (ValueError, KeyError, TypeError):
+            abort(400, "Expected a JSON object with host, stream, cursor and records")
+        if not isinstance(host, str) or not host or not isinstance(cursor, str) or not isinstance(records, list):
+            abort(400, "Invalid host, cursor or records")
+        try:
+            accepted = store.ingest(host, stream, cursor, records)
+        except ValueError as e:
+            abort(400, str(e))
+        BATCHES_RECEIVED.inc()
+        RECORDS_ACCEPTED.inc(accepted)
+        RECORDS_DUPLICATE.inc(len(records) - accepted)
+        logger.debug(f"Stored {accepted}/{len(records)} {stream} from {host}, cursor {cursor}")
+        return Response(json.dumps({"accepted": accepted, "received": len(records), "cursor": cursor}),
+                        mimetype="application/json")
+
+    @app.route("/api/cursor")
+    def cursor() -> Response:
+        host, stream = request.args.get("host"), request.args.get("stream")
+        if not host or stream not in STREAMS:
+            abort(400, "host and a valid stream are required")
+        return Response(json.dumps({"cursor": store.cursor(host, stream)}), mimetype="application/json")
+
+    @app.route("/api/team/summary")
+    def team_summary() -> Response:
+        days = request.args.get("days", 7, type=int)
+        start = datetime.now() - timedelta(days=days) if days > 0 else None
+        return Response(json.dumps(store.team_totals(start)), mimetype="application/json")
+
+    @app.route("/api/team/hosts")
+    def team_hosts() -> Response:
+        return Response(json.dumps(store.hosts()), mimetype="application/json")
+
+    @app.route("/metrics")
+    def metrics() -> Response:
+        return Response(REGISTRY.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+
+def main() -> None:
+    """Run the collector with Flask's development server."""
+    parser = argparse.ArgumentParser(description="CodeChrono team collector")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--db", type=Path, default=DEFAULT_COLLECTOR_DB, help="Path of the collector database")
+    parser.add_argument("--token", help="Bearer token uploaders must send")
+    args = parser.parse_args()
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    create_collector_app(CollectorStore(args.db), args.token).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
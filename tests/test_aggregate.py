@@ -0,0 +1,46 @@
+import unittest
+import time
+from array import array
+from unittest import mock
+
+from codechrono.core import aggregate
+
+
+class TestAggregate(unittest.TestCase):
+    def setUp(self):
+        base = time.mktime((2024, 3, 4, 9, 0, 0, 0, 0, -1))  # a Monday, local time
+        self.timestamps = array("d", [base, base + 60, base + 3600, base + 86400 + 7200])
+        self.ids = array("H", [0, 2, 2, 1])
+
+    def check(self):
+        self.assertEqual(aggregate.count_ids(self.ids, 4), [1, 1, 2, 0])
+        self.assertEqual(aggregate.count_ids(self.ids, 3, 1, 3), [0, 0, 2])
+        self.assertEqual(aggregate.count_ids(self.ids, 3, 2, 2), [0, 0, 0])
+
+        pairs = aggregate.count_pairs(self.ids, array("I", [5, 1, 1, 5]))
+        self.assertEqual(pairs, {(0, 5): 1, (2, 1): 2, (1, 5): 1})
+
+        grid = aggregate.heatmap(self.timestamps)
+        self.assertEqual(len(grid), 7)
+        self.assertEqual(grid[0][9], 2)
+        self.assertEqual(grid[0][10], 1)
+        self.assertEqual(grid[1][11], 1)
+        self.assertEqual(sum(map(sum, grid)), 4)
+        self.assertEqual(sum(map(sum, aggregate.heatmap(self.timestamps, 3, 3))), 0)
+
+        totals = aggregate.group_totals(["python", "rust", "python"], [1.0, 0.5, 0.25])
+        self.assertEqual(totals, {"python": (1.25, 2), "rust": (0.5, 1)})
+        self.assertEqual(aggregate.group_totals([], []), {})
+
+    def test_pure_python(self):
+        with mock.patch.object(aggregate, "np", None):
+            self.check()
+
+    @unittest.skipUnless(aggregate.have_numpy(), "NumPy not installed")
+    def test_numpy(self):
+        with mock.patch.object(aggregate, "GROUP_NUMPY_MIN", 1):
+            self.check()
+
+
+if __name__ == '__main__':
+    unittest.main()
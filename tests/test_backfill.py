@@ -0,0 +1,114 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from codechrono.core.backfill import BackfillJob, iter_git_activity, run_backfill, sessionize
+from codechrono.core.journal import make_session
+from codechrono.core.storage import SessionRepository
+
+
+def git(root, *args, timestamp=None):
+    env = dict(os.environ, GIT_AUTHOR_NAME="dev", GIT_AUTHOR_EMAIL="dev@example.com",
+               GIT_COMMITTER_NAME="dev", GIT_COMMITTER_EMAIL="dev@example.com")
+    if timestamp is not None:
+        env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = f"@{int(timestamp)} +0000"
+    subprocess.run(["git", "-C", root, *args], env=env, check=True, capture_output=True)
+
+
+class TestSessionize(unittest.TestCase):
+    def test_idle_timeout_splits_sessions(self):
+        base = datetime(2024, 1, 1, 9).timestamp()
+        activity = [(base + offset, "python") for offset in (0, 200, 400, 2000, 2100)]
+        activity += [(base + 30, "rust")]
+        sessions = sessionize(activity, "app", idle_timeout=300)
+        self.assertEqual([(s["language"], s["start_time"], s["end_time"]) for s in sessions], [
+            ("python", "2024-01-01T09:00:00", "2024-01-01T09:06:40"),
+            ("python", "2024-01-01T09:33:20", "2024-01-01T09:35:00"),
+        ])
+        self.assertTrue(all(s["project"] == "app" for s in sessions))
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "app")
+        os.makedirs(os.path.join(self.root, "src"))
+        self.base = datetime(2024, 1, 1, 9).timestamp()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @unittest.skipIf(shutil.which("git") is None, "git is not installed")
+    def test_git_history_and_idempotent_merge(self):
+        git(self.root, "init", "-q")
+        for minute in (0, 4, 8):
+            Path(self.root, "src", "main.py").write_text(f"# {minute}\n")
+            git(self.root, "add", "src")
+            git(self.root, "commit", "-qm", f"change {minute}", timestamp=self.base + minute * 60)
+
+        activity = list(iter_git_activity(self.root))
+        self.assertEqual(len(activity), 3)
+        self.assertEqual(activity[0], (self.base + 480, os.path.join(self.root, "src", "main.py")))
+        self.assertEqual(list(iter_git_activity(self.root, since=self.base + 300)), activity[:1])
+
+        job = BackfillJob(self.root, "app", idle_timeout=300, use_mtimes=False, author="dev@example.com")
+        ((_, sessions),) = run_backfill([job], workers=1)
+        self.assertEqual(len(sessions), 1)
+        self.assertAlmostEqual(sessions[0]["duration"], 8 / 60)
+
+        paths = [Path(self.tmp.name, name) for name in ("data.json", "data.journal", "data.db")]
+        repo = SessionRepository(*paths)
+        tracked = dict(sessions[0], start_time=datetime(2024, 1, 1, 9, 5).isoformat())
+        self.assertEqual(repo.merge_sessions([tracked]), 1)
+        # Overlaps the session recorded above, so nothing is added
+        self.assertEqual(repo.merge_sessions(sessions), 0)
+        self.assertEqual(repo.merge_sessions([tracked]), 0)
+        repo.close()
+
+        repo = SessionRepository(*paths)
+        self.assertEqual(repo.store.count(), 1)
+        self.assertEqual(repo.data["languages"]["python"]["sessions"], 1)
+        repo.close()
+
+    def test_sessions_without_project_overlap_any_project(self):
+        paths = [Path(self.tmp.name, name) for name in ("data.json", "data.journal", "data.db")]
+        repo = SessionRepository(*paths)
+        # Recorded before sessions were attributed to projects
+        legacy = make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 10))
+        self.assertEqual(repo.merge_sessions([legacy]), 1)
+        backfilled = [
+            make_session("python", "app", datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 11)),
+            make_session("rust", "app", datetime(2024, 1, 1, 9, 30), datetime(2024, 1, 1, 11)),
+            make_session("python", "app", datetime(2024, 1, 1, 12), datetime(2024, 1, 1, 13)),
+        ]
+        self.assertEqual(repo.merge_sessions(backfilled), 2)
+        # And a session without a project overlaps recorded ones of any project
+        self.assertEqual(repo.merge_sessions([make_session("rust", None, datetime(2024, 1, 1, 10),
+                                                           datetime(2024, 1, 1, 10, 30))]), 0)
+        self.assertEqual(repo.store.count(), 3)
+        repo.close()
+
+    def test_sessions_under_another_project_name_overlap(self):
+        paths = [Path(self.tmp.name, name) for name in ("data.json", "data.journal", "data.db")]
+        repo = SessionRepository(*paths)
+        # The live tracker recorded the directory as "api", backfill names it "a/api"
+        live = make_session("go", "api", datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 10))
+        self.assertEqual(repo.merge_sessions([live]), 1)
+        backfilled = [
+            make_session("go", "a/api", datetime(2024, 1, 1, 9, 15), datetime(2024, 1, 1, 10, 15)),
+            make_session("go", "a/api", datetime(2024, 1, 1, 14), datetime(2024, 1, 1, 15)),
+            # Reconstructed sessions of two projects may overlap each other
+            make_session("go", "web", datetime(2024, 1, 1, 14, 30), datetime(2024, 1, 1, 15, 30)),
+        ]
+        self.assertEqual(repo.merge_sessions(backfilled), 2)
+        self.assertEqual(repo.merge_sessions(backfilled), 0)
+        self.assertEqual(repo.store.count(), 3)
+        repo.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from codechrono.core.bus import EventBus
+
+
+class TestEventBus(unittest.TestCase):
+    def test_fan_out_and_topics(self):
+        bus = EventBus()
+        everything = bus.subscribe()
+        sessions = bus.subscribe(["session"])
+        bus.publish("file", {"file_path": "a.py"})
+        bus.publish("session", {"action": "start"})
+        self.assertEqual([t for t, _ in everything.get(0)], ["file", "session"])
+        self.assertEqual(sessions.get(0), [("session", {"action": "start"})])
+        self.assertEqual(sessions.get(0), [])
+
+    def test_slow_subscriber_drops_oldest(self):
+        bus = EventBus()
+        slow = bus.subscribe(maxsize=2)
+        for i in range(5):
+            bus.publish("file", i)
+        self.assertEqual([p for _, p in slow.get(0)], [3, 4])
+        self.assertEqual(slow.dropped, 3)
+        self.assertEqual(bus.stats()["dropped"], 3)
+
+        bus.unsubscribe(slow)
+        bus.publish("file", 5)
+        self.assertEqual(slow.get(0), [])
+        self.assertEqual(bus.stats()["subscribers"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
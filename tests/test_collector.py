@@ -0,0 +1,150 @@
+import unittest
+import gzip
+import json
+import socket
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from codechrono.core.collector import CollectorStore
+from codechrono.core.eventlog import EventLog
+from codechrono.core.journal import make_session
+from codechrono.core.storage import SessionRepository
+from codechrono.core.uploader import Uploader, event_batches, session_batches
+from codechrono.web.app import serve_in_background
+from codechrono.web.collector import create_collector_app
+
+
+def post_batch(client, batch, token=None):
+    headers = {"Content-Encoding": "gzip"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return client.post("/api/ingest", data=gzip.compress(json.dumps(batch).encode("utf-8")),
+                       headers=headers, content_type="application/json")
+
+
+class TestCollectorApp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CollectorStore(Path(self.tmp.name) / "collector.db")
+        self.client = create_collector_app(self.store, token="secret").test_client()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_ingest_is_idempotent_and_tracks_cursors(self):
+        now = datetime.now().replace(microsecond=0)
+        sessions = [make_session("python", "app", now - timedelta(hours=i), now - timedelta(hours=i - 0.5)) for i in range(1, 4)]
+        batch = {"host": "laptop", "stream": "sessions", "cursor": "3", "records": sessions}
+
+        self.assertEqual(post_batch(self.client, batch).status_code, 401)
+        self.assertEqual(post_batch(self.client, batch, "secret").get_json()["accepted"], 3)
+        # A retried batch (lost acknowledgement) is acknowledged but adds nothing
+        retried = post_batch(self.client, batch, "secret").get_json()
+        self.assertEqual((retried["accepted"], retried["received"]), (0, 3))
+        # The same session from another host is a different record
+        post_batch(self.client, dict(batch, host="desktop", cursor="1", records=sessions[:1]), "secret")
+
+        auth = {"Authorization": "Bearer secret"}
+        cursor = self.client.get("/api/cursor?host=laptop&stream=sessions", headers=auth).get_json()
+        self.assertEqual(cursor, {"cursor": "3"})
+        self.assertIsNone(self.client.get("/api/cursor?host=laptop&stream=events", headers=auth).get_json()["cursor"])
+        summary = self.client.get("/api/team/summary?days=1", headers=auth).get_json()
+        self.assertEqual(summary["hosts"]["laptop"], {"total_hours": 1.5, "sessions": 3})
+        self.assertEqual(summary["languages"]["python"]["sessions"], 4)
+        self.assertEqual([h["host"] for h in self.client.get("/api/team/hosts", headers=auth).get_json()],
+                         ["desktop", "laptop"])
+
+    def test_rejects_bad_batches(self):
+        bad = {"host": "laptop", "stream": "sessions", "cursor": "1", "records": [{"language": "go"}]}
+        self.assertEqual(post_batch(self.client, bad, "secret").status_code, 400)
+        self.assertEqual(post_batch(self.client, dict(bad, stream="x", records=[]), "secret").status_code, 400)
+        response = self.client.post("/api/ingest", data=b"not gzip", headers={
+            "Content-Encoding": "gzip", "Authorization": "Bearer secret",
+        })
+        self.assertEqual(response.status_code, 400)
+        # A rejected batch does not move the cursor
+        self.assertIsNone(self.store.cursor("laptop", "sessions"))
+
+
+class TestUploader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.store = CollectorStore(self.root / "collector.db")
+        self.server = serve_in_background(create_collector_app(self.store), port=0)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_uploads_sessions_in_batches_and_resumes(self):
+        now = datetime.now().replace(microsecond=0)
+        repo = SessionRepository(self.root / "data.json", self.root / "data.journal", self.root / "data.db")
+        for i in range(25):
+            repo.record(make_session("rust", "app", now - timedelta(hours=i + 1), now - timedelta(hours=i + 0.8)))
+
+        uploader = Uploader(self.url, "sessions", session_batches(repo), host="laptop", batch_size=10)
+        self.assertEqual(uploader.upload_pending(), 25)
+        self.assertEqual(self.store.team_totals()["hosts"]["laptop"]["sessions"], 25)
+
+        # A new uploader resumes from the collector's cursor
+        repo.record(make_session("go", None, now - timedelta(minutes=30), now))
+        resumed = Uploader(self.url, "sessions", session_batches(repo), host="laptop", batch_size=10)
+        self.assertEqual(resumed.upload_pending(), 1)
+        self.assertEqual(resumed.cursor, "26")
+
+        # Losing the cursor re-sends everything without double counting
+        with self.store._conn:
+            self.store._conn.execute("DELETE FROM cursors")
+        self.assertEqual(Uploader(self.url, "sessions", session_batches(repo), host="laptop").upload_pending(), 26)
+        self.assertEqual(self.store.team_totals()["hosts"]["laptop"]["sessions"], 26)
+        repo.close()
+
+    def test_session_uploads_compact_at_most_once_per_interval(self):
+        now = datetime.now().replace(microsecond=0)
+        repo = SessionRepository(self.root / "data.json", self.root / "data.journal", self.root / "data.db")
+        read = session_batches(repo, compact_interval=3600)
+        repo.record(make_session("rust", "app", now - timedelta(hours=2), now - timedelta(hours=1.8)))
+        self.assertEqual(len(read("", 10)[0]), 1)
+
+        # Until the interval passes, journaled sessions wait for the regular compaction
+        repo.record(make_session("go", "app", now - timedelta(hours=1), now - timedelta(hours=0.8)))
+        self.assertEqual(read("1", 10), ([], "1"))
+        self.assertEqual(len(repo.data["sessions"]), 1)
+        repo.compact()
+        self.assertEqual(len(read("1", 10)[0]), 1)
+        repo.close()
+
+    def test_uploads_events(self):
+        log = EventLog(self.root / "events")
+        start = datetime.now().timestamp() - 60
+        for i in range(5):
+            log.append(f"/src/app/f{i}.py", "modified", "python", start + i)
+        uploader = Uploader(self.url, "events", event_batches(log, lambda path: "app"), host="laptop")
+        self.assertEqual(uploader.upload_pending(), 5)
+        log.append("/src/app/main.go", "created", "go", start + 10)
+        self.assertEqual(uploader.upload_pending(), 1)
+        self.assertEqual(self.store.team_totals()["events"], {"laptop": {"python": 5, "go": 1}})
+        log.close()
+
+    def test_backs_off_while_the_collector_is_down(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        uploader = Uploader(f"http://127.0.0.1:{closed_port}", "events", lambda cursor, limit: ([], cursor),
+                            interval=1.0, max_backoff=8.0, timeout=1.0)
+        with self.assertRaises(OSError):
+            uploader.upload_pending()
+        self.assertEqual(uploader.next_delay(), 1.0)
+        uploader.failures = 2
+        self.assertTrue(2.0 <= uploader.next_delay() <= 4.0)
+        uploader.failures = 10
+        self.assertTrue(4.0 <= uploader.next_delay() <= 8.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import io
+import json
+import socket
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from codechrono.cli.query import add_open_sessions, show
+from codechrono.core.control import HEADER, ControlClient, ControlError, ControlServer, call
+from codechrono.core.tracker import ActivityTracker
+
+
+class TestControlSocket(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "control.sock"
+        self.state = {"flushed": 0}
+
+        def flush():
+            self.state["flushed"] += 1
+            return self.state["flushed"]
+
+        def broken(count):
+            return len(count)
+
+        handlers = {"echo": lambda **params: params, "flush": flush, "broken": broken}
+        self.server = ControlServer(self.path, handlers).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def test_requests_on_one_connection(self):
+        with ControlClient(self.path) as client:
+            self.assertEqual(client.call("echo", a=1, b=[2]), {"a": 1, "b": [2]})
+            self.assertEqual(client.call("flush"), 1)
+            self.assertEqual(client.call("flush"), 2)
+            self.assertIn("echo", client.call("methods"))
+            with self.assertRaisesRegex(ControlError, "Unknown method"):
+                client.call("missing")
+            with self.assertRaisesRegex(ControlError, "Bad params"):
+                client.call("flush", now=True)
+            with self.assertRaisesRegex(ControlError, "Bad params"):
+                client.call("broken")
+            # A TypeError raised by the handler itself is not blamed on the params
+            with self.assertLogs("codechrono.core.control", "ERROR"):
+                with self.assertRaisesRegex(ControlError, "Internal error in broken"):
+                    client.call("broken", count=3)
+            # Errors do not end the connection
+            self.assertEqual(client.call("ping")["uptime"] >= 0, True)
+
+    def test_malformed_request(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(self.path))
+            sock.sendall(HEADER.pack(3) + b"{x]")
+            (length,) = HEADER.unpack(sock.recv(HEADER.size))
+            self.assertEqual(json.loads(sock.recv(length)), {"id": None, "error": "Malformed request"})
+
+    def test_socket_ownership(self):
+        with self.assertRaises(RuntimeError):
+            ControlServer(self.path, {}).start()
+        self.server.stop()
+        self.assertFalse(self.path.exists())
+        with self.assertRaises(OSError):
+            call("ping", self.path)
+
+        # A socket file left by a dead process is replaced
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(self.path))
+        stale.close()
+        self.server = ControlServer(self.path, {}).start()
+        self.assertIn("pid", call("ping", self.path))
+
+
+class TestLiveQueries(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.paths = (self.root / "data.json", self.root / "data.journal", self.root / "data.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stats_prefers_the_tracker(self):
+        started = datetime.now() - timedelta(minutes=30)
+        open_session = {"language": "go", "project": "app", "start_time": started.isoformat(), "hours": 0.5}
+        report = {"days": 7, "languages": [], "projects": [], "all_time": {"total_hours": 0, "sessions": 0}}
+        server = ControlServer(self.root / "control.sock", {
+            "stats": lambda days, by_project: add_open_sessions(dict(report, days=days), [open_session]),
+        }).start()
+        try:
+            out = io.StringIO()
+            show("stats", *self.paths, days=3, by_project=True, as_json=True, out=out, socket_path=server.socket_path)
+        finally:
+            server.stop()
+        live = json.loads(out.getvalue())
+        self.assertEqual(live["days"], 3)
+        self.assertEqual(live["open_sessions"], 1)
+        self.assertEqual(live["languages"], [{"language": "go", "total_hours": 0.5, "sessions": 1, "avg_hours": 0.5}])
+        self.assertEqual(live["projects"], [{"project": "app", "language": "go", "total_hours": 0.5, "sessions": 1}])
+
+        # Without a tracker the files answer, and nothing is open
+        out = io.StringIO()
+        show("stats", *self.paths, as_json=True, out=out, socket_path=server.socket_path)
+        self.assertNotIn("open_sessions", json.loads(out.getvalue()))
+
+    def test_activity_tracker_live_summary(self):
+        config = self.root / "config.json"
+        config.write_text(json.dumps({"event_log_dir": str(self.root / "events")}))
+        tracker = ActivityTracker(config)
+        tracker.track_file_changes([(Path("a.py"), "modified"), (Path("b.rs"), "created")])
+        status = tracker.live_status()
+        self.assertEqual(status["events_in_memory"], 2)
+        self.assertEqual(status["latest_event"]["file_path"], "b.rs")
+        summary = tracker.live_summary(datetime.now() - timedelta(days=1))
+        self.assertEqual(summary["language_activity"], {"python": 1, "rust": 1})
+        self.assertEqual(tracker.live_summary(datetime.now() + timedelta(days=1))["total_events"], 0)
+        tracker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
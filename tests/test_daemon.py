@@ -0,0 +1,88 @@
+import unittest
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from codechrono.utils.daemon import is_running, read_pid, remove_pidfile, wait_for_shutdown, write_pidfile
+
+
+def exited_pid():
+    """Return the pid of a process that has already exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestPidfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pidfile = Path(self.tmp.name) / "codechrono.pid"
+        # Keep the cleanup hooks of these tests out of the interpreter's exit
+        patcher = mock.patch("atexit.register")
+        self.register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_create_and_cleanup(self):
+        self.assertIsNone(read_pid(self.pidfile))
+        write_pidfile(self.pidfile)
+        self.assertEqual(read_pid(self.pidfile), os.getpid())
+        self.register.assert_called_once_with(remove_pidfile, self.pidfile)
+        remove_pidfile(self.pidfile)
+        self.assertFalse(self.pidfile.exists())
+
+    def test_stale_pidfile_is_replaced(self):
+        pid = exited_pid()
+        self.assertFalse(is_running(pid))
+        self.pidfile.write_text(f"{pid}\n")
+        write_pidfile(self.pidfile)
+        self.assertEqual(read_pid(self.pidfile), os.getpid())
+
+        self.pidfile.write_text("not a pid\n")
+        self.assertIsNone(read_pid(self.pidfile))
+        write_pidfile(self.pidfile)
+        self.assertEqual(read_pid(self.pidfile), os.getpid())
+
+    def test_refuses_a_live_owner_and_leaves_its_file(self):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            self.assertTrue(is_running(process.pid))
+            self.pidfile.write_text(f"{process.pid}\n")
+            with self.assertRaises(RuntimeError):
+                write_pidfile(self.pidfile)
+            # Only the owner removes its pidfile
+            remove_pidfile(self.pidfile)
+            self.assertEqual(read_pid(self.pidfile), process.pid)
+        finally:
+            process.kill()
+            process.wait()
+        self.register.assert_not_called()
+
+
+class TestWaitForShutdown(unittest.TestCase):
+    def test_signal_ends_the_wait(self):
+        previous = signal.getsignal(signal.SIGTERM)
+        seen = []
+        timer = threading.Timer(0.05, os.kill, (os.getpid(), signal.SIGTERM))
+        timer.start()
+        self.assertEqual(wait_for_shutdown(seen.append), signal.SIGTERM)
+        self.assertEqual(seen, [signal.SIGTERM])
+        self.assertIs(signal.getsignal(signal.SIGTERM), previous)
+
+    def test_event_ends_the_wait(self):
+        previous = signal.getsignal(signal.SIGINT)
+        stop = threading.Event()
+        threading.Timer(0.05, stop.set).start()
+        self.assertIsNone(wait_for_shutdown(stop=stop))
+        self.assertIs(signal.getsignal(signal.SIGINT), previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
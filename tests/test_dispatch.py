@@ -0,0 +1,51 @@
+import unittest
+import threading
+
+from codechrono.core.dispatch import BoundedEventQueue, EventWorker
+
+
+class TestBoundedEventQueue(unittest.TestCase):
+    def test_drop_oldest(self):
+        queue = BoundedEventQueue(maxsize=2, overflow="drop-oldest")
+        for i in range(4):
+            queue.put(f"k{i}", (i,))
+        self.assertEqual([queue.get(0), queue.get(0), queue.get(0)], [(2,), (3,), None])
+        self.assertEqual(queue.stats()["dropped"], 2)
+
+    def test_coalesce_replaces_queued_item_with_same_key(self):
+        queue = BoundedEventQueue(maxsize=2, overflow="coalesce")
+        queue.put("a.py", ("a.py", 1))
+        queue.put("b.py", ("b.py", 1))
+        queue.put("a.py", ("a.py", 2))
+        queue.put("c.py", ("c.py", 1))
+        self.assertEqual(queue.get(0), ("b.py", 1))
+        self.assertEqual(queue.get(0), ("c.py", 1))
+        stats = queue.stats()
+        self.assertEqual((stats["coalesced"], stats["dropped"]), (1, 1))
+
+    def test_closed_queue_drains_then_raises(self):
+        queue = BoundedEventQueue()
+        queue.put("a", ("a",))
+        queue.close()
+        self.assertFalse(queue.put("b", ("b",)))
+        self.assertEqual(queue.get(), ("a",))
+        with self.assertRaises(EOFError):
+            queue.get()
+
+
+class TestEventWorker(unittest.TestCase):
+    def test_worker_handles_items_on_its_own_thread(self):
+        queue = BoundedEventQueue()
+        seen = []
+        worker = EventWorker(queue, lambda value: seen.append((value, threading.current_thread().name)))
+        worker.start()
+        for i in range(100):
+            queue.put(i, (i,))
+        worker.stop()
+        self.assertEqual([value for value, _ in seen], list(range(100)))
+        self.assertTrue(all(name == "codechrono-worker" for _, name in seen))
+        self.assertEqual(queue.stats()["dequeued"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
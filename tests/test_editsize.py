@@ -0,0 +1,94 @@
+import unittest
+import os
+import tempfile
+from pathlib import Path
+
+from codechrono.core.editsize import EditMeter, EditSize
+
+SOURCE = "".join(f"value_{i} = compute({i})\n" for i in range(400))
+
+
+class TestEditMeter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "module.py"
+        self.meter = EditMeter()
+        self.mtime = 1_000_000_000
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save(self, text, path=None):
+        path = path or self.path
+        path.write_bytes(text.encode() if isinstance(text, str) else text)
+        # Distinct mtimes even on filesystems with coarse timestamps
+        self.mtime += 1_000_000
+        os.utime(path, ns=(self.mtime, self.mtime))
+
+    def test_single_region_edits(self):
+        self.save(SOURCE)
+        self.assertIsNone(self.meter.measure(self.path))
+
+        changed = SOURCE.replace("compute(200)", "compute(2000)")
+        self.save(changed)
+        self.assertEqual(self.meter.measure(self.path), EditSize(len("value_200 = compute(2000)\n"), 1))
+
+        inserted = changed.replace("value_10 = ", "extra = 1\nsecond = 2\nvalue_10 = ")
+        self.save(inserted)
+        self.assertEqual(self.meter.measure(self.path), EditSize(len("extra = 1\nsecond = 2\n"), 2))
+
+        removed = inserted.replace("value_300 = compute(300)\n", "")
+        self.save(removed)
+        self.assertEqual(self.meter.measure(self.path).lines, 1)
+
+        # Saving without changes, or an event without a new mtime, is no edit
+        self.save(removed)
+        self.assertEqual(self.meter.measure(self.path), EditSize(0, 0))
+        self.assertEqual(self.meter.measure(self.path), EditSize(0, 0))
+
+    def test_created_deleted_and_skipped_files(self):
+        self.save("a = 1\nb = 2\n")
+        self.assertEqual(self.meter.measure(self.path, "created"), EditSize(12, 2))
+        self.assertEqual(self.meter.measure(self.path, "deleted"), EditSize(12, 2))
+        self.assertEqual(len(self.meter), 0)
+
+        self.save("")
+        self.assertEqual(self.meter.measure(self.path, "created"), EditSize(0, 0))
+        self.assertEqual(self.meter.measure(self.path, "deleted"), EditSize(0, 0))
+
+        self.save(b"\x89PNG\r\n\x1a\n\x00\x00")
+        self.assertIsNone(self.meter.measure(self.path, "created"))
+        self.save("x" * 100)
+        small = EditMeter(max_file_bytes=50)
+        self.assertIsNone(small.measure(self.path, "created"))
+        self.assertIsNone(self.meter.measure(Path(self.tmp.name) / "missing.py"))
+        self.assertEqual(len(small), 0)
+
+    def test_cache_is_bounded(self):
+        meter = EditMeter(max_files=3)
+        paths = [Path(self.tmp.name) / f"f{i}.py" for i in range(5)]
+        for path in paths:
+            self.save(SOURCE, path)
+            meter.measure(path)
+        self.assertEqual(len(meter), 3)
+        # The oldest snapshots were evicted: their next edit is a new baseline
+        self.save(SOURCE + "x = 1\n", paths[0])
+        self.assertIsNone(meter.measure(paths[0]))
+        self.save(SOURCE + "x = 1\n", paths[4])
+        self.assertEqual(meter.measure(paths[4]).lines, 1)
+
+        tight = EditMeter(max_cache_bytes=1000)
+        tight.measure(paths[1])
+        self.assertEqual(len(tight), 0)
+        self.assertEqual(tight.cache_bytes, 0)
+
+    def test_large_files(self):
+        large = SOURCE * 200
+        self.save(large)
+        self.meter.measure(self.path)
+        middle = large.index("\n", len(large) // 2) + 1
+        self.save(large[:middle] + "inserted = True\n" + large[middle:])
+        self.assertEqual(self.meter.measure(self.path), EditSize(len("inserted = True\n"), 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+from codechrono.core.eventlog import EventLog, SegmentCache
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rotation_and_range_reads(self):
+        log = EventLog(self.directory, segment_bytes=100, flush_interval=0)
+        for i in range(10):
+            log.append(f"src/file{i}.py", "modified", "python", 1000.0 + i)
+        log.close()
+
+        self.assertGreater(len(log.segments()), 1)
+        self.assertEqual(len(list(log.read())), 10)
+        events = list(log.read(1003.0, 1006.0))
+        self.assertEqual([e[0] for e in events], [1003.0, 1004.0, 1005.0])
+        self.assertEqual(events[0][1:], ("src/file3.py", "modified", "python"))
+
+    def test_new_segment_per_process_and_torn_tail(self):
+        log = EventLog(self.directory, flush_interval=0)
+        log.append("a.py", "created", "python", 50.0)
+        log.close()
+        with open(log.segments()[0][1], "a") as f:
+            f.write('[51.0,"b.py","mod')
+
+        reopened = EventLog(self.directory, flush_interval=0)
+        reopened.append("c.py", "deleted", "python", 60.0)
+        reopened.close()
+        self.assertEqual(len(reopened.segments()), 2)
+        self.assertEqual([e[1] for e in reopened.read()], ["a.py", "c.py"])
+
+
+class TestSegmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = EventLog(Path(self.tmp.name), segment_bytes=200, flush_interval=0)
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp.cleanup()
+
+    def events(self, cache, start=None, end=None):
+        return [event for buffer, lo, hi in cache.ranges(start, end) for event in buffer.iter_events(lo, hi)]
+
+    def test_matches_reads_and_follows_appends(self):
+        for i in range(12):
+            self.log.append(f"src/file{i}.py", "modified", "python", 1000.0 + i)
+        cache = SegmentCache(self.log)
+        expected = [(path, ts, kind, language) for ts, path, kind, language in self.log.read(1003.0, 1010.0)]
+        self.assertEqual(self.events(cache, 1003.0, 1010.0), expected)
+        buffers = [buffer for buffer, _, _ in cache.ranges()]
+        # Unchanged segments are not parsed again
+        self.assertEqual([buffer for buffer, _, _ in cache.ranges()], buffers)
+
+        self.log.append("src/new.py", "created", "python", 2000.0)
+        self.assertEqual(self.events(cache, 1500.0), [("src/new.py", 2000.0, "created", "python")])
+        self.assertEqual(len(self.events(cache)), 13)
+
+        # Segments removed by retention are dropped
+        self.log.segments()[0][1].unlink()
+        self.assertLess(len(self.events(cache)), 13)
+        self.assertEqual(len(cache), len(self.events(cache)))
+
+    def test_evicts_beyond_max_events(self):
+        for i in range(12):
+            self.log.append(f"src/file{i}.py", "modified", "python", 1000.0 + i)
+        cache = SegmentCache(self.log, max_events=3)
+        self.assertEqual(len(self.events(cache)), 12)
+        # Only the segments of the latest query may stay beyond the limit
+        ((latest, _, _),) = cache.ranges(1011.0)
+        self.assertLessEqual(len(cache), max(3, len(latest)))
+        self.assertEqual(len(self.events(cache)), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import csv
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from codechrono.core.export import EXPORT_FORMATS, export_events, iter_chunks, read_columnar
+
+EVENTS = [
+    ("src/a.py", 1000.25, "modified", "python"),
+    ("src/b.rs", 1001.5, "created", "rust"),
+    ("src/a.py", 1002.0, "deleted", "python"),
+]
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_chunks(self):
+        self.assertEqual([len(c) for c in iter_chunks(iter(range(5)), 2)], [2, 2, 1])
+
+    def test_ndjson_and_gzip_csv(self):
+        output = self.directory / "out.ndjson"
+        self.assertEqual(export_events(iter(EVENTS), "ndjson", output, chunk_size=2), 3)
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        self.assertEqual([r["file_path"] for r in rows], ["src/a.py", "src/b.rs", "src/a.py"])
+
+        output = self.directory / "out.csv.gz"
+        export_events(iter(EVENTS), "csv.gz", output, chunk_size=2)
+        with gzip.open(output, "rt", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["file_path", "timestamp", "event_type", "language"])
+        self.assertEqual(len(rows), 4)
+
+    def test_columnar_round_trip(self):
+        output = self.directory / "out.ccol"
+        export_events(iter(EVENTS), "columnar", output, chunk_size=2)
+        self.assertEqual(list(read_columnar(output)), EVENTS)
+
+    def test_unknown_format(self):
+        self.assertNotIn("xml", EXPORT_FORMATS)
+        with self.assertRaises(ValueError):
+            export_events(iter(EVENTS), "xml", self.directory / "out.xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import fnmatch
+import os
+import tempfile
+from pathlib import Path
+
+from codechrono.utils.ignore import IgnoreMatcher
+
+PATTERNS = ['.*', '*node_modules*', '*venv*', '*build*', '*__pycache__*']
+
+
+def fnmatch_verdict(path):
+    return any(
+        any(fnmatch.fnmatch(part, pattern) for pattern in PATTERNS)
+        for part in path.split(os.sep)
+    )
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    def test_matches_component_globs_like_fnmatch(self):
+        matcher = IgnoreMatcher(PATTERNS)
+        paths = [
+            "/work/app/main.py",
+            "/work/app/.env",
+            "/work/app/node_modules/left-pad/index.js",
+            "/work/app/src/rebuild_cache.py",
+            "/work/app/src/__pycache__/mod.cpython-311.pyc",
+            "/work/app/venv2/lib/site.py",
+            "/work/app/src/deep/er/module.rs",
+        ]
+        for path in paths:
+            self.assertEqual(matcher.is_ignored(path), fnmatch_verdict(path), path)
+
+    def test_directory_verdicts_are_cached(self):
+        matcher = IgnoreMatcher(PATTERNS)
+        for i in range(100):
+            matcher.is_ignored(f"/work/app/node_modules/pkg/file{i}.js")
+        self.assertGreaterEqual(matcher.cache_info().hits, 99)
+
+    def test_exclude_patterns_mix_globs_and_substrings(self):
+        matcher = IgnoreMatcher.from_exclude_patterns(["*.pyc", "__pycache__", ".git"])
+        self.assertTrue(matcher.is_ignored("/repo/pkg/mod.pyc"))
+        self.assertTrue(matcher.is_ignored("/repo/pkg/__pycache__/x.py"))
+        self.assertTrue(matcher.is_ignored("/repo/.git/HEAD"))
+        self.assertFalse(matcher.is_ignored("/repo/pkg/mod.py"))
+
+    def test_gitignore_rules(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "repo"
+            root.mkdir()
+            (root / ".gitignore").write_text(
+                "# generated\n"
+                "*.log\n"
+                "!keep.log\n"
+                "/target/\n"
+                "docs/**/*.html\n"
+                "cache/\n"
+            )
+            matcher = IgnoreMatcher()
+            self.assertTrue(matcher.add_gitignore(root))
+
+            base = str(root)
+            self.assertTrue(matcher.is_ignored(f"{base}/debug.log"))
+            self.assertTrue(matcher.is_ignored(f"{base}/sub/debug.log"))
+            self.assertFalse(matcher.is_ignored(f"{base}/keep.log"))
+            self.assertTrue(matcher.is_ignored(f"{base}/target/release/app"))
+            self.assertFalse(matcher.is_ignored(f"{base}/src/target/app.rs"))
+            self.assertTrue(matcher.is_ignored(f"{base}/docs/api/v1/index.html"))
+            self.assertTrue(matcher.is_ignored(f"{base}/a/cache/x.py"))
+            self.assertFalse(matcher.is_ignored(f"{base}/a/cache"))
+            self.assertFalse(matcher.is_ignored(f"{base}/src/main.py"))
+            self.assertFalse(matcher.is_ignored("/elsewhere/debug.log"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from codechrono.core.journal import SessionJournal, apply_session, make_session
+
+
+class TestSessionJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot = Path(self.tmp.name) / "data.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record(self, journal, data, session):
+        apply_session(data, session)
+        journal.append(session)
+
+    def test_replays_journal_tail(self):
+        journal = SessionJournal(self.snapshot)
+        data = journal.load()
+        self.record(journal, data, make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30)))
+        self.record(journal, data, make_session("rust", None, datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 10, 30)))
+        journal.close()
+
+        reloaded = SessionJournal(self.snapshot).load()
+        self.assertEqual(len(reloaded["sessions"]), 2)
+        self.assertEqual(reloaded["languages"]["python"]["sessions"], 1)
+        self.assertFalse(self.snapshot.exists())
+
+    def test_torn_record_is_discarded(self):
+        journal = SessionJournal(self.snapshot)
+        data = journal.load()
+        self.record(journal, data, make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30)))
+        journal.close()
+        with open(journal.journal_path, "a") as f:
+            f.write('{"seq": 2, "sess')
+
+        journal = SessionJournal(self.snapshot)
+        data = journal.load()
+        self.assertEqual(len(data["sessions"]), 1)
+        self.record(journal, data, make_session("go", None, datetime(2024, 1, 1, 11), datetime(2024, 1, 1, 11, 30)))
+        journal.close()
+
+        self.assertEqual(len(SessionJournal(self.snapshot).load()["sessions"]), 2)
+
+    def test_compaction_is_not_replayed_twice(self):
+        journal = SessionJournal(self.snapshot)
+        data = journal.load()
+        self.record(journal, data, make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30)))
+        journal.compact(data)
+        self.record(journal, data, make_session("python", None, datetime(2024, 1, 1, 10), datetime(2024, 1, 1, 10, 30)))
+        journal.close()
+
+        self.assertEqual(journal.journal_path.read_text().count("\n"), 1)
+        reloaded = SessionJournal(self.snapshot).load()
+        self.assertEqual(reloaded["languages"]["python"]["sessions"], 2)
+
+        # Simulate a crash after the snapshot was written but before truncation
+        session = make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30))
+        stale = json.dumps({"seq": 1, "session": session}) + "\n"
+        with open(journal.journal_path, "r+") as f:
+            tail = f.read()
+            f.seek(0)
+            f.write(stale + tail)
+        reloaded = SessionJournal(self.snapshot).load()
+        self.assertEqual(reloaded["languages"]["python"]["sessions"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from codechrono.utils.languages import LanguageRegistry
+
+
+class TestLanguageRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = LanguageRegistry()
+
+    def test_extension_lookup(self):
+        self.assertEqual(self.registry.get_language("/src/app/main.py"), "python")
+        self.assertEqual(self.registry.get_language("/src/App.JAVA"), "java")
+        self.assertEqual(self.registry.get_language("/src/archive.tar.gz"), "other")
+        self.assertEqual(self.registry.get_language("/home/me/.bashrc"), "other")
+        self.assertEqual(self.registry.get_language("/src/.eslintrc.js"), "javascript")
+
+    def test_filenames_and_multi_part_extensions(self):
+        self.assertEqual(self.registry.get_language("/repo/Makefile"), "make")
+        self.assertEqual(self.registry.get_language("/repo/docker/Dockerfile"), "docker")
+        self.registry.register("typescript-declarations", [".d.ts"])
+        self.assertEqual(self.registry.get_language("/repo/types/index.d.ts"), "typescript-declarations")
+        self.assertEqual(self.registry.get_language("/repo/src/index.ts"), "typescript")
+
+    def test_config_languages(self):
+        registry = LanguageRegistry.from_config({"languages": {"zig": [".zig"], "just": "Justfile"}})
+        self.assertEqual(registry.get_language("build.zig"), "zig")
+        self.assertEqual(registry.get_language("/repo/Justfile"), "just")
+        self.assertEqual(registry.get_language("main.py"), "python")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import unittest
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from watchdog.events import FileModifiedEvent
+
+from codechrono.core.bus import EventBus
+
+SCRIPT = Path(__file__).resolve().parent.parent / "codechrono.py"
+
+
+def load_legacy_module(home):
+    """Import the top-level codechrono.py script with its data files under ``home``."""
+    with mock.patch.dict(os.environ, {"HOME": str(home)}):
+        spec = importlib.util.spec_from_file_location("codechrono_legacy", SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+class LegacyTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name)
+        self.src = self.home / "src"
+        self.src.mkdir()
+        self.legacy = load_legacy_module(self.home)
+        self.bus = EventBus()
+        self.sessions = self.bus.subscribe(["session"])
+        self.trackers = []
+
+    def tearDown(self):
+        for tracker in self.trackers:
+            if tracker.running:
+                tracker.stop()
+        self.tmp.cleanup()
+
+    def make_tracker(self, **options):
+        tracker = self.legacy.CodingTimeTracker([str(self.src)], bus=self.bus, **options)
+        self.trackers.append(tracker)
+        return tracker
+
+    def modify(self, tracker, name):
+        tracker.on_modified(FileModifiedEvent(str(self.src / name)))
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met in time")
+            time.sleep(0.01)
+
+    def session_messages(self, action):
+        return [payload for _, payload in self.sessions.get(0) if payload["action"] == action]
+
+
+class TestEventHandoff(LegacyTrackerTestCase):
+    def test_data_files_live_under_home(self):
+        self.assertEqual(self.legacy.DATA_FILE, self.home / ".codechrono.json")
+
+    def test_worker_thread_updates_sessions(self):
+        tracker = self.make_tracker()
+        handled = []
+        handle = tracker.worker.handle
+        tracker.worker.handle = lambda *item: (handled.append(threading.current_thread().name), handle(*item))
+        self.modify(tracker, "app.py")
+        self.modify(tracker, "notes.unknownext")
+        self.wait_for(lambda: len(handled) == 2)
+        self.assertEqual(set(handled), {"codechrono-worker"})
+        self.assertEqual([key[1] for key in tracker.active_sessions], ["python"])
+
+    def test_stop_drains_queue_and_ends_sessions(self):
+        tracker = self.make_tracker()
+        release = threading.Event()
+        handle = tracker.worker.handle
+        tracker.worker.handle = lambda *item: (release.wait(), handle(*item))
+        for name in ("a.py", "b.go", "c.rs"):
+            self.modify(tracker, name)
+        release.set()
+        tracker.stop()
+        self.assertEqual(tracker.queue.stats()["dequeued"], 3)
+        self.assertFalse(tracker.active_sessions)
+        self.assertEqual(sorted(m["language"] for m in self.session_messages("end")), ["go", "python", "rust"])
+
+    def test_overflow_coalesces_events_of_the_same_file(self):
+        tracker = self.make_tracker(queue_size=2, overflow="coalesce")
+        blocked = threading.Event()
+        release = threading.Event()
+        seen = []
+        tracker.worker.handle = lambda path, timestamp: (blocked.set(), release.wait(), seen.append(Path(path).name))
+        self.modify(tracker, "first.py")
+        self.wait_for(blocked.is_set)
+        for name in ("a.py", "b.py", "a.py", "c.py"):
+            self.modify(tracker, name)
+        release.set()
+        tracker.stop()
+        # a.py was replaced in place, then the queue was still full for c.py
+        self.assertEqual(seen, ["first.py", "b.py", "c.py"])
+        stats = tracker.queue.stats()
+        self.assertEqual((stats["coalesced"], stats["dropped"]), (1, 1))
+
+    def test_ignored_paths_are_not_queued(self):
+        tracker = self.make_tracker()
+        tracker.on_modified(FileModifiedEvent(str(self.src / ".git" / "index")))
+        tracker.on_modified(FileModifiedEvent(str(self.src / "build" / "out.py")))
+        self.modify(tracker, "app.py")
+        tracker.stop()
+        self.assertEqual(tracker.queue.stats()["enqueued"], 1)
+
+    def test_coalesced_events_never_move_activity_back(self):
+        tracker = self.make_tracker(queue_size=2, overflow="coalesce")
+        blocked = threading.Event()
+        release = threading.Event()
+        seen = []
+        handle = tracker.handle_modification
+        tracker.worker.handle = lambda path, timestamp: (blocked.set(), release.wait(), handle(path, timestamp),
+                                                         seen.append(timestamp))
+        self.modify(tracker, "first.py")
+        self.wait_for(blocked.is_set)
+        for name in ("a.py", "b.py", "a.py"):
+            self.modify(tracker, name)
+        release.set()
+        self.wait_for(lambda: len(seen) == 3)
+        # The second a.py event took the first one's place, ahead of b.py
+        self.assertGreater(seen[1], seen[2])
+        ((key, session),) = tracker.active_sessions.items()
+        self.assertEqual(session.last_activity, max(seen))
+
+    def test_overflow_drops_oldest(self):
+        tracker = self.make_tracker(queue_size=2, overflow="drop-oldest")
+        blocked = threading.Event()
+        release = threading.Event()
+        seen = []
+        tracker.worker.handle = lambda path, timestamp: (blocked.set(), release.wait(), seen.append(Path(path).name))
+        self.modify(tracker, "first.py")
+        self.wait_for(blocked.is_set)
+        for name in ("a.py", "b.py", "a.py", "c.py"):
+            self.modify(tracker, name)
+        release.set()
+        tracker.stop()
+        self.assertEqual(seen, ["first.py", "a.py", "c.py"])
+        self.assertEqual(tracker.queue.stats()["dropped"], 2)
+
+
+class TestIdleDeadlines(LegacyTrackerTestCase):
+    def wait_for_end(self, tracker):
+        self.wait_for(lambda: not tracker.active_sessions)
+        return time.monotonic()
+
+    def test_session_ends_idle_timeout_after_last_event(self):
+        tracker = self.make_tracker(idle_timeout=0.3)
+        self.modify(tracker, "app.py")
+        last_event = time.monotonic()
+        self.wait_for(lambda: tracker.active_sessions)
+        ended = self.wait_for_end(tracker)
+        self.assertGreaterEqual(ended - last_event, 0.3)
+        self.assertLess(ended - last_event, 0.8)
+        self.assertEqual([m["language"] for m in self.session_messages("end")], ["python"])
+
+    def test_activity_pushes_the_deadline_back(self):
+        tracker = self.make_tracker(idle_timeout=0.4)
+        self.modify(tracker, "app.py")
+        for _ in range(3):
+            time.sleep(0.2)
+            self.modify(tracker, "app.py")
+        last_event = time.monotonic()
+        self.wait_for(lambda: tracker.queue.stats()["dequeued"] == 4)
+        self.assertTrue(tracker.active_sessions)
+        ended = self.wait_for_end(tracker)
+        self.assertGreaterEqual(ended - last_event, 0.4)
+        self.assertEqual(len(self.session_messages("start")), 1)
+
+    def test_sessions_end_independently(self):
+        tracker = self.make_tracker(idle_timeout=0.3)
+        self.modify(tracker, "app.py")
+        time.sleep(0.2)
+        self.modify(tracker, "main.go")
+        self.wait_for(lambda: [key[1] for key in tracker.active_sessions] == ["go"], timeout=0.35)
+        self.wait_for_end(tracker)
+        self.assertEqual([m["language"] for m in self.session_messages("end")], ["python", "go"])
+
+    def test_stop_returns_promptly_with_distant_deadlines(self):
+        tracker = self.make_tracker(idle_timeout=300)
+        self.modify(tracker, "app.py")
+        self.wait_for(lambda: tracker.active_sessions)
+        started = time.monotonic()
+        tracker.stop()
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(tracker.worker.thread.is_alive())
+        self.assertEqual(len(self.session_messages("end")), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
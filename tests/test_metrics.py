@@ -0,0 +1,76 @@
+import unittest
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from codechrono.core.metrics import MetricsRegistry, SnapshotWriter, metrics_file, read_snapshot, snapshot_files
+from codechrono.core.profiling import SamplingProfiler
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_metrics_and_prometheus_text(self):
+        registry = MetricsRegistry()
+        events = registry.counter("events_total", "Events")
+        self.assertIs(registry.counter("events_total", "Events"), events)
+        with self.assertRaises(ValueError):
+            registry.gauge("events_total", "Events")
+        events.inc()
+        events.inc(2)
+        depth = registry.gauge("depth", "Depth")
+        depth.set_function(lambda: 7)
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 3.0):
+            latency.observe(value)
+
+        self.assertEqual(latency.quantile(0.5), 0.1)
+        self.assertEqual(latency.quantile(0.75), 1.0)
+        self.assertEqual(latency.quantile(1.0), float("inf"))
+        text = registry.to_prometheus()
+        self.assertIn("# TYPE events_total counter\nevents_total 3\n", text)
+        self.assertIn("depth 7\n", text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("latency_seconds_count 4\n", text)
+
+    def test_snapshot_file(self):
+        registry = MetricsRegistry()
+        registry.counter("events_total", "Events").inc(5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = metrics_file("start", Path(tmp))
+            writer = SnapshotWriter(registry, path, interval=60).start()
+            # The first snapshot is written right away, not after an interval
+            self.assertEqual(read_snapshot(path)["metrics"], {"events_total": 5})
+            registry.counter("events_total", "Events").inc()
+            SnapshotWriter(registry, metrics_file("watch", Path(tmp)), interval=60).start().stop()
+            writer.stop()
+            snapshot = read_snapshot(path)
+            self.assertEqual([p.name for p in snapshot_files(Path(tmp))], ["metrics-start.json", "metrics-watch.json"])
+        self.assertEqual(snapshot["metrics"], {"events_total": 6})
+        self.assertIsNone(read_snapshot(path))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_samples_other_threads(self):
+        def busy_loop(stop):
+            while not stop.is_set():
+                sum(range(1000))
+
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+        worker.start()
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        time.sleep(0.1)
+        profiler.stop()
+        stop.set()
+        worker.join()
+        self.assertTrue(any(stack.startswith("busy;") and "busy_loop" in stack for stack in profiler.samples))
+        with tempfile.TemporaryDirectory() as tmp:
+            count = profiler.dump(Path(tmp) / "profile.folded")
+            lines = (Path(tmp) / "profile.folded").read_text().splitlines()
+        self.assertEqual(count, sum(int(line.rsplit(" ", 1)[1]) for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import os
+import tempfile
+from pathlib import Path
+
+from codechrono.core.planner import AdaptivePoller, WatchPlanner, WatchSpec, plan_tree
+from codechrono.utils.ignore import IgnoreMatcher
+
+
+class RecordingObserver:
+    """Stands in for a watchdog observer, recording scheduled watches."""
+
+    def __init__(self):
+        self.watches = {}
+
+    def schedule(self, handler, path, recursive=False):
+        watch = (path, recursive)
+        self.watches[watch] = handler
+        return watch
+
+    def unschedule(self, watch):
+        del self.watches[watch]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.events = []
+
+    def dispatch(self, event):
+        self.events.append((event.event_type, event.src_path))
+
+
+class TestWatchPlanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "repo")
+        for directory in ("src/core", "src/ui", "docs", "node_modules/dep/lib", "web/node_modules/x"):
+            os.makedirs(os.path.join(self.root, *directory.split("/")))
+        self.matcher = IgnoreMatcher(["node_modules"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, relative=""):
+        return os.path.join(self.root, *relative.split("/")) if relative else self.root
+
+    def test_plan_prunes_ignored_subtrees(self):
+        # Five ignored directories are not worth extra watches by default
+        self.assertEqual(plan_tree(self.root, self.matcher.is_ignored_dir), [WatchSpec(self.path(), True, 11)])
+        specs = plan_tree(self.root, self.matcher.is_ignored_dir, min_pruned=1)
+        self.assertEqual(specs, [
+            WatchSpec(self.path(), False, 1),
+            WatchSpec(self.path("docs"), True, 1),
+            WatchSpec(self.path("src"), True, 3),
+            WatchSpec(self.path("web"), False, 1),
+        ])
+        # Splits are dropped when the plan would need too many watches
+        self.assertEqual(len(plan_tree(self.root, self.matcher.is_ignored_dir, min_pruned=1, max_watches=2)), 1)
+
+    def test_new_directories_are_planned(self):
+        observer = RecordingObserver()
+        planner = WatchPlanner(observer, RecordingHandler(), self.matcher, watch_budget=100, emitter_budget=10,
+                               min_pruned=1)
+        planner.schedule([self.root])
+        os.makedirs(self.path("web/api"))
+        planner.directory_created(self.path("web/api"))
+        self.assertIn((self.path("web/api"), True), observer.watches)
+
+        # An ignored subtree growing inside a recursive watch splits that watch
+        os.makedirs(self.path("src/node_modules/dep/lib"))
+        planner.directory_created(self.path("src/node_modules"))
+        self.assertNotIn((self.path("src"), True), observer.watches)
+        self.assertIn((self.path("src"), False), observer.watches)
+        self.assertIn((self.path("src/core"), True), observer.watches)
+        self.assertEqual(planner.report()["watched_directories"], 7)
+        planner.stop()
+
+    def test_small_ignored_dirs_stay_in_one_recursive_watch(self):
+        root = os.path.join(self.tmp.name, "pyrepo")
+        for package in range(40):
+            for sub in ("", "a", "b", "c"):
+                os.makedirs(os.path.join(root, f"pkg{package}", sub, "__pycache__"))
+        observer = RecordingObserver()
+        matcher = IgnoreMatcher(["__pycache__", "node_modules"])
+        planner = WatchPlanner(observer, RecordingHandler(), matcher, watch_budget=24272, emitter_budget=64)
+        planner.schedule([root])
+        self.assertEqual(list(observer.watches), [(root, True)])
+        report = planner.report()
+        self.assertEqual((report["native_watches"], report["polled_subtrees"]), (1, 0))
+
+        # A node_modules growing past what the extra watches are worth splits the tree
+        planner.min_pruned = 2
+        modules = os.path.join(root, "pkg0", "node_modules")
+        os.makedirs(modules)
+        planner.directory_created(modules)
+        for i in range(127):
+            os.makedirs(os.path.join(modules, f"dep{i}"))
+            planner.directory_created(os.path.join(modules, f"dep{i}"))
+        self.assertNotIn((root, True), observer.watches)
+        self.assertIn((os.path.join(root, "pkg0"), False), observer.watches)
+        self.assertIn((os.path.join(root, "pkg1"), True), observer.watches)
+        self.assertLessEqual(planner.report()["native_watches"], 64)
+        planner.stop()
+
+    def test_overflow_is_polled(self):
+        observer = RecordingObserver()
+        handler = RecordingHandler()
+        planner = WatchPlanner(observer, handler, self.matcher, watch_budget=3, emitter_budget=10,
+                               poll_min_interval=60)
+        planner.schedule([self.root])
+        report = planner.report()
+        self.assertLessEqual(report["watched_directories"], 3)
+        self.assertGreater(report["polled_subtrees"], 0)
+        self.assertEqual(report["budget_used"], report["watched_directories"] / 3)
+        polled = planner.poller.roots()
+        self.assertTrue(all(os.path.isdir(root) for root in polled))
+        planner.stop()
+
+
+class TestAdaptivePoller(unittest.TestCase):
+    def test_detects_changes_and_backs_off(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            handler = RecordingHandler()
+            poller = AdaptivePoller(handler, IgnoreMatcher(["node_modules"]).is_ignored_dir,
+                                    min_interval=1, max_interval=4, backoff=2)
+            target = Path(tmp) / "a.py"
+            target.write_text("x = 1\n")
+            poller.add(tmp)
+            poller.stop()
+
+            target.write_text("x = 22\n")
+            (Path(tmp) / "pkg").mkdir()
+            (Path(tmp) / "node_modules").mkdir()
+            (Path(tmp) / "node_modules" / "dep.js").write_text("")
+            self.assertEqual(poller.poll(), 2)
+            self.assertEqual(sorted(handler.events), [
+                ("created", str(Path(tmp) / "pkg")),
+                ("modified", str(target)),
+            ])
+            self.assertEqual(poller.interval, 1)
+
+            target.unlink()
+            poller.poll()
+            self.assertIn(("deleted", str(target)), handler.events)
+            poller.poll()
+            poller.poll()
+            self.assertEqual(poller.interval, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
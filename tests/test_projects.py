@@ -0,0 +1,78 @@
+import unittest
+import os
+import tempfile
+from pathlib import Path
+
+from codechrono.utils.projects import ProjectResolver, ProjectTrie
+
+
+class TestProjectTrie(unittest.TestCase):
+    def test_deepest_root_wins(self):
+        trie = ProjectTrie()
+        trie.add("/work/monorepo")
+        trie.add("/work/monorepo/vendor/lib", "lib")
+        self.assertEqual(trie.resolve("/work/monorepo/src/a.py"), "monorepo")
+        self.assertEqual(trie.resolve("/work/monorepo/vendor/lib/x.c"), "lib")
+        self.assertEqual(trie.resolve("/work/monorepo"), "monorepo")
+        self.assertIsNone(trie.resolve("/work/monorepository/a.py"))
+        self.assertIsNone(trie.resolve("/elsewhere/a.py"))
+
+    def test_same_directory_names_get_unique_names(self):
+        trie = ProjectTrie()
+        self.assertEqual(trie.add("/work/a/api"), "api")
+        self.assertEqual(trie.add("/work/b/api"), "b/api")
+        # Registered roots keep their names
+        self.assertEqual(trie.resolve("/work/a/api/main.go"), "api")
+        self.assertEqual(trie.resolve("/work/b/api/main.go"), "b/api")
+        self.assertEqual(trie.add("/work/a/api"), "api")
+        self.assertEqual(trie.add("/home/a/api"), "home/a/api")
+        trie.add("/srv/web", "web")
+        self.assertEqual(trie.add("/work/web"), "work/web")
+        self.assertEqual(trie.resolve("/srv/web/index.html"), "web")
+
+
+class TestProjectResolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "work"
+        (self.root / "api" / ".git").mkdir(parents=True)
+        (self.root / "node_modules" / "dep" / ".git").mkdir(parents=True)
+        (self.root / "web").mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discovery_and_new_repositories(self):
+        saved = Path(self.tmp.name) / "projects.json"
+        resolver = ProjectResolver(saved)
+        resolver.add_watch_roots([str(self.root)])
+        self.assertEqual(resolver.resolve(str(self.root / "api" / "main.go")), "api")
+        self.assertEqual(resolver.resolve(str(self.root / "web" / "app.js")), "work")
+        self.assertEqual(resolver.resolve(str(self.root / "node_modules" / "dep" / "x.js")), "work")
+
+        self.assertIsNone(resolver.directory_created(str(self.root / "web" / "src")))
+        self.assertEqual(resolver.directory_created(str(self.root / "web" / ".git")), "web")
+        self.assertEqual(resolver.resolve(str(self.root / "web" / "app.js")), "web")
+
+        reloaded = ProjectResolver(saved)
+        self.assertEqual(reloaded.roots(), resolver.roots())
+        self.assertIn(os.path.abspath(str(self.root / "web")), reloaded)
+
+    def test_names_are_shared_between_resolvers(self):
+        saved = Path(self.tmp.name) / "projects.json"
+        other = Path(self.tmp.name) / "other" / "api"
+        other.mkdir(parents=True)
+        watch = ProjectResolver(saved)
+        watch.add_watch_roots([str(self.root)], discover=False)
+        backfill = ProjectResolver(saved)
+        backfill.add_watch_roots([str(other)])
+        self.assertEqual(backfill.resolve(str(other / "main.go")), "api")
+        # Roots named by another process are adopted rather than renamed
+        watch.add_watch_roots([str(self.root / "api")], discover=False)
+        self.assertEqual(watch.resolve(str(other / "main.go")), "api")
+        self.assertEqual(watch.resolve(str(self.root / "api" / "main.go")), "work/api")
+        self.assertEqual(ProjectResolver(saved).roots(), watch.roots())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from codechrono.cli.query import show
+from codechrono.core.journal import make_session
+from codechrono.core.storage import SessionReader, SessionRepository
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSessionReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.paths = (self.root / "data.json", self.root / "data.journal", self.root / "data.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def listing(self):
+        return {entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns) for entry in os.scandir(self.root)}
+
+    def test_missing_files_are_empty_and_not_created(self):
+        reader = SessionReader(*self.paths)
+        self.assertEqual(reader.sessions_between(), [])
+        self.assertEqual(reader.window_totals(datetime.now() - timedelta(days=7))["languages"], {})
+        reader.close()
+        self.assertEqual(self.listing(), {})
+
+    def test_matches_repository_without_writing(self):
+        now = datetime.now().replace(microsecond=0)
+        repo = SessionRepository(*self.paths)
+        for day in range(10):
+            start = now - timedelta(days=day, hours=2)
+            repo.record(make_session("python", "app", start, start + timedelta(minutes=30)))
+        repo.compact()
+        repo.record(make_session("rust", None, now - timedelta(hours=3), now - timedelta(hours=2.5)))
+        cutoff = now - timedelta(days=5)
+        expected = (repo.data["languages"], repo.window_totals(cutoff), repo.project_language_totals(cutoff))
+        # Without a writer the database has no -wal/-shm files, and reads must not create them
+        repo.journal.close()
+        repo.store.close()
+        # A torn record, as left by a tracker killed mid-append
+        with open(self.paths[1], "a") as f:
+            f.write('{"seq": 99, "sess')
+        before = self.listing()
+        self.assertFalse(any(name.endswith(("-wal", "-shm")) for name in before))
+
+        reader = SessionReader(*self.paths)
+        self.assertEqual((reader.data["languages"], reader.window_totals(cutoff),
+                          reader.project_language_totals(cutoff)), expected)
+        self.assertEqual(len(reader.sessions_between()), 11)
+        reader.close()
+        self.assertEqual(self.listing(), before)
+
+        # Next to a running writer, reads see its uncheckpointed sessions
+        writer = SessionRepository(*self.paths)
+        writer.compact()
+        reader = SessionReader(*self.paths)
+        self.assertEqual(len(reader.sessions_between()), 11)
+        self.assertEqual(reader.window_totals(cutoff), expected[1])
+        reader.close()
+        writer.close()
+
+    def test_old_schema_is_reported_not_migrated(self):
+        repo = SessionRepository(self.paths[0], self.paths[1], self.root / "other.db")
+        repo.record(make_session("python", None, datetime.now() - timedelta(hours=2), datetime.now()))
+        repo.close()
+        conn = sqlite3.connect(str(self.paths[2]))
+        conn.execute("CREATE TABLE sessions (id INTEGER PRIMARY KEY, language TEXT NOT NULL, start_time TEXT NOT NULL, "
+                     "end_time TEXT NOT NULL, start_ts REAL NOT NULL, duration REAL NOT NULL)")
+        conn.commit()
+        conn.close()
+        out = io.StringIO()
+        with mock.patch("sys.stderr", io.StringIO()) as err:
+            self.assertEqual(show("stats", *self.paths, out=out), 1)
+        self.assertIn("rebuild-rollups", err.getvalue())
+        self.assertEqual(out.getvalue(), "")
+        conn = sqlite3.connect(str(self.paths[2]))
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        conn.close()
+        self.assertNotIn("project", columns)
+
+    def test_show_plain_and_json(self):
+        now = datetime.now().replace(microsecond=0)
+        repo = SessionRepository(*self.paths)
+        repo.record(make_session("python", "app", now - timedelta(hours=2), now - timedelta(hours=1.5)))
+        repo.record(make_session("go", None, now - timedelta(hours=4), now - timedelta(hours=2.5)))
+        repo.close()
+
+        out = io.StringIO()
+        show("stats", *self.paths, days=1, by_project=True, out=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "Coding Statistics (Last 1 days)")
+        self.assertTrue(lines[2].startswith("Go "))
+        self.assertIn("Total sessions: 2", lines)
+
+        out = io.StringIO()
+        show("stats", *self.paths, days=1, as_json=True, out=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual([row["language"] for row in report["languages"]], ["go", "python"])
+        self.assertEqual(report["all_time"], {"total_hours": 2.0, "sessions": 2})
+        self.assertIsNone(report["projects"])
+
+    def test_edited_lines_are_totalled(self):
+        now = datetime.now().replace(microsecond=0)
+        repo = SessionRepository(*self.paths)
+        repo.record(make_session("python", "app", now - timedelta(hours=5), now - timedelta(hours=4.5), 40, 900))
+        repo.record(make_session("go", None, now - timedelta(hours=4), now - timedelta(hours=3.5)))
+        repo.compact()
+        repo.record(make_session("python", "app", now - timedelta(hours=2), now - timedelta(hours=1.5), 10, 200))
+        repo.close()
+
+        out = io.StringIO()
+        show("stats", *self.paths, days=1, as_json=True, by_project=True, out=out)
+        report = json.loads(out.getvalue())
+        languages = {row["language"]: row for row in report["languages"]}
+        self.assertEqual(languages["python"]["edited_lines"], 50)
+        # Sessions tracked without measuring edits stay unmeasured, not zero
+        self.assertNotIn("edited_lines", languages["go"])
+        self.assertEqual(report["all_time"]["edited_lines"], 50)
+        self.assertEqual(report["projects"][0]["edited_lines"], 50)
+
+        out = io.StringIO()
+        show("stats", *self.paths, days=1, out=out)
+        self.assertIn("Total lines edited: 50", out.getvalue().splitlines())
+
+    def test_cli_skips_heavy_imports(self):
+        repo = SessionRepository(*self.paths)
+        repo.record(make_session("python", "app", datetime.now() - timedelta(hours=2), datetime.now()))
+        repo.close()
+        code = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from codechrono.cli.query import main\n"
+            f"main(['stats', '--project'], *map(Path, {[str(path) for path in self.paths]!r}))\n"
+            "print(sorted(m for m in ('asyncio', 'click', 'numpy', 'rich', 'watchdog') if m in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
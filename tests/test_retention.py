@@ -0,0 +1,166 @@
+import unittest
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from codechrono.core.eventlog import EventLog
+from codechrono.core.journal import make_session
+from codechrono.core.retention import RetentionPolicy, RetentionWorker
+from codechrono.core.storage import SessionReader, SessionRepository
+from codechrono.core.tracker import ActivityTracker
+
+
+class TestSessionRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.paths = (root / "data.json", root / "data.journal", root / "data.db")
+        self.now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def record_history(self, repo, days):
+        for day in range(days, 0, -1):
+            start = self.now - timedelta(days=day)
+            lines = day % 5 or None
+            repo.record(make_session("python", "api", start, start + timedelta(minutes=30), lines, lines and lines * 30))
+            repo.record(make_session("go", None, start + timedelta(minutes=40), start + timedelta(hours=1)))
+            repo.record(make_session("python", "web", start + timedelta(hours=2), start + timedelta(hours=2.75)))
+        repo.compact()
+
+    def test_totals_survive_downsampling(self):
+        repo = SessionRepository(*self.paths)
+        self.record_history(repo, 400)
+        day_start = (self.now - timedelta(days=200)).replace(hour=0)
+        windows = [(None, None), (day_start, day_start + timedelta(days=30)), (self.now - timedelta(days=7), None)]
+        before = [repo.project_language_totals(start, end) for start, end in windows]
+        all_time = json.loads(json.dumps(repo.data["languages"]))
+        stats_window = repo.window_totals(self.now - timedelta(days=60))
+
+        policy = RetentionPolicy(raw_days=30, hourly_days=180)
+        report = repo.apply_retention(*policy.horizons(self.now), batch_size=100)
+        self.assertGreater(report["sessions"], 1000)
+        self.assertEqual(repo.store.count(), 3 * 400 - report["sessions"])
+        # Raw sessions older than 180 days went straight to daily buckets
+        self.assertEqual(report["hourly_buckets"], 0)
+        self.assertGreater(report["bytes_reclaimed"], 0)
+
+        for (start, end), expected in zip(windows, before):
+            totals = repo.project_language_totals(start, end)
+            self.assertEqual(totals.keys(), expected.keys())
+            for key, entry in expected.items():
+                self.assertEqual(totals[key]["sessions"], entry["sessions"])
+                self.assertAlmostEqual(totals[key]["total_hours"], entry["total_hours"])
+                self.assertEqual(totals[key].get("edited_lines"), entry.get("edited_lines"))
+        self.assertEqual(repo.window_totals(self.now - timedelta(days=60)), stats_window)
+
+        # Rebuilding the aggregates reads the buckets for downsampled history
+        repo.rebuild_aggregates()
+        for language, entry in all_time.items():
+            self.assertEqual(repo.data["languages"][language]["sessions"], entry["sessions"])
+            self.assertAlmostEqual(repo.data["languages"][language]["total_hours"], entry["total_hours"])
+        repo.close()
+
+        reader = SessionReader(*self.paths)
+        self.assertEqual(reader.language_totals()["go"]["sessions"], 400)
+        reader.close()
+
+    def test_hourly_buckets_age_into_days(self):
+        repo = SessionRepository(*self.paths)
+        self.record_history(repo, 60)
+        repo.apply_retention(*RetentionPolicy(raw_days=10, hourly_days=100).horizons(self.now))
+        totals = repo.language_totals()
+
+        later = self.now + timedelta(days=70)
+        report = repo.apply_retention(*RetentionPolicy(raw_days=10, hourly_days=100).horizons(later))
+        self.assertGreater(report["hourly_buckets"], 0)
+        self.assertEqual(repo.store.count(), 1)  # the newest row is always kept
+        self.assertEqual(repo.language_totals()["python"]["sessions"], totals["python"]["sessions"])
+        repo.close()
+
+    def test_backfill_skips_downsampled_history(self):
+        repo = SessionRepository(*self.paths)
+        self.record_history(repo, 40)
+        repo.apply_retention(*RetentionPolicy(raw_days=20, hourly_days=30).horizons(self.now))
+        old, recent = (make_session("rust", None, start, start + timedelta(minutes=30))
+                       for start in (self.now - timedelta(days=25), self.now - timedelta(days=5)))
+        self.assertEqual(repo.merge_sessions([old, recent]), 1)
+        repo.close()
+
+    def test_policy_from_config(self):
+        self.assertIsNone(RetentionPolicy.from_config(None))
+        self.assertEqual(RetentionPolicy.from_config({"raw_days": 7}).hourly_days, 365)
+        with self.assertRaises(ValueError):
+            RetentionPolicy.from_config({"raw_days": 30, "hourly_days": 10})
+        with self.assertRaises(ValueError):
+            RetentionPolicy.from_config({"raw_dayz": 30})
+
+
+class TestEventRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.events = Path(self.tmp.name) / "events"
+        self.config = Path(self.tmp.name) / "config.json"
+        self.config.write_text(json.dumps({
+            "event_log_dir": str(self.events),
+            "retention": {"raw_days": 10, "hourly_days": 30, "max_segments": 3},
+        }))
+        self.now = datetime.now()
+        log = EventLog(self.events, segment_bytes=2000, flush_interval=0)
+        start = (self.now - timedelta(days=60)).timestamp()
+        for i in range(600):
+            log.append(f"/src/app/f{i % 7}.py", "modified", "python", start + i * 8640)
+            if i % 3 == 0:
+                log.append("/src/app/README.md", "created", "markdown", start + i * 8640 + 60)
+        log.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_segments_fold_into_tiers(self):
+        tracker = ActivityTracker(self.config)
+        ranges = [(None, None), (self.now - timedelta(days=45), None), (self.now - timedelta(days=5), None)]
+        before = [tracker.get_activity_summary(start, end) for start, end in ranges]
+        heatmap = tracker.get_activity_heatmap()
+        projects = tracker.get_project_activity()
+        segments = len(tracker.event_log.segments())
+
+        report = tracker.apply_retention()
+        self.assertEqual(report["segments"], 3)
+        self.assertTrue(report["pending"])
+        while tracker.apply_retention()["pending"]:
+            pass
+        remaining = tracker.event_log.segments()
+        self.assertLess(len(remaining), segments)
+        # The oldest remaining segment still holds events newer than 10 days
+        self.assertGreater(remaining[1][0], (self.now - timedelta(days=10)).timestamp())
+
+        self.assertEqual(tracker.get_activity_summary(), before[0])
+        self.assertEqual(tracker.get_activity_heatmap(), heatmap)
+        self.assertEqual(tracker.get_project_activity(), projects)
+        # Buckets count from the start of their day, so a window starting
+        # mid-day in the daily tier misses the rest of that day (14 events)
+        window = tracker.get_activity_summary(*ranges[1])
+        self.assertLessEqual(before[1]["total_events"] - window["total_events"], 14)
+        self.assertEqual(tracker.get_activity_summary(*ranges[2]), before[2])
+        tracker.close()
+
+        # A new tracker (e.g. the summary command) reads the tiers too
+        reader = ActivityTracker(self.config)
+        self.assertEqual(reader.get_activity_summary()["total_events"], before[0]["total_events"])
+        reader.close()
+
+    def test_worker_runs_passes_until_done(self):
+        tracker = ActivityTracker(self.config)
+        worker = RetentionWorker({"events": tracker.apply_retention}, interval=3600, delay=0, pause=0)
+        self.assertTrue(worker.run_once())
+        while worker.run_once():
+            pass
+        self.assertFalse(worker.last_reports["events"]["pending"])
+        tracker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from codechrono.core.scheduler import DeadlineScheduler
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    def test_expires_in_deadline_order(self):
+        scheduler = DeadlineScheduler()
+        scheduler.schedule("python", 30)
+        scheduler.schedule("rust", 10)
+        scheduler.schedule("go", 20)
+        self.assertEqual(scheduler.next_deadline(), 10)
+        self.assertEqual(scheduler.pop_expired(25), ["rust", "go"])
+        self.assertEqual(len(scheduler), 1)
+
+    def test_rescheduling_moves_deadline_without_growing_heap(self):
+        scheduler = DeadlineScheduler()
+        for now in range(1000):
+            scheduler.schedule("python", now + 300)
+        self.assertEqual(len(scheduler._heap), 1)
+        self.assertEqual(scheduler.pop_expired(400), [])
+        self.assertEqual(scheduler.next_deadline(), 1299)
+        self.assertEqual(scheduler.pop_expired(1299), ["python"])
+        self.assertIsNone(scheduler.next_deadline())
+
+    def test_earlier_deadline_and_cancel(self):
+        scheduler = DeadlineScheduler()
+        scheduler.schedule("a", 50)
+        scheduler.schedule("a", 5)
+        scheduler.schedule("b", 7)
+        scheduler.cancel("b")
+        self.assertEqual(scheduler.pop_expired(10), ["a"])
+        self.assertEqual(scheduler.pop_expired(100), [])
+        self.assertNotIn("a", scheduler)
+
+
+if __name__ == '__main__':
+    unittest.main()
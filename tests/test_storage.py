@@ -0,0 +1,110 @@
+import unittest
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from codechrono.core.journal import make_session
+from codechrono.core.storage import SessionRepository
+
+
+class TestSessionRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.paths = (root / "data.json", root / "data.journal", root / "data.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_range_queries_span_store_and_journal(self):
+        repo = SessionRepository(*self.paths)
+        repo.record(make_session("python", None, datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30)))
+        repo.record(make_session("rust", None, datetime(2024, 1, 3, 9), datetime(2024, 1, 3, 9, 30)))
+        repo.compact()
+        repo.record(make_session("python", None, datetime(2024, 1, 5, 9), datetime(2024, 1, 5, 10)))
+
+        self.assertEqual(repo.store.count(), 2)
+        sessions = repo.sessions_between(datetime(2024, 1, 2))
+        self.assertEqual([s["language"] for s in sessions], ["rust", "python"])
+
+        totals = repo.language_totals(datetime(2024, 1, 2), datetime(2024, 1, 6))
+        self.assertEqual(totals["python"], {"total_hours": 1.0, "sessions": 1})
+        self.assertEqual(totals["rust"]["sessions"], 1)
+        repo.close()
+
+    def test_reopen_keeps_history_and_totals(self):
+        repo = SessionRepository(*self.paths)
+        for day in range(1, 4):
+            repo.record(make_session("python", None, datetime(2024, 1, day, 9), datetime(2024, 1, day, 9, 30)))
+        repo.close()
+
+        repo = SessionRepository(*self.paths)
+        self.assertEqual(repo.data["sessions"], [])
+        self.assertEqual(repo.data["languages"]["python"]["sessions"], 3)
+        self.assertEqual(len(repo.sessions_between()), 3)
+        repo.close()
+
+    def test_stored_sessions_left_in_journal_are_not_double_counted(self):
+        repo = SessionRepository(*self.paths)
+        repo.record(make_session("go", None, datetime(2024, 1, 2, 9), datetime(2024, 1, 2, 9, 30)))
+        repo.store.add_sessions(repo.data["sessions"])
+        repo.journal.close()
+        repo.store.close()
+
+        repo = SessionRepository(*self.paths)
+        self.assertEqual(repo.language_totals()["go"]["sessions"], 1)
+        repo.close()
+
+    def test_window_totals_match_raw_sessions(self):
+        repo = SessionRepository(*self.paths)
+        for day in range(1, 29):
+            start = datetime(2024, 1, day, day % 20)
+            repo.record(make_session("python", "api", start, start + timedelta(minutes=30)))
+            repo.record(make_session("rust", None, datetime(2024, 1, day, 21), datetime(2024, 1, day, 21, 15)))
+        repo.compact()
+
+        start = datetime(2024, 1, 3, 12)
+        end = datetime(2024, 1, 25, 10)
+        totals = repo.window_totals(start, end)
+        expected = repo.language_totals(start, end)
+        for language, entry in expected.items():
+            self.assertEqual(totals["languages"][language]["sessions"], entry["sessions"])
+            self.assertAlmostEqual(totals["languages"][language]["total_hours"], entry["total_hours"])
+        self.assertEqual(totals["projects"]["api"]["sessions"], expected["python"]["sessions"])
+        repo.close()
+
+    def test_rollups_rebuilt_for_legacy_snapshot(self):
+        legacy = {
+            "sessions": [make_session("python", None, datetime(2024, 1, day, 9), datetime(2024, 1, day, 9, 30))
+                         for day in (1, 2)],
+            "languages": {"python": {"total_hours": 1.0, "sessions": 2}},
+        }
+        self.paths[0].write_text(json.dumps(legacy))
+
+        repo = SessionRepository(*self.paths)
+        totals = repo.window_totals(datetime(2024, 1, 2))
+        self.assertEqual(totals["languages"]["python"]["sessions"], 1)
+        self.assertEqual(repo.store.count(), 2)
+        repo.close()
+
+
+    def test_same_start_in_two_projects(self):
+        repo = SessionRepository(*self.paths)
+        start = datetime(2024, 1, 2, 9)
+        repo.record(make_session("python", "api", start, start + timedelta(minutes=30)))
+        repo.record(make_session("python", "web", start, start + timedelta(minutes=15)))
+        repo.record(make_session("python", None, start, start + timedelta(minutes=6)))
+        repo.compact()
+        repo.store.add_sessions([make_session("python", "api", start, start + timedelta(minutes=30))])
+
+        self.assertEqual(repo.store.count(), 3)
+        totals = repo.project_language_totals(datetime(2024, 1, 1))
+        self.assertEqual(totals[("api", "python")], {"total_hours": 0.5, "sessions": 1})
+        self.assertEqual(totals[("web", "python")], {"total_hours": 0.25, "sessions": 1})
+        self.assertEqual(totals[(None, "python")]["sessions"], 1)
+        repo.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import csv
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from codechrono.core.events import EventBuffer
+from codechrono.core.tracker import ActivityTracker
+
+
+class TestEventBuffer(unittest.TestCase):
+    def test_columns_and_ranges(self):
+        buffer = EventBuffer()
+        buffer.append("a.py", "modified", "python", 100.0)
+        buffer.append("b.rs", "created", "rust", 105.0)
+        buffer.append("a.py", "modified", "python", 103.0)  # clock stepped back
+        buffer.append("a.py", "deleted", "python", 110.0)
+
+        self.assertEqual(len(buffer.paths), 2)
+        self.assertEqual(list(buffer.timestamps), [100.0, 105.0, 105.0, 110.0])
+        lo, hi = buffer.index_range(101.0, 110.0)
+        self.assertEqual((lo, hi), (1, 3))
+        self.assertEqual(buffer.count_paths(lo, hi), {"b.rs": 1, "a.py": 1})
+        self.assertEqual(buffer.count_languages(), {"python": 3, "rust": 1})
+        self.assertEqual(buffer.nbytes(), 4 * 15)
+        with self.assertRaises(ValueError):
+            buffer.append("a.py", "opened", "python", 120.0)
+
+
+class TestActivityTracker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = Path(self.tmp.name) / "config.json"
+        self.config.write_text(json.dumps({"event_log_dir": str(Path(self.tmp.name) / "events")}))
+        self.tracker = ActivityTracker(self.config)
+
+    def tearDown(self):
+        self.tracker.close()
+        self.tmp.cleanup()
+
+    def test_summary_filters_by_start_time(self):
+        self.tracker.track_file_changes([(Path("a.py"), "modified"), (Path("b.md"), "created")])
+        summary = self.tracker.get_activity_summary(datetime.now() - timedelta(minutes=1))
+        self.assertEqual(summary["total_events"], 2)
+        self.assertEqual(summary["file_activity"], {"a.py": 1, "b.md": 1})
+        self.assertEqual(summary["language_activity"], {"python": 1, "markdown": 1})
+
+        later = self.tracker.get_activity_summary(datetime.now() + timedelta(minutes=1))
+        self.assertEqual(later["total_events"], 0)
+        self.assertEqual(later["file_activity"], {})
+        self.assertEqual(later["language_activity"], {})
+
+    def test_activity_log_and_csv_export(self):
+        self.tracker.track_file_change(Path("a.py"), "modified")
+        self.assertEqual(self.tracker.activity_log["a.py"][0]["event_type"], "modified")
+
+        output = Path(self.tmp.name) / "out.csv"
+        self.tracker.export_data("csv", output)
+        with open(output) as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ["file_path", "timestamp", "event_type", "language"])
+        self.assertEqual(rows[1][0], "a.py")
+
+    def test_export_range_pushdown(self):
+        self.tracker.track_file_change(Path("a.py"), "modified")
+        output = Path(self.tmp.name) / "out.ndjson"
+        count = self.tracker.export_data("ndjson", output, end_time=datetime.now() - timedelta(minutes=1))
+        self.assertEqual(count, 0)
+        self.assertEqual(self.tracker.export_data("ndjson", output, start_time=datetime.now() - timedelta(minutes=1)), 1)
+
+    def test_events_persist_across_trackers(self):
+        self.tracker.track_file_change(Path("a.py"), "modified")
+        self.tracker.close()
+        reopened = ActivityTracker(self.config)
+        reopened.track_file_change(Path("b.rs"), "created")
+        summary = reopened.get_activity_summary()
+        reopened.close()
+        self.assertEqual(summary["file_activity"], {"a.py": 1, "b.rs": 1})
+        self.assertEqual(len(reopened.events), 1)
+
+    def test_project_activity(self):
+        root = Path(self.tmp.name) / "proj"
+        (root / "lib" / ".git").mkdir(parents=True)
+        self.tracker.add_watch_roots([root])
+        self.tracker.track_file_changes([
+            (root / "a.py", "modified"), (root / "lib" / "b.rs", "modified"), (root / "lib" / "b.rs", "modified"),
+        ])
+        projects = self.tracker.get_project_activity()
+        self.assertEqual(projects["proj"], {"events": 1, "files": 1, "languages": {"python": 1}})
+        self.assertEqual(projects["lib"], {"events": 2, "files": 1, "languages": {"rust": 2}})
+
+    def test_in_memory_mode(self):
+        tracker = ActivityTracker(self.config, persist=False)
+        tracker.track_file_change(Path("a.py"), "modified")
+        self.assertIsNone(tracker.event_log)
+        self.assertEqual(tracker.get_activity_summary()["total_events"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from codechrono.core.watcher import CodeChangeHandler, EventCoalescer
+
+
+class TestEventCoalescer(unittest.TestCase):
+    def test_collapses_sequences_per_path(self):
+        coalescer = EventCoalescer(window=10)
+        a, b, c, d = Path("a.py"), Path("b.py"), Path("c.py"), Path("d.py")
+        for path, event_type in [
+            (a, "modified"), (a, "modified"), (a, "modified"),
+            (b, "created"), (b, "modified"),
+            (c, "created"), (c, "deleted"),
+            (d, "deleted"), (d, "created"),
+        ]:
+            coalescer.add(path, event_type)
+
+        self.assertEqual(coalescer.flush(), [])
+        self.assertEqual(
+            coalescer.flush(force=True),
+            [(a, "modified"), (b, "created"), (d, "modified")],
+        )
+        self.assertEqual(len(coalescer), 0)
+
+    def test_releases_after_quiet_window(self):
+        coalescer = EventCoalescer(window=0.01)
+        coalescer.add(Path("a.py"), "modified")
+        time.sleep(0.02)
+        self.assertEqual(coalescer.flush(), [(Path("a.py"), "modified")])
+
+
+class TestCodeChangeHandler(unittest.TestCase):
+    def test_atomic_save_reports_target_modified(self):
+        received = []
+        handler = CodeChangeHandler(lambda path, kind: received.append((path, kind)), {".swp"})
+        events = [
+            SimpleNamespace(is_directory=False, event_type="created", src_path="/p/.main.py.swp"),
+            SimpleNamespace(is_directory=False, event_type="moved", src_path="/p/.main.py.swp",
+                            dest_path="/p/main.py"),
+        ]
+        for event in events:
+            handler.on_any_event(event)
+        self.assertEqual(received, [(Path("/p/main.py"), "modified")])
+
+
+if __name__ == '__main__':
+    unittest.main()
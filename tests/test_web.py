@@ -0,0 +1,103 @@
+import unittest
+import json
+import tempfile
+from pathlib import Path
+
+from codechrono.core.bus import EventBus
+from codechrono.core.tracker import ActivityTracker
+from codechrono.web.app import create_app
+
+
+class TestWebApp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        config = Path(self.tmp.name) / "config.json"
+        config.write_text(json.dumps({"event_log_dir": str(Path(self.tmp.name) / "events")}))
+        self.tracker = ActivityTracker(config)
+        self.tracker.track_file_changes([(Path("a.py"), "modified"), (Path("a.py"), "modified"), (Path("b.rs"), "created")])
+        self.app = create_app(self.tracker)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tracker.close()
+        self.tmp.cleanup()
+
+    def test_endpoints(self):
+        self.assertEqual(self.client.get("/api/summary").get_json()["total_events"], 3)
+        self.assertEqual(self.client.get("/api/languages").get_json(), {"python": 2, "rust": 1})
+        self.assertEqual(self.client.get("/api/files?limit=1").get_json(), [{"file": "a.py", "events": 2}])
+        grid = self.client.get("/api/heatmap").get_json()
+        self.assertEqual(sum(map(sum, grid)), 3)
+        self.assertEqual(self.client.get("/api/summary?since=yesterday").status_code, 400)
+
+    def test_prometheus_metrics(self):
+        self.client.get("/api/summary")
+        response = self.client.get("/metrics")
+        self.assertTrue(response.mimetype.startswith("text/plain"))
+        text = response.get_data(as_text=True)
+        self.assertIn("# TYPE codechrono_events_tracked_total counter", text)
+        self.assertIn("codechrono_dashboard_cache_misses", text)
+
+    def test_etag_and_cache(self):
+        first = self.client.get("/api/summary")
+        etag = first.headers["ETag"]
+        cached = self.client.get("/api/summary", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        self.tracker.track_file_change(Path("c.md"), "created")
+        changed = self.client.get("/api/summary", headers={"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json()["total_events"], 4)
+
+        self.client.get("/api/languages")
+        self.assertGreater(self.app.config["RESULT_CACHE"].hits, 0)
+
+    def test_events_since_cursor(self):
+        tail = self.client.get("/api/events").get_json()
+        self.assertEqual(tail["events"], [])
+        self.tracker.track_file_change(Path("d.go"), "modified")
+        self.tracker.track_file_change(Path("e.go"), "modified")
+        page = self.client.get(f"/api/events?cursor={tail['cursor']}&limit=1").get_json()
+        self.assertEqual([e["file_path"] for e in page["events"]], ["d.go"])
+        page = self.client.get(f"/api/events?cursor={page['cursor']}").get_json()
+        self.assertEqual([e["file_path"] for e in page["events"]], ["e.go"])
+        self.assertEqual(self.client.get("/api/events?cursor=bogus").status_code, 400)
+
+
+    def test_stream_from_bus(self):
+        bus = EventBus()
+        self.tracker.bus = bus
+        app = create_app(self.tracker, bus=bus)
+        response = app.test_client().get("/api/stream?topic=file&buffer=8")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        chunks = response.response
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        self.tracker.track_file_change(Path("f.py"), "modified")
+        message = next(chunks).decode()
+        self.assertTrue(message.startswith("event: file\n"))
+        self.assertIn('"file_path": "f.py"', message)
+        response.close()
+        self.assertEqual(bus.stats()["subscribers"], 0)
+
+    def test_stream_session_boundaries(self):
+        config = Path(self.tmp.name) / "sessions.json"
+        config.write_text(json.dumps({"event_log_dir": str(Path(self.tmp.name) / "live"), "session_idle_timeout": 0.1}))
+        bus = EventBus()
+        tracker = ActivityTracker(config, bus=bus)
+        response = create_app(tracker, bus=bus).test_client().get("/api/stream?topic=session")
+        chunks = response.response
+        next(chunks)
+        tracker.track_file_change(Path("g.py"), "modified")
+        tracker.track_file_change(Path("notes.unknownext"), "modified")
+        start = next(chunks).decode()
+        self.assertTrue(start.startswith("event: session\n"))
+        self.assertEqual(json.loads(start.split("data: ", 1)[1])["action"], "start")
+        end = json.loads(next(chunks).decode().split("data: ", 1)[1])
+        self.assertEqual((end["action"], end["language"]), ("end", "python"))
+        self.assertIn("duration", end)
+        response.close()
+        tracker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()